@@ -0,0 +1,35 @@
+from __future__ import annotations
+import time
+import typing
+
+import pawpaw
+
+
+def best_of(func: typing.Callable[[], typing.Any], repeat: int = 3) -> tuple[float, typing.Any]:
+    """Runs func repeatedly, returning the fastest wall time along with the last result"""
+    best = float('inf')
+    rv = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        rv = func()
+        best = min(best, time.perf_counter() - start)
+    return best, rv
+
+
+def make_tree(node_count: int) -> pawpaw.Ito:
+    """Builds a document tree (document → words → chars) having approximately node_count nodes"""
+    word = 'abcd'
+    words = max(1, node_count // (len(word) + 1))
+    string = ' '.join([word] * words)
+    root = pawpaw.Ito(string, desc='document')
+    children = []
+    for i in range(0, len(string), len(word) + 1):
+        w = pawpaw.Ito(string, i, i + len(word), 'word')
+        w.children._add_ordered(*(pawpaw.Ito(string, j, j + 1, 'char') for j in range(i, i + len(word))))
+        children.append(w)
+    root.children._add_ordered(*children)
+    return root
+
+
+def report(name: str, seconds: float, count: int, unit: str = 'nodes') -> None:
+    print(f'{name:<40} {seconds:10.4f}s {count / seconds:14,.0f} {unit}/s')
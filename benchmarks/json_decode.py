@@ -0,0 +1,27 @@
+"""Compares the default and trusted JSON decode paths of Ito.JsonDecoderHook"""
+import argparse
+import json
+
+from pawpaw import Ito
+from benchmarks._util import best_of, make_tree, report
+
+
+def main(node_count: int, repeat: int) -> None:
+    root = make_tree(node_count)
+    count = sum(1 for i in root.walk_descendants()) + 1
+    ito = root.children[-1].children[-1]  # deepest, last node: worst case for path resolution
+    js = json.dumps(ito, cls=Ito.JsonEncoder)
+    print(f'{count:,} nodes; {len(js):,} chars of JSON')
+
+    for trusted in False, True:
+        seconds, rv = best_of(lambda: json.loads(js, object_hook=Ito.JsonDecoderHook(trusted=trusted)), repeat)
+        assert rv == ito
+        report(f'JsonDecoderHook(trusted={trusted})', seconds, count)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--nodes', type=int, default=10 ** 6, help='approximate node count')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    main(args.nodes, args.repeat)
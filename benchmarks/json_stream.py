@@ -0,0 +1,58 @@
+"""Compares time and peak memory of Ito.JsonEncoder / Ito.JsonDecoderHook with pawpaw.serialization.json_stream"""
+import argparse
+import json
+import os
+import tempfile
+import tracemalloc
+
+from pawpaw import Ito
+from pawpaw.serialization import json_stream
+from benchmarks._util import best_of, make_tree, report
+
+
+def _peak(func) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main(node_count: int, repeat: int) -> None:
+    root = make_tree(node_count)
+    count = sum(1 for i in root.walk_descendants()) + 1
+    print(f'{count:,} nodes')
+
+    with tempfile.TemporaryDirectory() as dir:
+        path = os.path.join(dir, 'tree.json')
+
+        def encoder_dump():
+            with open(path, 'w') as fs:
+                json.dump(root, fs, cls=Ito.JsonEncoder)
+
+        def stream_dump():
+            with open(path, 'w') as fs:
+                json_stream.dump(fs, root)
+
+        def hook_load():
+            with open(path) as fs:
+                return json.load(fs, object_hook=Ito.JsonDecoderHook())
+
+        def stream_load():
+            with open(path) as fs:
+                return json_stream.load(fs)
+
+        for name, func in ('Ito.JsonEncoder', encoder_dump), ('json_stream.dump', stream_dump), \
+                          ('Ito.JsonDecoderHook', hook_load), ('json_stream.load', stream_load):
+            seconds, rv = best_of(func, repeat)
+            report(name, seconds, count)
+            print(f'{"":<40} {_peak(func) / 2 ** 20:10.1f} MiB peak')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--nodes', type=int, default=10 ** 5, help='approximate node count')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    main(args.nodes, args.repeat)
@@ -0,0 +1,47 @@
+"""Measures SimpleNlp.from_texts throughput as the number of worker processes increases
+
+Throughput with one worker is SimpleNlp.from_text called in a loop, in this process.  Use --docs to
+adjust the size of the collection, and --workers to choose the worker counts measured.
+"""
+import argparse
+import os
+
+import pawpaw
+from benchmarks._util import best_of, report
+
+
+_PARAGRAPH = (
+    'Call me Ishmael. Some years ago, never mind how long precisely, having little or no money in my purse, '
+    'and nothing particular to interest me on shore, I thought I would sail about a little and see the watery '
+    'part of the world.  It is a way I have of driving off the spleen, and regulating the circulation. '
+    'Mr. Jones paid 1,234.56 for 3 tickets on p. 42 of the catalog.'
+)
+
+
+def make_texts(count: int, paragraphs: int = 4) -> list[str]:
+    """Builds count documents, each having several paragraphs"""
+    return [f'Document {i}.\n\n' + '\n\n'.join([_PARAGRAPH] * paragraphs) for i in range(count)]
+
+
+def main(docs: int, workers: list[int], chunksize: int, repeat: int) -> None:
+    texts = make_texts(docs)
+    nlp = pawpaw.nlp.SimpleNlp()
+    print(f'{docs:,} documents, {sum(len(t) for t in texts) / (1 << 20):,.1f} MB')
+
+    baseline = None
+    for w in workers:
+        seconds, count = best_of(lambda: sum(1 for d in nlp.from_texts(texts, workers=w, chunksize=chunksize)), repeat)
+        report(f'from_texts, {w} worker(s)', seconds, count, 'docs')
+        if baseline is None:
+            baseline = seconds
+        print(f'{"speedup":<40} {baseline / seconds:10.2f}x')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--docs', type=int, default=1_000, help='number of documents')
+    parser.add_argument('--workers', type=int, nargs='+', default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument('--chunksize', type=int, default=64)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    main(args.docs, args.workers, args.chunksize, args.repeat)
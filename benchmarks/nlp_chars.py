@@ -0,0 +1,61 @@
+"""Measures SimpleNlp(chars=True) with virtual chars against materialized chars
+
+Reports the time to segment the documents, the memory held by the resulting trees, and the time to
+walk every node, chars included, along with the memory held once the walk has finished.  Use --docs to adjust the workload size.
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+import pawpaw
+from benchmarks._util import report
+from benchmarks.nlp_batch import make_texts
+
+
+def _materialize(docs: list[pawpaw.Ito]) -> None:
+    for doc in docs:
+        for sentence in (s for p in doc.children for s in p.children):
+            for token in sentence.children:
+                if token.desc == 'word':
+                    token.children.materialize()
+
+
+def measure(texts: list[str], materialize: bool) -> None:
+    nlp = pawpaw.nlp.SimpleNlp(chars=True, fused=True)
+    label = 'materialized' if materialize else 'virtual'
+
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    docs = [nlp.from_text(t) for t in texts]
+    if materialize:
+        _materialize(docs)
+    seconds = time.perf_counter() - start
+    gc.collect()
+    size, peak = tracemalloc.get_traced_memory()
+    report(f'from_text, {label} chars', seconds, len(texts), 'docs')
+    print(f'{"retained":<40} {size / (1 << 20):10.1f}MB')
+
+    start = time.perf_counter()
+    count = sum(1 for d in docs for i in d.walk_descendants())
+    seconds = time.perf_counter() - start
+    gc.collect()
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    report(f'walk_descendants, {label} chars', seconds, count)
+    print(f'{"retained after walk":<40} {size / (1 << 20):10.1f}MB')
+
+
+def main(docs: int) -> None:
+    texts = make_texts(docs)
+    print(f'{docs:,} documents, {sum(len(t) for t in texts) / (1 << 20):,.1f} MB')
+    measure(texts, False)
+    measure(texts, True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--docs', type=int, default=200)
+    args = parser.parse_args()
+    main(args.docs)
@@ -0,0 +1,40 @@
+"""Compares SimpleNlp.from_text using the itor pipeline against the fused, single-pass mode
+
+Both produce the same tree, which is checked.  Use --docs to adjust the workload size.
+"""
+import argparse
+
+import pawpaw
+from benchmarks._util import best_of, report
+from benchmarks.nlp_batch import make_texts
+
+
+def _node_count(doc: pawpaw.Ito) -> int:
+    return 1 + sum(1 for i in doc.walk_descendants())
+
+
+def main(docs: int, repeat: int) -> None:
+    texts = make_texts(docs)
+    print(f'{docs:,} documents, {sum(len(t) for t in texts) / (1 << 20):,.1f} MB')
+
+    pipeline = pawpaw.nlp.SimpleNlp()
+    seconds, expected = best_of(lambda: [pipeline.from_text(t) for t in texts], repeat)
+    report('SimpleNlp', seconds, len(texts), 'docs')
+
+    fused = pawpaw.nlp.SimpleNlp(fused=True)
+    fused_seconds, actual = best_of(lambda: [fused.from_text(t) for t in texts], repeat)
+    report('SimpleNlp(fused=True)', fused_seconds, len(texts), 'docs')
+    print(f'{"speedup":<40} {seconds / fused_seconds:10.2f}x')
+
+    for e, a in zip(expected, actual):
+        if [e, *e.walk_descendants()] != [a, *a.walk_descendants()]:
+            raise AssertionError('trees differ')
+    print(f'{sum(_node_count(d) for d in actual):,} nodes agree')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--docs', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    main(args.docs, args.repeat)
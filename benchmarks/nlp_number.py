@@ -0,0 +1,54 @@
+"""Measures pawpaw.nlp.Number construction, and converting number Itos to values
+
+Values are computed with Number.parse_value, which uses each Ito's children, and compared against
+re-matching each Ito's text.  Use --count to adjust the workload size.
+"""
+import argparse
+import random
+
+import pawpaw
+from benchmarks._util import best_of, report
+
+
+def make_text(count: int) -> str:
+    rnd = random.Random(0)
+    numbers = [
+        lambda: str(rnd.randint(0, 999)),
+        lambda: f'{rnd.randint(1000, 10 ** 9):,}',
+        lambda: f'-{rnd.random() * 1000:.3f}',
+        lambda: f'{rnd.random():.4f}e-{rnd.randint(1, 30)}',
+    ]
+    return ' and '.join(rnd.choice(numbers)() for _ in range(count))
+
+
+def _reparse(number: pawpaw.nlp.Number, ito: pawpaw.Ito) -> float:
+    m = number.re.fullmatch(str(ito))
+    s = m.group('number').replace(number.thousands_sep, '')
+    s = s.replace(number.decimal_point, '.')
+    return int(s) if m.group('decimal') is None and m.group('exponent') is None else float(s)
+
+
+def main(count: int, repeat: int) -> None:
+    seconds, _ = best_of(lambda: [pawpaw.nlp.Number(thousands_sep_optional=False) for _ in range(1000)], repeat)
+    report('Number()', seconds, 1000, 'instances')
+
+    number = pawpaw.nlp.Number()
+    itos = [i for i in number.get_itor()(pawpaw.Ito(make_text(count))) if i.desc == 'number']
+
+    seconds, expected = best_of(lambda: [_reparse(number, i) for i in itos], repeat)
+    report('re-match text', seconds, len(itos), 'numbers')
+
+    parse_seconds, actual = best_of(lambda: [number.parse_value(i) for i in itos], repeat)
+    report('Number.parse_value', parse_seconds, len(itos), 'numbers')
+    print(f'{"speedup":<40} {seconds / parse_seconds:10.2f}x')
+
+    if expected != actual:
+        raise AssertionError('values differ')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    main(args.count, args.repeat)
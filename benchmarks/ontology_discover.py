@@ -0,0 +1,54 @@
+"""Compares serial Ontology.discover against discover using a thread pool
+
+The ontology has --rules Extract rules, each matching one word, spread over nested ontologies.  Both
+produce the same Discoveries, which is checked.  The regex module releases the GIL while matching
+str objects, so threads can apply rules in parallel on multi-core machines.
+"""
+import argparse
+import concurrent.futures
+import os
+
+import regex
+
+import pawpaw
+from pawpaw.ontology import Ontology
+from benchmarks._util import best_of, report
+from benchmarks.nlp_batch import make_texts
+
+
+def make_ontology(rules: int, fanout: int = 10) -> Ontology:
+    words = [f'w{i}' for i in range(rules)]
+    rv = Ontology()
+    for i in range(0, rules, fanout):
+        rv[f'group{i // fanout}'] = Ontology(rules=[
+            pawpaw.arborform.Extract(regex.compile(rf'(?P<{w}>\b{w}\b)')) for w in words[i:i + fanout]
+        ])
+    return rv
+
+
+def main(rules: int, docs: int, workers: int, repeat: int) -> None:
+    texts = make_texts(docs)
+    itos = [pawpaw.Ito(t) for t in texts]
+    ontology = make_ontology(rules)
+    print(f'{rules:,} rules, {docs:,} documents, {sum(len(t) for t in texts) / (1 << 20):,.1f} MB, {workers} threads')
+
+    seconds, expected = best_of(lambda: ontology.discover(*itos), repeat)
+    report('discover', seconds, rules * docs, 'rule applications')
+
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        pool_seconds, actual = best_of(lambda: ontology.discover(*itos, executor=executor, chunksize=16), repeat)
+    report('discover(executor=ThreadPoolExecutor)', pool_seconds, rules * docs, 'rule applications')
+    print(f'{"speedup":<40} {seconds / pool_seconds:10.2f}x')
+
+    if expected.flatten() != actual.flatten():
+        raise AssertionError('discoveries differ')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rules', type=int, default=200)
+    parser.add_argument('--docs', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    main(args.rules, args.docs, args.workers, args.repeat)
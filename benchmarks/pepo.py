@@ -0,0 +1,29 @@
+"""Measures dump throughput of each pawpaw.visualization.pepo style"""
+import argparse
+import io
+
+from pawpaw.visualization import pepo
+from benchmarks._util import best_of, make_tree, report
+
+
+def main(node_count: int, repeat: int) -> None:
+    root = make_tree(node_count)
+    count = sum(1 for i in root.walk_descendants()) + 1
+    print(f'{count:,} nodes')
+
+    for style in pepo.Compact(), pepo.Tree(), pepo.Xml(max_substr=40), pepo.Json(max_substr=40):
+        def dump():
+            with io.StringIO() as fs:
+                style.dump(fs, root)
+                return fs.tell()
+
+        seconds, chars = best_of(dump, repeat)
+        report(f'pepo.{type(style).__name__}', seconds, count)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--nodes', type=int, default=10 ** 6, help='approximate node count')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    main(args.nodes, args.repeat)
@@ -0,0 +1,49 @@
+"""Compares Sentence boundary detection using Sentence.re against the fast engine, Sentence.find_boundaries
+
+Both are run over a single long paragraph, and their boundaries are checked for agreement.  Use
+--sentences to adjust the paragraph length.
+"""
+import argparse
+
+import pawpaw
+from benchmarks._util import best_of, report
+
+
+_SENTENCES = [
+    'Call me Ishmael.',
+    'Some years ago, never mind how long precisely, I thought I would sail about a little.',
+    'Mr. Jones and Dr. Smith paid 1,234.56 for 3 tickets on p. 42 of the catalog.',
+    'John F. Kennedy addressed the U.S. Government in 1961!',
+    '“What’s gone with that boy?” she asked.',
+    'The end came quickly...',
+    'It was, e.g., a surprise to Lt. Col. Brown.',
+]
+
+
+def make_paragraph(sentences: int) -> str:
+    return ' '.join(_SENTENCES[i % len(_SENTENCES)] for i in range(sentences))
+
+
+def main(sentences: int, repeat: int) -> None:
+    text = make_paragraph(sentences)
+    print(f'{sentences:,} sentences, {len(text):,} chars')
+
+    re = pawpaw.nlp.Sentence().re
+    seconds, expected = best_of(lambda: [m.span() for m in re.finditer(text)], repeat)
+    report('Sentence.re', seconds, len(text), 'chars')
+
+    fast_seconds, actual = best_of(lambda: list(pawpaw.nlp.Sentence.find_boundaries(text)), repeat)
+    report('Sentence.find_boundaries', fast_seconds, len(text), 'chars')
+    print(f'{"speedup":<40} {seconds / fast_seconds:10.2f}x')
+
+    if actual != expected:
+        raise AssertionError('boundaries differ')
+    print(f'{len(actual):,} boundaries agree')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sentences', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    main(args.sentences, args.repeat)
@@ -0,0 +1,89 @@
+"""Compares pawpaw.xml.XmlParser against ElementTree, with and without the C accelerator
+
+Earlier versions of XmlParser disabled the C accelerated ElementTree for the entire process, in
+order to hook its pure-Python parser.  The pure-Python measurements are taken in a subprocess, so
+that they don't affect the others, and include that previous XmlParser as a baseline.  Use --mb to
+reduce the document size for quicker runs.
+"""
+import argparse
+import subprocess
+import sys
+
+
+_RECORD = '<item id="{i}" type="R&amp;B"><name>item {i} &lt;{i}&gt;</name><!--note--><value>{i}</value></item>\n'
+
+
+def make_xml(mb: float) -> str:
+    """Builds an XML document of approximately mb megabytes"""
+    size = int(mb * (1 << 20))
+    records = []
+    total = 0
+    i = 0
+    while total < size:
+        r = _RECORD.format(i=i)
+        records.append(r)
+        total += len(r)
+        i += 1
+    return '<?xml version="1.0" encoding="UTF-8"?>\n<items>\n' + ''.join(records) + '</items>'
+
+
+def measure(mb: float, repeat: int, pure_python: bool) -> None:
+    if pure_python:
+        sys.modules['_elementtree'] = None
+    import xml.etree.ElementTree as ET
+    from pawpaw import xml
+    from benchmarks._util import best_of, report
+
+    text = make_xml(mb)
+    suffix = 'pure-Python ET' if pure_python else 'C ET'
+
+    seconds, root = best_of(lambda: ET.fromstring(text), repeat)
+    count = sum(1 for e in root.iter())
+    report(f'ET.fromstring ({suffix})', seconds, count, 'elements')
+
+    class ElementsOnly(xml.XmlParser):
+        def _extract_itos(self, element) -> None:
+            pass
+
+    elements_seconds, root = best_of(lambda: ET.fromstring(text, parser=ElementsOnly()), repeat)
+    report(f'XmlParser, no Itos ({suffix})', elements_seconds, count, 'elements')
+
+    seconds, root = best_of(lambda: ET.fromstring(text, parser=xml.XmlParser()), repeat)
+    report(f'XmlParser ({suffix})', seconds, count, 'elements')
+    print(f'{"Ito extraction per element":<40} {(seconds - elements_seconds) / count * 1e6:10.2f}µs')
+
+    if pure_python:
+        from benchmarks._xml_parser_legacy import XmlParser as LegacyXmlParser
+
+        class LegacyElementsOnly(LegacyXmlParser):
+            def _extract_itos(self, element) -> None:
+                pass
+
+        legacy_elements_seconds, root = best_of(lambda: ET.fromstring(text, parser=LegacyElementsOnly()), repeat)
+        report(f'old XmlParser, no Itos ({suffix})', legacy_elements_seconds, count, 'elements')
+
+        legacy_seconds, root = best_of(lambda: ET.fromstring(text, parser=LegacyXmlParser()), repeat)
+        report(f'old XmlParser ({suffix})', legacy_seconds, count, 'elements')
+        print(f'{"speedup over old XmlParser":<40} {legacy_seconds / seconds:10.2f}x')
+
+
+def main(mb: float, repeat: int) -> None:
+    print(f'{mb:,} MB')
+    measure(mb, repeat, False)
+    sys.stdout.flush()
+    subprocess.run(
+        [sys.executable, '-m', 'benchmarks.xml_parse', '--mb', str(mb), '--repeat', str(repeat), '--pure-python'],
+        check=True
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--mb', type=float, default=100, help='approximate document size, in megabytes')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--pure-python', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.pure_python:
+        measure(args.mb, args.repeat, True)
+    else:
+        main(args.mb, args.repeat)
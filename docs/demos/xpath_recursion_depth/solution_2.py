@@ -1,5 +1,3 @@
-import sys
-sys.modules['_elementtree'] = None
 import xml.etree.ElementTree as ET
 
 from pawpaw import xml
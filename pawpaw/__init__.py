@@ -24,6 +24,7 @@ import pawpaw.query
 import pawpaw.xml
 import pawpaw.nlp
 import pawpaw.table
+import pawpaw.serialization
 import pawpaw.visualization
 
 del pawpaw
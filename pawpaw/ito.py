@@ -1,10 +1,16 @@
 from __future__ import annotations
+import array
 import bisect
 import collections.abc
+import contextlib
+import functools
+import gc
 import json
 import os
+import pickle
 import types
 import typing
+import weakref
 if typing.TYPE_CHECKING:
     from _typeshed import SupportsRichComparison
 
@@ -18,6 +24,52 @@ nuco = Infix(lambda x, y: y if x is None else x)
 """Null coalescing operator
 """
 
+class _PickledString:
+    """Wraps a source string so that pickle memoizes it once per dump, and so that protocol 5 can
+    emit it as an out-of-band buffer"""
+    def __init__(self, string: str):
+        self.string = string
+
+    def __reduce_ex__(self, protocol):
+        if protocol >= 5:
+            return _unpickle_string, (pickle.PickleBuffer(self.string.encode('utf-8', 'surrogatepass')),)
+        return str, (self.string,)
+
+
+@contextlib.contextmanager
+def _gc_paused() -> typing.Iterator[None]:
+    """Pauses garbage collection during bulk construction of acyclic Ito trees"""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _packed(values: list[int]) -> array.array:
+    """Packs non-negative ints into an array of the narrowest unsigned type that fits them"""
+    hi = max(values, default=0)
+    return array.array(next(tc for tc in 'BHILQ' if hi < 1 << (8 * array.array(tc).itemsize)), values)
+
+
+# Wrappers currently referenced (e.g., by a pickler's memo), keyed by id of their string
+_pickled_strings: weakref.WeakValueDictionary[int, _PickledString] = weakref.WeakValueDictionary()
+
+
+def _pickled_string(string: str) -> _PickledString:
+    # Reuses the wrapper for string while a pickler's memo holds it, so that each dump emits the string
+    # once; no reference to the string outlives the dump
+    if (rv := _pickled_strings.get(id(string))) is None or rv.string is not string:
+        rv = _pickled_strings[id(string)] = _PickledString(string)
+    return rv
+
+
+def _unpickle_string(buffer) -> str:
+    return str(buffer, 'utf-8', 'surrogatepass')
+
+
 class GroupKeys:
     @staticmethod
     def preferred(
@@ -314,6 +366,23 @@ class Ito:
             yield cls(s, i, k, desc)
             i = k
 
+    @classmethod
+    def _from_trusted(cls, string: str, start: int, stop: int, desc: str | None) -> Ito:
+        # Bypasses index normalization & type checks for deserialization; callers must validate spans
+        rv = cls.__new__(cls)
+        rv._string = string
+        rv._span = Span(start, stop)
+        rv.desc = desc
+        rv._value_func = None
+        rv._parent = None
+        rv._children = ChildItos(rv)
+        return rv
+
+    def _set_value_func_trusted(self, f: Types.F_ITO_2_VAL) -> None:
+        # Bypasses the signature check made by the value_func setter; callers must supply a valid function
+        setattr(self, 'value', lambda: f(self))
+        self._value_func = f
+
     __clone_desc_default = object()
     def clone(self,
               start: int | None = None,
@@ -420,6 +489,87 @@ class Ito:
             '_children': self._children,
         }
 
+    def __reduce_ex__(self, protocol):
+        # Pickles the tree as a compact, pre-order span table that references the string once;
+        # subclassed nodes fall back to per-node state
+        if (table := self._to_span_table()) is None:
+            return super().__reduce_ex__(protocol)
+        return Ito._from_span_table, (_pickled_string(self._string), *table)
+
+    def _to_span_table(self) -> tuple | None:
+        """Returns (descs, child counts, start deltas, lengths, desc indices, virtuals) for this Ito and its
+        descendants in pre-order, or None if the tree contains Ito subclasses
+
+        Virtual children are not included; instead, virtuals holds (node index, spans function, desc) for each
+        node having them, so that they are recreated as virtual children."""
+        descs: dict[str | None, int] = {None: 0}
+        child_counts: list[int] = []
+        start_deltas: list[int] = []  # starts are non-decreasing in pre-order
+        lengths: list[int] = []
+        desc_idxs: list[int] = []
+        virtuals: list[tuple[int, typing.Callable, str | None]] = []
+        last_start = 0
+        stack = [self]
+        while len(stack) > 0:
+            node = stack.pop()
+            if type(node) is not Ito and type(node) is not _VirtualIto:
+                return None
+            children = node._children
+            if type(children) is _VirtualChildItos and children.is_virtual:
+                if children is not _NO_VIRTUAL_CHILDREN:
+                    virtuals.append((len(child_counts), children._spans_func, children._desc))
+                children = ()
+            child_counts.append(len(children))
+            start, stop = node._span
+            start_deltas.append(start - last_start)
+            lengths.append(stop - start)
+            last_start = start
+            if (i := descs.get(node.desc)) is None:
+                i = descs[node.desc] = len(descs)
+            desc_idxs.append(i)
+            stack.extend(reversed(children))
+
+        return (
+            tuple(descs), _packed(child_counts), _packed(start_deltas), _packed(lengths), _packed(desc_idxs), tuple(virtuals)
+        )
+
+    @classmethod
+    def _from_span_table(
+            cls,
+            string: str,
+            descs: typing.Sequence[str | None],
+            child_counts: typing.Sequence[int],
+            start_deltas: typing.Sequence[int],
+            lengths: typing.Sequence[int],
+            desc_idxs: typing.Sequence[int],
+            virtuals: typing.Sequence[tuple[int, typing.Callable, str | None]] = ()
+    ) -> Ito:
+        if isinstance(string, _PickledString):  # copy.copy and copy.deepcopy call __reduce_ex__ without pickling
+            string = string.string
+        with _gc_paused():
+            itos = []
+            start = 0
+            for delta, length, d in zip(start_deltas, lengths, desc_idxs):
+                start += delta
+                itos.append(cls._from_trusted(string, start, start + length, descs[d]))
+
+            stack: list[list] = []  # [ito, remaining child count, children]
+            for ito, count in zip(itos, child_counts):
+                if len(stack) > 0:
+                    frame = stack[-1]
+                    frame[2].append(ito)
+                    frame[1] -= 1
+                    if frame[1] == 0:
+                        frame[0].children._add_ordered(*frame[2])
+                        stack.pop()
+                if count > 0:
+                    stack.append([ito, count, []])
+
+            for i, spans_func, desc in virtuals:
+                itos[i]._children = _VirtualChildItos(itos[i], spans_func, desc)
+
+        return itos[0]
+
     class _ItoEncoder(json.JSONEncoder):
         def __init__(self, *json_args, full_tree: bool = True, **json_kwargs):
             super().__init__(*json_args, **json_kwargs)
@@ -467,7 +617,7 @@ class Ito:
                 rv['string'] = o.string
 
             if self.full_tree:
-                basis = o.find('....')
+                basis = o.get_root()
                 rv['path'] = o.path
             else:
                 basis = o
@@ -478,18 +628,46 @@ class Ito:
             return rv
 
     class _ItoDecoderHook:
-        def __init__(self, string: str | None = None):
+        def __init__(self, string: str | None = None, trusted: bool = False):
             self.string = string
+            self.trusted = trusted
 
         def __call__(self, obj: typing.Dict) -> typing.Any:
-            rv = Ito(self.string, *obj['span'], desc=obj['desc'])
-            if (children := obj.get('children')) is not None:
-                rv.children.add_hierarchical(*(self(c) for c in children))
+            if self.trusted:
+                rv = Ito._from_trusted(self.string, *obj['span'], obj['desc'])
+                if (children := obj.get('children')) is not None:
+                    rv.children._add_ordered(*(self(c) for c in children))
+            else:
+                rv = Ito(self.string, *obj['span'], desc=obj['desc'])
+                if (children := obj.get('children')) is not None:
+                    rv.children.add_hierarchical(*(self(c) for c in children))
             return rv
 
     class JsonDecoderHook:
-        def __init__(self, string: str | None = None):
+        _re_index_path = regex.compile(r'\.((?:/\*\[i:\d+\])*)', regex.DOTALL)
+        _re_index = regex.compile(r'\d+', regex.DOTALL)
+
+        def __init__(self, string: str | None = None, trusted: bool = False):
+            """
+            Args:
+                string: the .string for stringless data
+                trusted: if True, serialized children are assumed to be ordered and properly
+                    nested, as written by Ito.JsonEncoder, and are attached directly (with a single
+                    validation sweep) rather than hierarchically added; the path is resolved by
+                    walking child indices rather than by running a query; garbage collection is
+                    paused while the tree is built
+            """
             self.string = string
+            self.trusted = trusted
+
+        def _resolve_path(self, root: Ito, path: str) -> Ito | None:
+            if self.trusted and (m := self._re_index_path.fullmatch(path)) is not None:
+                rv = root
+                for i in self._re_index.findall(m.group(1)):
+                    rv = rv.children[int(i)]
+                return rv
+
+            return root.find(path)
 
         def __call__(self, obj: typing.Dict) -> typing.Any:
             if (t := obj.get('__type__')) is not None:
@@ -501,13 +679,14 @@ class Ito:
                                     raise(ValueError('You must provide a value for init parameter "string" when deserializing stringless Ito data.'))
                                 s = self.string
 
-                            rv = Ito(s, *obj['ito']['span'], desc=obj['ito']['desc'])
-
-                            if (children := obj['ito'].get('children')) is not None:
-                                ito_decoder_hook = Ito._ItoDecoderHook(string=s)
-                                rv.children.add_hierarchical(*(ito_decoder_hook(c) for c in children))
-
-                            return rv.find(obj['path'])
+                            if self.trusted:
+                                with _gc_paused():
+                                    rv = Ito._ItoDecoderHook(string=s, trusted=True)(obj['ito'])
+                                if not 0 <= rv.start <= rv.stop <= len(s):
+                                    raise ValueError(f'span {rv.span} is not within .string')
+                            else:
+                                rv = Ito._ItoDecoderHook(string=s)(obj['ito'])
+                            return self._resolve_path(rv, obj['path'])
 
             return obj
 
@@ -631,10 +810,10 @@ class Ito:
     _pat_format = r'%(?:' + _pat_format + r')'
     _re_format = regex.compile(_pat_format, regex.DOTALL)
 
-    def __format__(self, format_spec: str) -> str:
-        if format_spec is None or format_spec == '':
-            return str(self)
-
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def _format_spec_matches(format_spec: str) -> typing.Tuple[regex.Match, ...]:
+        # Directive matches depend only on the format spec, so are parsed once per spec
         idxs = [*find_escapes(format_spec, '%')]
         len_idxs = len(idxs)
 
@@ -642,16 +821,22 @@ class Ito:
         for i in range(0, len_idxs):
             start = idxs[i]
             if i == len_idxs - 1:
-                m = self._re_format.match(format_spec, start)
+                m = Ito._re_format.match(format_spec, start)
             else:
                 stop = idxs[i + 1]
-                m = self._re_format.match(format_spec, start, stop)
+                m = Ito._re_format.match(format_spec, start, stop)
 
             if m is not None:
                 matches.append(m)
 
+        return tuple(matches)
+
+    def __format__(self, format_spec: str) -> str:
+        if format_spec is None or format_spec == '':
+            return str(self)
+
         rv = format_spec
-        for m in matches[::-1]:
+        for m in reversed(self._format_spec_matches(format_spec)):
             if m.group('zws') is not None:
                 rv = rv[:m.span()[0]] + rv[m.span()[1]:]
                 continue
@@ -1408,8 +1593,9 @@ class Ito:
 class ChildItos(collections.abc.Sequence):
     def __init__(self, parent: pawpaw.Ito, *itos: pawpaw.Ito):
         self.__parent = parent
-        self.__store = list[pawpaw.Ito]()
-        self.add(*itos)
+        self.__store: list[pawpaw.Ito] = []
+        if len(itos) > 0:
+            self.add(*itos)
 
     # region search & index
 
@@ -1543,6 +1729,34 @@ class ChildItos(collections.abc.Sequence):
             ito._set_parent(self.__parent)
             self.__store.insert(i, ito)
 
+    def _add_ordered(self, *itos: pawpaw.Ito) -> None:
+        """Appends itos that are already ordered and non-overlapping, e.g., deserialized children;
+        validity is checked with a single sweep rather than a search per ito"""
+        parent = self.__parent
+        if len(self.__store) == 0:
+            prior_start = -1
+            prior_stop = parent.start
+        else:
+            prior_start, prior_stop = self.__store[-1].span
+
+        for ito in itos:
+            if ito._parent is not None:
+                raise ValueError('parameter \'itos\' has element contained elsewhere')
+            start, stop = ito._span
+            if stop < start:
+                raise ValueError(f'parameter \'itos\' has element with invalid .span {ito.span}')
+            if start <= prior_start or start < prior_stop:
+                raise ValueError('parameter \'itos\' is unordered or has overlapping elements')
+            if stop > parent.stop:
+                raise ValueError(f'parameter \'parent\' has incompatible .span {parent.span}')
+            if ito._string is not parent._string and ito._string != parent._string:
+                raise ValueError(f'parameter \'parent\' has a different value for .string')
+            prior_start, prior_stop = start, stop
+
+        for ito in itos:
+            ito._parent = parent
+        self.__store.extend(itos)
+
     def add_hierarchical(self, *itos: pawpaw.Ito, key: typing.Callable[[Ito], SupportsRichComparison] = None):
         '''
             key is None: itos with duplicate spans are added sequentially as children to one another
@@ -1624,6 +1838,190 @@ class ChildItos(collections.abc.Sequence):
     # endregion
 
 
+_VIRTUAL_IMMUTABLE = 'virtual Itos can\'t be modified; call .children.materialize() on the parent first'
+
+
+class _VirtualIto(Ito):
+    """Child generated by a _VirtualChildItos
+
+    Virtual Itos are immutable, because they are discarded once no longer referenced, and regenerated from
+    their parent's span when next accessed.  Materializing the parent's children converts any that are live
+    into ordinary Itos.  Virtual Itos compare equal to ordinary Itos having the same attributes.
+    """
+
+    def __setattr__(self, name: str, value: typing.Any) -> None:
+        raise AttributeError(_VIRTUAL_IMMUTABLE)
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(_VIRTUAL_IMMUTABLE)
+
+    def __eq__(self, o: typing.Any) -> bool:
+        if self is o:
+            return True
+        return type(o) in (Ito, _VirtualIto) and self._Ito__key() == o._Ito__key()
+
+    __hash__ = Ito.__hash__
+
+    def __repr__(self) -> str:
+        return f'{Ito.__name__}({self:span=%span, desc=%desc!r, substr=%substr!r})'
+
+    def clone(self,
+              start: int | None = None,
+              stop: int | None = None,
+              desc: str | None = Ito._Ito__clone_desc_default,
+              clone_children: bool = True
+              ) -> Ito:
+        # Clones are ordinary Itos; virtual Itos have no children or value_func to clone
+        return Ito(
+            self._string,
+            self.start if start is None else start,
+            self.stop if stop is None else stop,
+            self.desc if desc is Ito._Ito__clone_desc_default else desc
+        )
+
+
+def _no_spans(ito: Ito) -> tuple[tuple[int, int], ...]:
+    return ()
+
+
+class _VirtualChildItos(ChildItos):
+    """Children computed on demand from the parent's span, rather than stored
+
+    Children are generated when accessed, as immutable _VirtualIto objects.  Each is kept only while it is
+    referenced elsewhere, so repeated accesses yield identical objects while any are in use, and traversals
+    leave nothing behind.  Any mutation of the collection first materializes the children into an ordinary
+    store of ordinary Itos, which can then be modified.
+    """
+
+    # Live generated children, keyed by (id of collection, index)
+    _live: weakref.WeakValueDictionary[tuple[int, int], _VirtualIto] = weakref.WeakValueDictionary()
+
+    def __init__(self, parent: Ito, spans_func: typing.Callable[[Ito], typing.Iterable[tuple[int, int]]], desc: str | None):
+        super().__init__(parent)
+        self._parent_ito = parent
+        self._spans_func = spans_func
+        self._desc = desc
+
+    @property
+    def is_virtual(self) -> bool:
+        return self._spans_func is not None
+
+    def _spans(self) -> list[tuple[int, int]]:
+        return list(self._spans_func(self._parent_ito))
+
+    def _child(self, i: int, start: int, stop: int) -> _VirtualIto:
+        key = (id(self), i)
+        parent = self._parent_ito
+        if (rv := self._live.get(key)) is None or rv._parent is not parent or rv._span != (start, stop):
+            rv = _VirtualIto.__new__(_VirtualIto)
+            rv.__dict__.update(
+                _string=parent._string,
+                _span=Span(start, stop),
+                desc=self._desc,
+                _value_func=None,
+                _parent=parent,
+            )
+            rv.__dict__['_children'] = _NO_VIRTUAL_CHILDREN  # shared, so that rv is not part of a reference cycle
+            self._live[key] = rv
+        return rv
+
+    def _itos(self) -> list[Ito]:
+        if self._spans_func is None:
+            return self._ChildItos__store
+        return [self._child(i, *span) for i, span in enumerate(self._spans())]
+
+    def materialize(self) -> None:
+        """Stores the children, as ordinary Itos, so that they persist and can be modified
+
+        Children that are currently referenced become ordinary Itos, and so keep their identities.
+        """
+        if self._spans_func is None:
+            return
+        if type(self._parent_ito) is _VirtualIto:
+            raise ValueError(_VIRTUAL_IMMUTABLE)
+
+        store = self._itos()
+        for i, ito in enumerate(store):
+            del self._live[(id(self), i)]
+            object.__setattr__(ito, '__class__', Ito)
+            ito._children = ChildItos(ito)
+        self._ChildItos__store = store
+        self._spans_func = None
+
+    # region reads
+
+    def __contains__(self, ito) -> bool:
+        return ito in self._itos()
+
+    def __iter__(self) -> typing.Iterable[Ito]:
+        return iter(self._itos())
+
+    def __reversed__(self) -> typing.Iterable[Ito]:
+        return reversed(self._itos())
+
+    def __len__(self) -> int:
+        if self._spans_func is None:
+            return len(self._ChildItos__store)
+        return len(self._spans())
+
+    def __getitem__(self, key: int | slice) -> Ito | typing.List[Ito]:
+        if self._spans_func is None or isinstance(key, slice):
+            return super().__getitem__(key) if self._spans_func is None else self._itos()[key]
+        if isinstance(key, int):
+            spans = self._spans()
+            i = range(len(spans))[key]  # normalizes negative keys, and raises IndexError
+            return self._child(i, *spans[i])
+        raise Errors.parameter_invalid_type('key', key, int, slice)
+
+    def index(self, ito: Ito, start: int = 0, stop: int | None = None) -> int:
+        return self._itos().index(ito, start, len(self) if stop is None else stop)
+
+    def __repr__(self) -> str:
+        return self._itos().__repr__()
+
+    # endregion
+
+    # region mutations
+
+    def __delitem__(self, key: int | slice) -> None:
+        self.materialize()
+        super().__delitem__(key)
+
+    def remove(self, ito: Ito):
+        self.materialize()
+        super().remove(ito)
+
+    def pop(self, i: int) -> Ito:
+        self.materialize()
+        return super().pop(i)
+
+    def clear(self):
+        self.materialize()
+        super().clear()
+
+    def __setitem__(self, key: int | slice, value: Ito | typing.Iterable[Ito]) -> None:
+        self.materialize()
+        super().__setitem__(key, value)
+
+    def add(self, *itos: Ito) -> None:
+        self.materialize()
+        super().add(*itos)
+
+    def _add_ordered(self, *itos: Ito) -> None:
+        self.materialize()
+        super()._add_ordered(*itos)
+
+    def add_hierarchical(self, *itos: Ito, key: typing.Callable[[Ito], SupportsRichComparison] = None):
+        self.materialize()
+        super().add_hierarchical(*itos, key=key)
+
+    # endregion
+
+
+# Immutable, empty children of every _VirtualIto
+_NO_VIRTUAL_CHILDREN = _VirtualChildItos(_VirtualIto.__new__(_VirtualIto), _no_spans, None)
+
+
 class Types:
     # Ito
     C_SQ_ITOS = typing.Sequence[Ito]
@@ -1635,6 +2033,12 @@ class Types:
 
     C_IT_EITOS = typing.Iterable[C_EITO]
 
+    class C_RITO(typing.NamedTuple):
+        root: Ito
+        ito: Ito
+
+    C_IT_RITOS = typing.Iterable[C_RITO]
+
     P_ITO = typing.Callable[[Ito], bool]
     P_EITO = typing.Callable[[C_EITO], bool]
 
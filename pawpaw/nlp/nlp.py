@@ -1,9 +1,17 @@
+from __future__ import annotations
 from abc import ABC, abstractmethod, abstractproperty
+import collections
+import concurrent.futures
+import decimal
+import itertools
 import locale
+import os
+import types
 import typing
 
 import regex
 import pawpaw
+from pawpaw.ito import _gc_paused, _VirtualChildItos
 
 # See https://www.unicode.org/Public/UNIDATA/NamesList.txt
 
@@ -142,23 +150,36 @@ class Number(NlpComponent):
         re = regex.compile(num_pat, regex.DOTALL)
         return num_pat, re
 
+    # Compiled patterns, shared by all instances having the same configuration
+    _patterns_cache: dict[tuple, tuple[str, str, str, regex.Pattern]] = {}
+
     def __init__(self, **kwargs):
         # defaults
-        loc = locale.localeconv()
-        self._decimal_point = loc['decimal_point']
-        self._thousands_sep = loc['thousands_sep'] if loc['thousands_sep'] != '' else ','
+        if 'decimal_point' in kwargs and 'thousands_sep' in kwargs:
+            self._decimal_point = self._thousands_sep = None
+        else:
+            loc = locale.localeconv()
+            self._decimal_point = loc['decimal_point']
+            self._thousands_sep = loc['thousands_sep'] if loc['thousands_sep'] != '' else ','
         self._thousands_sep_optional = True
+        self._value_type: type | None = None
+        self._patterns: tuple[str, str, str, regex.Pattern] | None = None
 
         # kwargs
         for k, v in kwargs.items():
             setattr(self, k, v)
 
-        # build patterns & re
-        self._int_pat: str = self.build_integer_pat()
-        self._decimal_pat: str = self.build_decimal_pat()
-        self._num_pat: str
-        self._re: regex.Pattern
-        self._num_pat, self._re = self.build_num_pat_re()
+    def _get_patterns(self) -> tuple[str, str, str, regex.Pattern]:
+        """Returns (integer pattern, decimal pattern, number pattern, compiled number pattern), built on first
+        use, and compiled at most once per configuration"""
+        if self._patterns is None:
+            key = (type(self), self._decimal_point, self._thousands_sep, self._thousands_sep_optional)
+            if (rv := self._patterns_cache.get(key)) is None:
+                self._int_pat = self.build_integer_pat()
+                self._decimal_pat = self.build_decimal_pat()
+                rv = self._patterns_cache[key] = (self._int_pat, self._decimal_pat, *self.build_num_pat_re())
+            self._patterns = rv
+        return self._patterns
 
     # region properties
 
@@ -168,8 +189,12 @@ class Number(NlpComponent):
 
     @decimal_point.setter
     def decimal_point(self, decimal_point: str) -> None:
+        if not isinstance(decimal_point, str):
+            raise pawpaw.Errors.parameter_invalid_type('decimal_point', decimal_point, str)
+        if decimal_point == '' or decimal_point.isspace():
+            raise ValueError('parameter \'decimal_point\' must contain a non-whitespace character')
         self._decimal_point = decimal_point
-        self.build_num_pat_re()
+        self._patterns = None
 
     @property
     def thousands_sep(self) -> str:
@@ -182,7 +207,7 @@ class Number(NlpComponent):
         if thousands_sep == '' or thousands_sep.isspace():
             raise ValueError('parameter \'thousands_sep\' must contain a non-whitespace character')
         self._thousands_sep = thousands_sep
-        self.build_decimal_pat()
+        self._patterns = None
 
     @property
     def thousands_sep_optional(self) -> bool:
@@ -190,16 +215,29 @@ class Number(NlpComponent):
 
     @thousands_sep_optional.setter
     def thousands_sep_optional(self, thousands_sep_optional: bool) -> None:
+        if not isinstance(thousands_sep_optional, bool):
+            raise pawpaw.Errors.parameter_invalid_type('thousands_sep_optional', thousands_sep_optional, bool)
         self._thousands_sep_optional = thousands_sep_optional
-        self.build_num_pat_re()
+        self._patterns = None
+
+    @property
+    def value_type(self) -> type | None:
+        """If float or decimal.Decimal, number Itos have a .value_func that returns parse_value(ito, value_type)"""
+        return self._value_type
+
+    @value_type.setter
+    def value_type(self, value_type: type | None) -> None:
+        if value_type not in (None, float, decimal.Decimal):
+            raise ValueError('parameter \'value_type\' must be None, float, or decimal.Decimal')
+        self._value_type = value_type
 
     @property
     def integer_pat(self) -> str:
-        return self._int_pat
+        return self._get_patterns()[0]
 
     @property
     def decimal_pat(self) -> str:
-        return self._decimal_pat
+        return self._get_patterns()[1]
 
     @property
     def sci_exp_pat(self) -> str:
@@ -207,17 +245,66 @@ class Number(NlpComponent):
 
     @property
     def num_pat(self) -> str:
-        return self._num_pat
+        return self._get_patterns()[2]
 
     @property
     def re(self) -> regex.Pattern:
-        return self._re
+        return self._get_patterns()[3]
     
     # endregion
 
+    def parse_value(self, ito: pawpaw.Ito, value_type: type = float) -> int | float | decimal.Decimal:
+        """Converts a number Ito, as produced by this recognizer, to a numeric value
+
+        The value is computed from the Ito's sign, integer, decimal, and exponent children, rather than by
+        re-parsing its text.
+
+        Args:
+            ito: a number Ito
+            value_type: float or decimal.Decimal; used unless the number has neither a decimal nor an exponent,
+              in which case an int is returned
+        """
+        negative = False
+        integer = fraction = ''
+        exponent = None
+        for child in ito.children:
+            desc = child.desc
+            if desc == 'sign':
+                negative = child.str_eq('-')
+            elif desc == 'integer':
+                integer = str(child).replace(self._thousands_sep, '')
+            elif desc == 'decimal':
+                fraction = child.string[child.start + len(self._decimal_point):child.stop]
+            elif desc == 'exponent':
+                s = str(child)
+                i = len(s)
+                while i > 0 and s[i - 1].isdecimal():
+                    i -= 1
+                exponent = int(s[i:])
+                if any(c.desc == 'sign' and c.str_eq('-') for c in child.children):
+                    exponent = -exponent
+
+        if integer == '' and fraction == '':
+            raise ValueError(f'parameter \'ito\' is not a number Ito: {ito!r}')
+
+        if fraction == '' and exponent is None:
+            rv = int(integer)
+            return -rv if negative else rv
+
+        s = f'{"-" if negative else ""}{integer or "0"}.{fraction or "0"}e{exponent or 0}'
+        return decimal.Decimal(s) if value_type is decimal.Decimal else float(s)
+
+    def _value(self, ito: pawpaw.Ito) -> int | float | decimal.Decimal:
+        return self.parse_value(ito, self._value_type)
+
     def get_itor(self) -> pawpaw.arborform.Itorator:
+        extract = pawpaw.arborform.Extract(self.re)
+        if self._value_type is not None:
+            con = pawpaw.arborform.Connectors.Recurse(pawpaw.arborform.ValueFunc(self._value))
+            extract.connections.append(con)
+
         return pawpaw.arborform.Split(
-            pawpaw.arborform.Extract(self._re),
+            extract,
             boundary_retention=pawpaw.arborform.Split.BoundaryRetention.ALL,
             tag='number splitter'
         )
@@ -311,6 +398,27 @@ class Paragraph(NlpComponent):
         return ws_trimmer
 
 
+class _SuffixTrie:
+    """Trie of reversed words, used to test whether a string has any of the words ending at a given index"""
+
+    def __init__(self, words: typing.Iterable[str]):
+        self._root: dict[str, dict] = {}
+        for word in words:
+            node = self._root
+            for c in reversed(word):
+                node = node.setdefault(c, {})
+            node[''] = {}  # terminal; '' never collides with a char
+
+    def ends_at(self, string: str, stop: int) -> bool:
+        node = self._root
+        for i in range(stop - 1, -1, -1):
+            if (node := node.get(string[i])) is None:
+                return False
+            if '' in node:
+                return True
+        return False
+
+
 class Sentence(NlpComponent):
     _prefix_chars = list(unicode_single_quote_marks.values())
     _prefix_chars.extend(unicode_double_quote_marks.values())
@@ -461,48 +569,352 @@ class Sentence(NlpComponent):
         ignores=_ignores,
     )
 
+    # Fast engine: terminator candidates are found with a simple forward scan, and the rules and
+    # exceptions above are then checked only at those candidates, with abbreviations matched using
+    # suffix tries rather than lookbehinds
+    _re_candidate = regex.compile(
+        r'(?<=\w)(?:\.{3,}|…|[\!\?]+|\.)(?![\.…\!\?])\L<sen_suf>*(?P<ws>[' + regex.escape(''.join(_sen_ws)) + r']*)',
+        regex.DOTALL,
+        sen_suf=_suffix_chars
+    )
+    _re_start = regex.compile(
+        r'\L<sen_pre>*(?:(?P<hf_start>\L<hf_starts>)\L<sen_ws>|[A-Z\d])',
+        regex.DOTALL,
+        sen_ws=_sen_ws,
+        sen_pre=_prefix_chars,
+        hf_starts=_hf_start_words,
+    )
+    _candidate_chars = frozenset('.…!?' + ''.join(_suffix_chars))
+    _ws_chars = frozenset(''.join(_sen_ws))
+    _ignores_trie = _SuffixTrie(_ignores)
+    _num_abbrs_trie = _SuffixTrie(_numeric_abbrs)
+
+    def __init__(self, fast: bool = False):
+        """
+        Args:
+            fast: if True, boundaries are found using find_boundaries rather than re; both produce the same boundaries
+        """
+        if not isinstance(fast, bool):
+            raise pawpaw.Errors.parameter_invalid_type('fast', fast, bool)
+        self._fast = fast
+
     @property
     def re(self) -> regex.Pattern:
         return self._re
 
+    @property
+    def fast(self) -> bool:
+        return self._fast
+
+    @classmethod
+    def _is_name_initial(cls, string: str, pos: int, endpos: int) -> bool:
+        # [A-Z][a-z]+ ws [A-Z]. before pos, followed by ws [A-Z][a-z]
+        if pos < 4 or string[pos - 1] != '.' or not 'A' <= string[pos - 2] <= 'Z':
+            return False
+        if pos + 2 >= endpos or not 'A' <= string[pos + 1] <= 'Z' or not 'a' <= string[pos + 2] <= 'z':
+            return False
+
+        for i in (pos - 4, pos - 5) if string[pos - 4:pos - 2] == '\r\n' else (pos - 4,):
+            if string[i + 1] not in cls._ws_chars or not 'a' <= string[i] <= 'z':
+                continue
+            while i >= 0 and 'a' <= string[i] <= 'z':
+                i -= 1
+            if i >= 0 and 'A' <= string[i] <= 'Z':
+                return True
+        return False
+
+    @classmethod
+    def find_boundaries(cls, string: str, pos: int = 0, endpos: int | None = None) -> typing.Iterator[tuple[int, int]]:
+        """Yields the (start, stop) of each sentence boundary in string[pos:endpos]
+
+        Produces the same boundaries as re.finditer(string, pos, endpos) without its lookbehinds, which
+        are costly for long paragraphs.
+        """
+        if endpos is None:
+            endpos = len(string)
+
+        # A terminator ending at or after pos may begin before it
+        scan = pos
+        while scan > 0 and string[scan - 1] in cls._candidate_chars:
+            scan -= 1
+
+        for m in cls._re_candidate.finditer(string, scan, endpos):
+            start, stop = m.span('ws')
+            if start < pos:
+                continue
+
+            if stop == endpos or stop - start >= 2:  # End of document, or two or more whitespace
+                yield start, stop
+                continue
+            elif stop == start or (s := cls._re_start.match(string, stop, endpos)) is None:
+                continue
+
+            # Unless followed by a high frequency sentence start word, check exceptions
+            if s.group('hf_start') is None and (
+                    cls._ignores_trie.ends_at(string, start)
+                    or (string[stop].isdecimal() and cls._num_abbrs_trie.ends_at(string, start))
+                    or cls._is_name_initial(string, start, endpos)
+                    or (string.startswith('U.S.', start - 4, start) and string.startswith('Government', stop, endpos))
+            ):
+                continue
+
+            yield start, stop
+
+    def _boundary_itos(self, ito: pawpaw.Ito) -> list[pawpaw.Ito]:
+        return [pawpaw.Ito._from_trusted(ito.string, start, stop, None) for start, stop in self.find_boundaries(ito.string, *ito.span)]
+
     def get_itor(self) -> pawpaw.arborform.Itorator:
-        return pawpaw.arborform.Split(Sentence().re, desc='sentence', tag='sentence')
+        if self._fast:
+            splitter = pawpaw.arborform.Itorator.wrap(self._boundary_itos, tag='sentence boundaries')
+        else:
+            splitter = self._re
+        return pawpaw.arborform.Split(splitter, desc='sentence', tag='sentence')
+
+
+def _gaps(boundaries: typing.Iterable[tuple[int, int]], start: int, stop: int) -> typing.Iterator[tuple[int, int]]:
+    # Spans between boundaries, as produced by Split with BoundaryRetention.NONE
+    prior = None
+    for b_start, b_stop in boundaries:
+        if (prior if prior is not None else start) != b_start:
+            yield (prior if prior is not None else start), b_start
+        prior = b_stop
+    if prior is None:
+        yield start, stop
+    elif prior != stop:
+        yield prior, stop
+
+
+def _char_spans(word: pawpaw.Ito) -> typing.Iterator[tuple[int, int]]:
+    return (m.span() for m in SimpleNlp._re_char.finditer(word.string, *word.span))
 
 
 class SimpleNlp:
     _word_pat = r'\w(?:(?:\L<sqs>|-\s*)?\w)*'
-
-    def __init__(self, number: Number | None = Number(), chars: bool = False):
+    _re_char = regex.compile(r'(?P<char>\w)', regex.DOTALL)
+
+    def __init__(
+            self,
+            number: Number | None = Number(),
+            chars: bool = False,
+            sentence: Sentence = Sentence(fast=True),
+            fused: bool = False
+    ):
+        """
+        Args:
+            number: recognizer for numbers
+            chars: if True, words have char children; these are virtual, i.e., computed from the word when accessed,
+              rather than stored, until the word's children are modified
+            sentence: recognizer for sentences
+            fused: if True, from_text builds the document in a single left-to-right pass, rather than with the
+              itor pipeline; the resulting tree is the same
+        """
         super().__init__()
+        if not isinstance(fused, bool):
+            raise pawpaw.Errors.parameter_invalid_type('fused', fused, bool)
+        self._number = number
+        self._chars = chars
+        self._sentence = sentence
+        self._fused = fused
+        if fused:
+            # Only the fused tokenizer uses these
+            self._re_paragraph = Paragraph().re
+            self._re_tokens = self._build_tokens_re(number)
 
         paragraph = Paragraph().get_itor()
 
-        sentence = Sentence().get_itor()
+        sentence = sentence.get_itor()
         con = pawpaw.arborform.Connectors.Children.Add(sentence)
         paragraph.connections.append(con)
 
-        itor_num = number.get_itor()
-        con = pawpaw.arborform.Connectors.Children.Add(itor_num)
-        sentence.connections.append(con)
-
         word = pawpaw.arborform.Extract(
             regex.compile(r'(?P<word>' + self._word_pat + r')', regex.DOTALL, sqs=list(unicode_single_quote_marks.values()))
         )
-        con = pawpaw.arborform.Connectors.Delegate(word, lambda ito: ito.desc is None)
-        itor_num.connections.append(con)
 
-        if chars:
-            char = pawpaw.arborform.Extract(regex.compile(r'(?P<char>\w)', regex.DOTALL))
-            con = pawpaw.arborform.Connectors.Children.Add(char)
+        if number is None:
+            con = pawpaw.arborform.Connectors.Children.Add(word)
+            sentence.connections.append(con)
+            itor_num = word
+        else:
+            itor_num = number.get_itor()
+            con = pawpaw.arborform.Connectors.Children.Add(itor_num)
+            sentence.connections.append(con)
+
+            con = pawpaw.arborform.Connectors.Delegate(word, lambda ito: ito.desc is None)
             itor_num.connections.append(con)
 
+        if chars:
+            char = pawpaw.arborform.Itorator.wrap(self._add_chars, tag='chars')
+            con = pawpaw.arborform.Connectors.Subroutine(char)
+            word.connections.append(con)
+
         self.itor = paragraph
 
+    @staticmethod
+    def _add_chars(word: pawpaw.Ito) -> list[pawpaw.Ito]:
+        word._children = _VirtualChildItos(word, _char_spans, 'char')
+        return []
+
     @property
     def number(self) -> Number:
         return self._number
 
+    @property
+    def sentence(self) -> Sentence:
+        return self._sentence
+
+    @property
+    def fused(self) -> bool:
+        return self._fused
+
+    @classmethod
+    def _build_tokens_re(cls, number: Number | None) -> regex.Pattern:
+        # Numbers take precedence over words; a word stops before any \w at which a number starts, so
+        # that a single scan finds the same words as extracting words from the gaps between numbers
+        if number is None:
+            pat = r'(?P<word>' + cls._word_pat + r')'
+        else:
+            not_num = r'(?!' + regex.sub(r'\(\?P<\w+>', '(?:', number.num_pat) + r')'
+            pat = number.num_pat + rf'|(?P<word>{not_num}\w(?:(?:\L<sqs>|-\s*)?{not_num}\w)*)'
+        return regex.compile(pat, regex.DOTALL, sqs=list(unicode_single_quote_marks.values()))
+
+    def _number_ito(self, m: regex.Match) -> pawpaw.Ito:
+        # Equivalent to Ito.from_match for the number's named groups
+        spans = sorted(
+            ((span, name) for name in self._number.re.groupindex for span in m.spans(name)),
+            key=lambda val: (val[0][0], -val[0][1])
+        )
+        rv = None
+        stack: list[tuple[pawpaw.Ito, list[pawpaw.Ito]]] = []  # (ito, children)
+        for (start, stop), name in spans:
+            ito = pawpaw.Ito._from_trusted(m.string, start, stop, name)
+            while len(stack) > 0 and stop > stack[-1][0].stop:
+                parent, children = stack.pop()
+                parent.children._add_ordered(*children)
+            if len(stack) == 0:
+                rv = ito
+            else:
+                stack[-1][1].append(ito)
+            stack.append((ito, []))
+        while len(stack) > 0:
+            parent, children = stack.pop()
+            parent.children._add_ordered(*children)
+        if self._number.value_type is not None:
+            rv._set_value_func_trusted(self._number._value)
+        return rv
+
+    def _from_text_fused(self, text: str) -> pawpaw.Ito:
+        from_trusted = pawpaw.Ito._from_trusted
+        re_tokens = self._re_tokens
+        chars = self._chars
+
+        doc = pawpaw.Ito(text, desc='Document')
+        paragraphs = []
+        with _gc_paused():
+            for p_start, p_stop in _gaps((m.span() for m in self._re_paragraph.finditer(text)), 0, len(text)):
+                paragraph = from_trusted(text, p_start, p_stop, 'paragraph')
+                sentences = []
+                for s_start, s_stop in _gaps(Sentence.find_boundaries(text, p_start, p_stop), p_start, p_stop):
+                    sentence = from_trusted(text, s_start, s_stop, 'sentence')
+                    tokens = []
+                    for m in re_tokens.finditer(text, s_start, s_stop):
+                        if m.lastgroup == 'word':
+                            word = from_trusted(text, *m.span(), 'word')
+                            if chars:
+                                word._children = _VirtualChildItos(word, _char_spans, 'char')
+                            tokens.append(word)
+                        else:
+                            tokens.append(self._number_ito(m))
+                    sentence.children._add_ordered(*tokens)
+                    sentences.append(sentence)
+                paragraph.children._add_ordered(*sentences)
+                paragraphs.append(paragraph)
+            doc.children._add_ordered(*paragraphs)
+        return doc
+
     def from_text(self, text: str) -> pawpaw.Ito:
+        if self._fused:
+            return self._from_text_fused(text)
+
         doc = pawpaw.Ito(text, desc='Document')
         doc.children.add(*self.itor(doc))
         return doc
+
+    def from_texts(
+            self,
+            texts: typing.Iterable[str],
+            workers: int | None = None,
+            chunksize: int = 64
+    ) -> typing.Iterator[pawpaw.Ito]:
+        """Segments many texts using a pool of worker processes, yielding a document per text, in input order
+
+        Each worker builds its own pipeline once, using this instance's configuration, and returns each document
+        as a compact span table (see Ito pickling), which is rebuilt over the original text in this process.
+        Texts are consumed lazily, and at most two chunks per worker are in flight at any time, so memory use is
+        bounded regardless of the number of texts.
+
+        Args:
+            texts: the texts to segment
+            workers: number of worker processes; if None, os.cpu_count() is used; if 1, texts are segmented in
+                this process
+            chunksize: number of texts sent to a worker at a time
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        elif not isinstance(workers, int):
+            raise pawpaw.Errors.parameter_invalid_type('workers', workers, int, types.NoneType)
+        elif workers < 1:
+            raise ValueError('parameter \'workers\' must be at least 1')
+
+        if not isinstance(chunksize, int):
+            raise pawpaw.Errors.parameter_invalid_type('chunksize', chunksize, int)
+        elif chunksize < 1:
+            raise ValueError('parameter \'chunksize\' must be at least 1')
+
+        if workers == 1:
+            return (self.from_text(text) for text in texts)
+        return self._from_texts_pooled(iter(texts), workers, chunksize)
+
+    def _from_span_table(self, text: str, table: tuple) -> pawpaw.Ito:
+        # Rebuilds a document segmented by a worker; span tables carry virtual chars, but not value funcs
+        rv = pawpaw.Ito._from_span_table(text, *table)
+        if self._number is not None and self._number.value_type is not None:
+            f = self._number._value
+            for paragraph in rv.children:
+                for sentence in paragraph.children:
+                    for token in sentence.children:
+                        if token.desc == 'number':
+                            token._set_value_func_trusted(f)
+        return rv
+
+    def _from_texts_pooled(self, texts: typing.Iterator[str], workers: int, chunksize: int) -> typing.Iterator[pawpaw.Ito]:
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker_nlp,
+                initargs=(self._number, self._chars, self._sentence, self._fused)
+        ) as executor:
+            pending: collections.deque[tuple[list[str], concurrent.futures.Future]] = collections.deque()
+            try:
+                while True:
+                    while len(pending) < 2 * workers and len(chunk := list(itertools.islice(texts, chunksize))) > 0:
+                        pending.append((chunk, executor.submit(_worker_span_tables, chunk)))
+                    if len(pending) == 0:
+                        break
+
+                    chunk, future = pending.popleft()
+                    for text, table in zip(chunk, future.result()):
+                        yield self._from_span_table(text, table)
+            finally:
+                for chunk, future in pending:
+                    future.cancel()
+
+
+_worker_nlp: SimpleNlp | None = None
+
+
+def _init_worker_nlp(number: Number | None, chars: bool, sentence: Sentence, fused: bool) -> None:
+    global _worker_nlp
+    _worker_nlp = SimpleNlp(number, chars, sentence, fused)
+
+
+def _worker_span_tables(texts: list[str]) -> list[tuple]:
+    return [_worker_nlp.from_text(text)._to_span_table() for text in texts]
@@ -1,8 +1,10 @@
 from __future__ import annotations
+import concurrent.futures
 import itertools
+import types
 import typing
 
-from pawpaw import Ito, Types
+from pawpaw import Ito, Types, Errors
 from pawpaw.arborform import Itorator
 import regex
 
@@ -57,14 +59,103 @@ class Ontology(dict):
         c = ', '.join(f'{k}: {str(v)}' for k, v in self.items())
         return f'{{rules: {self._rules}, {c}}}'   
     
-    def discover(self, *itos: Ito) -> Discoveries:
+    def _skeleton(self, tasks: list[tuple[Discoveries, Types.C_ORULE]]) -> Discoveries:
+        # Builds empty Discoveries mirroring this ontology, and appends (node, rule) for each rule in pre-order
         rv = Discoveries()
+        tasks.extend((rv, rule) for rule in self._rules)
+        for k, v in self.items():
+            rv[k] = v._skeleton(tasks)
+        return rv
 
-        for rule in self._rules:
-            for i in itos:
-                rv.itos.extend(rule(i))
+    def discover(
+            self,
+            *itos: Ito,
+            executor: concurrent.futures.Executor | None = None,
+            chunksize: int = 1
+    ) -> Discoveries:
+        """Applies the rules of this ontology and its descendants to itos
 
-        for k, v in self.items():
-            rv[k] = v.discover(*itos)
+        Args:
+            itos: Itos to apply the rules to
+            executor: if not None, rules are applied concurrently: each rule of the entire ontology tree, for
+                each chunk of itos, is a separate task.  With a ProcessPoolExecutor, each chunk of itos is
+                instead a single task that applies every rule, so that it is pickled once; rules and itos must
+                be picklable, and results are returned as span tables, and rebuilt over the strings of itos.
+            chunksize: number of itos per task submitted to executor
+
+        Returns:
+            Discoveries having the same structure as this ontology; the .itos of each node are the results of
+            its rules, in rule order, then in order of itos, regardless of executor
+        """
+        if executor is None:
+            rv = Discoveries()
+
+            for rule in self._rules:
+                for i in itos:
+                    rv.itos.extend(rule(i))
+
+            for k, v in self.items():
+                rv[k] = v.discover(*itos)
+
+            return rv
+
+        if not isinstance(executor, concurrent.futures.Executor):
+            raise Errors.parameter_invalid_type('executor', executor, concurrent.futures.Executor, types.NoneType)
+        if not isinstance(chunksize, int):
+            raise Errors.parameter_invalid_type('chunksize', chunksize, int)
+        elif chunksize < 1:
+            raise ValueError('parameter \'chunksize\' must be at least 1')
+
+        tasks: list[tuple[Discoveries, Types.C_ORULE]] = []
+        rv = self._skeleton(tasks)
+        chunks = [itos[i:i + chunksize] for i in range(0, len(itos), chunksize)]
+
+        if isinstance(executor, concurrent.futures.ProcessPoolExecutor):
+            # One task per chunk, applying every rule, so that each chunk (and its strings) is pickled once
+            rules = [rule for node, rule in tasks]
+            futures = [executor.submit(_apply_rules_remote, rules, chunk) for chunk in chunks]
+        else:
+            futures = [executor.submit(_apply_rule, rule, chunk) for node, rule in tasks for chunk in chunks]
+
+        try:
+            if isinstance(executor, concurrent.futures.ProcessPoolExecutor):
+                results = [
+                    [
+                        [r if isinstance(r, Ito) else Ito._from_span_table(chunk[r[0]].string, *r[1]) for r in rule_results]
+                        for rule_results in future.result()
+                    ]
+                    for chunk, future in zip(chunks, futures)
+                ]
+                for i, (node, rule) in enumerate(tasks):
+                    for chunk_results in results:
+                        node.itos.extend(chunk_results[i])
+            else:
+                for (node, rule), future in zip((task for task in tasks for chunk in chunks), futures):
+                    node.itos.extend(future.result())
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
 
         return rv
+
+
+def _apply_rule(rule: Types.C_ORULE, itos: typing.Sequence[Ito]) -> list[Ito]:
+    return [r for i in itos for r in rule(i)]
+
+
+def _apply_rules_remote(rules: typing.Sequence[Types.C_ORULE], itos: typing.Sequence[Ito]) -> list[list[Ito | tuple[int, tuple]]]:
+    # Returns the results of each rule.  Results over the string of the ito they came from are returned as
+    # (index in itos, span table), so that they are rebuilt over the caller's strings, rather than each
+    # unpickling its own copy
+    rv = []
+    for rule in rules:
+        rule_results = []
+        for idx, i in enumerate(itos):
+            for r in rule(i):
+                if r.string is i.string and (table := r._to_span_table()) is not None:
+                    rule_results.append((idx, table))
+                else:
+                    rule_results.append(r)
+        rv.append(rule_results)
+    return rv
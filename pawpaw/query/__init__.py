@@ -1,2 +1,2 @@
-from ._query import OPERATORS, FILTER_KEYS, MUST_ESCAPE_CHARS, escape, descape, Query, compile, find_all, find
+from ._query import OPERATORS, FILTER_KEYS, MUST_ESCAPE_CHARS, escape, descape, merge_unique, Query, compile, find_all, find_all_many, find
 del _query
@@ -1,7 +1,12 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
+import concurrent.futures
+import dataclasses
+import heapq
 import itertools
 import operator
+import threading
+import time
 import typing
 
 import regex
@@ -24,6 +29,7 @@ FILTER_KEYS = {
     'str-casefold-sw': {'str-casefold-sw', 'scfsw', 'lcssw'},
     'str-ew': {'str-ew', 'sew'},
     'str-sw': {'str-sw', 'ssw'},
+    'str-regex': {'str-regex', 'sre'},
     'index': {'index', 'i'},
     'predicate': {'predicate', 'p'},
     'value': {'value', 'v'}
@@ -81,8 +87,41 @@ def descape(value: str) -> str:
     return rv
 
 
+def _doc_order_key(ito: pawpaw.Ito) -> typing.Tuple[int, int, int]:
+    depth = 0
+    cur = ito
+    while (cur := cur._parent) is not None:
+        depth += 1
+    return ito.start, -ito.stop, depth
+
+
+def merge_unique(*iterables: pawpaw.Types.C_IT_ITOS, reverse: bool = False) -> pawpaw.Types.C_IT_ITOS:
+    """Merges Itos from one or more document-ordered streams, dropping duplicates
+
+    Args:
+        *iterables: streams of Itos from the same tree, each sorted in document
+            order (or reverse document order if reverse is True)
+        reverse: if True, streams and result are in reverse document order
+
+    Yields:
+        Itos in (reverse) document order; an Ito present in more than one stream
+        (by identity, not equality) is yielded only once
+    """
+    last = None
+    for ito in heapq.merge(*iterables, key=_doc_order_key, reverse=reverse):
+        if ito is not last:
+            yield ito
+            last = ito
+
+
 class Axis:
-    _re = regex.compile(r'(?P<order>[\+\-]?)(?P<key>\.{1,4}|\*{1,3}|\>\<|\<{1,3}|\>{1,3})(?P<or_self>(?:\!{1,2})?)', regex.DOTALL)
+    _re = regex.compile(r'(?P<order>[\+\-]?)(?P<key>\.{1,4}|\*{1,3}|\>\<|\<{1,3}|\>{1,3})(?P<or_self>(?:\!{1,2})?)(?P<merge>\#?)', regex.DOTALL)
+
+    # Axes whose results for a single node are nearest-first in reverse document order
+    _BACKWARD_KEYS = ('....', '...', '..', '<<<', '<<', '<')
+
+    # Axes that enumerate across all input nodes, rather than per node
+    _REFLECTING_KEYS = ('.', '><')
 
     def __init__(self, phrase: pawpaw.Ito):
         m = phrase.regex_match(self._re)
@@ -98,11 +137,18 @@ class Axis:
         self.order = next((str(i) for i in self.ito.children if i.desc == 'order'), None)
         
         self.or_self = next((str(i) for i in self.ito.children if i.desc == 'or_self'), None)
+
+        self.merge = any(i.desc == 'merge' for i in self.ito.children)
         
     @property
     def reverse(self) -> bool:
         return self.order is not None and str(self.order) == '-'
 
+    @property
+    def document_ordered(self) -> bool:
+        """True if results for a single node are in document order, False if in reverse document order"""
+        return self.reverse == (self.key in self._BACKWARD_KEYS)
+
     def to_ecs(
         self,
         itos: pawpaw.Types.C_IT_ITOS,
@@ -434,6 +480,16 @@ class EcfFilter(EcfCombined):
             else:
                 return lambda ec, values, predicates: any(ec.ito.str_startswith(descape(s)) for s in pawpaw.split_unescaped(value, ','))
 
+        if key in FILTER_KEYS['str-regex']:
+            try:
+                res = [regex.compile(descape(s), regex.DOTALL) for s in pawpaw.split_unescaped(value, ',')]
+            except regex.error as e:
+                raise ValueError(f'invalid filter regex value \'{value}\': {e}')
+            if not_ == '~':
+                return lambda ec, values, predicates: all(ec.ito.regex_fullmatch(re) is None for re in res)
+            else:
+                return lambda ec, values, predicates: any(ec.ito.regex_fullmatch(re) is not None for re in res)
+
         if key in FILTER_KEYS['index']:
             ranges = list[tuple[int]]()
 
@@ -515,6 +571,10 @@ class EcfFilter(EcfCombined):
         super().__init__(ito, filters, operands)
 
 
+# Subquery memo of the query run currently evaluating a subquery; see Phrase._subquery_func
+_subquery_memo = threading.local()
+
+
 class EcfSubquery(EcfCombined):
     _re_open_cur = regex.compile(EcfCombined._obs_pat_1 + r'\{', regex.DOTALL)
     _re_close_cur = regex.compile(EcfCombined._obs_pat_1 + r'\}', regex.DOTALL)
@@ -526,11 +586,11 @@ class EcfSubquery(EcfCombined):
     )
     
     @classmethod
-    def _func(cls, sq: pawpaw.Ito) -> pawpaw.Types.P_EITO_V_QPS:
-        query = Query(sq)
-        return lambda e, v, p: next(query.find_all(e.ito, v, p), None) is not None
+    def _func(cls, query: Query) -> pawpaw.Types.P_EITO_V_QPS:
+        return lambda e, v, p: next(query._find_all(e.ito, v, p, getattr(_subquery_memo, 'memo', None)), None) is not None
     
     def __init__(self, ito: pawpaw.Ito):
+        self.queries: typing.List[Query] = []
         subqueries: typing.List[pawpaw.Types.P_EITO_V_QPS] = []
         operands: typing.List[pawpaw.Ito] = []
 
@@ -552,7 +612,9 @@ class EcfSubquery(EcfCombined):
                 raise ValueError(f'missing operator between subqueries \'{last}\' and \'{sq}\'')
             operands.append(op)
 
-            subqueries.append(self._func(pawpaw.Ito.from_match(sq)[0][1:-1]))
+            query = Query(pawpaw.Ito.from_match(sq)[0][1:-1])
+            self.queries.append(query)
+            subqueries.append(self._func(query))
             last = sq
 
         if last is not None:
@@ -562,6 +624,42 @@ class EcfSubquery(EcfCombined):
         super().__init__(ito, subqueries, operands)
 
 
+@dataclasses.dataclass
+class PhraseProfile:
+    phrase: str
+    candidates: int = 0
+    filtered: int = 0
+    subquery_calls: int = 0
+    subquery_hits: int = 0
+    passed: int = 0
+    seconds: float = 0.0
+
+
+@dataclasses.dataclass
+class QueryProfile:
+    path: str
+    phrases: typing.List[PhraseProfile] = dataclasses.field(default_factory=list)
+    results: typing.List[pawpaw.Ito] = dataclasses.field(default_factory=list)
+
+    @property
+    def seconds(self) -> float:
+        return sum(p.seconds for p in self.phrases)
+
+    def __str__(self) -> str:
+        lines = [f'Query {self.path!r}: {len(self.results):,} result(s) in {self.seconds:.6f}s']
+        for i, p in enumerate(self.phrases):
+            lines.append(
+                f'  {i}: {p.phrase!r}'
+                f' candidates={p.candidates:,}'
+                f' filtered={p.filtered:,}'
+                f' subquery_calls={p.subquery_calls:,}'
+                f' subquery_hits={p.subquery_hits:,}'
+                f' passed={p.passed:,}'
+                f' seconds={p.seconds:.6f}'
+            )
+        return '\n'.join(lines)
+
+
 class Phrase:
     def __init__(self, phrase: pawpaw.Ito):
         self.ito = phrase
@@ -584,17 +682,115 @@ class Phrase:
         else:
             self.filter = EcfFilter(filt_ito)
 
-    def combined(self, ec: pawpaw.Types.C_EITO, values: pawpaw.Types.C_VALUES, predicates: pawpaw.Types.C_QPS) -> bool:
-        return self.filter.func(ec, values, predicates) and self.subquery.func(ec, values, predicates)
+    def _subquery_func(
+            self,
+            ec: pawpaw.Types.C_EITO,
+            values: pawpaw.Types.C_VALUES,
+            predicates: pawpaw.Types.C_QPS,
+            memo: typing.Dict[typing.Tuple[int, int], typing.Tuple[pawpaw.Ito, bool]] | None
+    ) -> bool:
+        if memo is None or isinstance(self.subquery, EcfTautology):
+            return self.subquery.func(ec, values, predicates)
+
+        # Subqueries only depend on ec.ito, and values & predicates are fixed for a run.  The ito
+        # is kept in the memo so that its id can't be reused by another object during the run.
+        key = (id(self.subquery), id(ec.ito))
+        if (hit := memo.get(key)) is not None:
+            return hit[1]
+
+        prior = getattr(_subquery_memo, 'memo', None)
+        _subquery_memo.memo = memo
+        try:
+            rv = self.subquery.func(ec, values, predicates)
+        finally:
+            _subquery_memo.memo = prior
+
+        memo[key] = (ec.ito, rv)
+        return rv
+
+    def combined(
+            self,
+            ec: pawpaw.Types.C_EITO,
+            values: pawpaw.Types.C_VALUES,
+            predicates: pawpaw.Types.C_QPS,
+            memo: typing.Dict[typing.Tuple[int, int], typing.Tuple[pawpaw.Ito, bool]] | None = None
+    ) -> bool:
+        return self.filter.func(ec, values, predicates) and self._subquery_func(ec, values, predicates, memo)
+
+    def _profiled(
+            self,
+            ec: pawpaw.Types.C_EITO,
+            values: pawpaw.Types.C_VALUES,
+            predicates: pawpaw.Types.C_QPS,
+            memo: typing.Dict[typing.Tuple[int, int], typing.Tuple[pawpaw.Ito, bool]],
+            profile: PhraseProfile
+    ) -> bool:
+        profile.candidates += 1
+        if not self.filter.func(ec, values, predicates):
+            return False
+        profile.filtered += 1
+
+        if not isinstance(self.subquery, EcfTautology):
+            if (id(self.subquery), id(ec.ito)) in memo:
+                profile.subquery_hits += 1
+            else:
+                profile.subquery_calls += 1
+            if not self._subquery_func(ec, values, predicates, memo):
+                return False
+
+        profile.passed += 1
+        return True
+
+    def explain(self, level: int = 0, indent: str = '  ') -> typing.List[str]:
+        prefix = indent * level
+        axis = f'{prefix}{indent}axis: {str(self.axis.ito)!r} (key={self.axis.key!r}'
+        if self.axis.reverse:
+            axis += ', reverse'
+        if self.axis.or_self:
+            axis += f', or_self={self.axis.or_self!r}'
+        if self.axis.merge:
+            axis += ', merge'
+        axis += ')'
+
+        rv = [f'{prefix}phrase: {str(self.ito)!r}', axis]
+
+        if isinstance(self.filter, EcfFilter):
+            rv.append(f'{prefix}{indent}filter: {str(self.filter.ito)!r}')
+
+        if isinstance(self.subquery, EcfSubquery):
+            rv.append(f'{prefix}{indent}subquery: {str(self.subquery.ito)!r}')
+            for query in self.subquery.queries:
+                rv.extend(query._explain(level + 2, indent))
+
+        return rv
 
     def find_all(
             self,
             itos: pawpaw.Types.C_IT_ITOS,
             values: pawpaw.Types.C_VALUES,
-            predicates: pawpaw.Types.C_QPS
+            predicates: pawpaw.Types.C_QPS,
+            memo: typing.Dict[typing.Tuple[int, int], typing.Tuple[pawpaw.Ito, bool]] | None = None,
+            profile: PhraseProfile | None = None
     ) -> pawpaw.Types.C_IT_ITOS:
-        func = lambda ec: self.combined(ec, values, predicates)
-        yield from (ec.ito for ec in filter(func, self.axis.find_all(itos)))
+        if memo is None:
+            memo = {}
+        if profile is None:
+            func = lambda ec: self.combined(ec, values, predicates, memo)
+        else:
+            func = lambda ec: self._profiled(ec, values, predicates, memo, profile)
+        if not self.axis.merge:
+            yield from (ec.ito for ec in filter(func, self.axis.find_all(itos)))
+
+        elif self.axis.key in Axis._REFLECTING_KEYS:
+            seen = set[int]()
+            for ec in filter(func, self.axis.find_all(itos)):
+                if id(ec.ito) not in seen:
+                    seen.add(id(ec.ito))
+                    yield ec.ito
+
+        else:
+            streams = [(ec.ito for ec in filter(func, self.axis.find_all([i]))) for i in itos]
+            yield from merge_unique(*streams, reverse=not self.axis.document_ordered)
 
 
 class Query:
@@ -672,6 +868,7 @@ class Query:
         if len(path) == 0 or not path.str_isprintable():
             raise pawpaw.Errors.parameter_neither_none_nor_empty('path')
 
+        self.path = path
         self.phrases = [Phrase(p) for p in self._split_phrases(path)]
 
     def find_all(
@@ -680,11 +877,69 @@ class Query:
         values: pawpaw.Types.C_VALUES = None,
         predicates: pawpaw.Types.C_QPS = None
     ) -> pawpaw.Types.C_IT_ITOS:
+        yield from self._find_all(ito, values, predicates, None)
+
+    def _find_all(
+        self,
+        ito: pawpaw.Ito,
+        values: pawpaw.Types.C_VALUES,
+        predicates: pawpaw.Types.C_QPS,
+        memo: typing.Dict[typing.Tuple[int, int], typing.Tuple[pawpaw.Ito, bool]] | None
+    ) -> pawpaw.Types.C_IT_ITOS:
+        # Subquery results are memoized for the duration of a single run, including any nested
+        # subquery runs, which share the memo of the run that invoked them
+        if memo is None:
+            memo = {}
         cur = [ito]
         for phrase in self.phrases:
-            cur = phrase.find_all(cur, values, predicates)
+            cur = phrase.find_all(cur, values, predicates, memo)
         yield from cur
 
+    def _explain(self, level: int = 0, indent: str = '  ') -> typing.List[str]:
+        rv = [f'{indent * level}query: {str(self.path)!r}']
+        for phrase in self.phrases:
+            rv.extend(phrase.explain(level + 1, indent))
+        return rv
+
+    def explain(self, indent: str = '  ') -> str:
+        """Describes the parsed query
+
+        Returns:
+            An indented outline of the query's phrases, along with the axis, filter, and
+            subqueries of each phrase; subqueries are outlined recursively
+        """
+        return '\n'.join(self._explain(0, indent))
+
+    def profile(
+        self,
+        ito: pawpaw.Ito,
+        values: pawpaw.Types.C_VALUES = None,
+        predicates: pawpaw.Types.C_QPS = None
+    ) -> QueryProfile:
+        """Runs the query and collects per-phrase statistics
+
+        Unlike .find_all, each phrase is evaluated to completion before the next one
+        starts, so that wall time can be attributed to individual phrases.  The time
+        for a phrase includes the time spent in its subqueries.
+
+        Returns:
+            A QueryProfile holding the query results along with, for each phrase, the
+            count of axis candidates, the counts passing the filter and the subqueries,
+            the counts of subquery invocations and memoized subquery results, and the
+            wall time
+        """
+        rv = QueryProfile(str(self.path))
+        memo = {}
+        cur = [ito]
+        for phrase in self.phrases:
+            pp = PhraseProfile(str(phrase.ito))
+            start = time.perf_counter()
+            cur = [*phrase.find_all(cur, values, predicates, memo, pp)]
+            pp.seconds = time.perf_counter() - start
+            rv.phrases.append(pp)
+        rv.results = cur
+        return rv
+
     def find(
         self,
         ito: pawpaw.Ito,
@@ -693,6 +948,137 @@ class Query:
     ) -> pawpaw.Ito | None:
         return next(self.find_all(ito, values, predicates), None)
 
+    def find_all_many(
+        self,
+        itos: pawpaw.Types.C_IT_ITOS,
+        values: pawpaw.Types.C_VALUES = None,
+        predicates: pawpaw.Types.C_QPS = None,
+        executor: concurrent.futures.Executor | None = None,
+        chunksize: int = 1
+    ) -> pawpaw.Types.C_IT_RITOS:
+        """Runs the query over many Itos
+
+        Args:
+            itos: the Itos to query
+            values: values dictionary, as for .find_all
+            predicates: predicates dictionary, as for .find_all
+            executor: if None, Itos are queried serially; otherwise, Itos are
+                queried using the executor.  For a ProcessPoolExecutor, each
+                distinct tree containing the Itos (from its top-most ancestor)
+                is pickled once, and its Itos are queried in a worker process,
+                so values and predicates must be picklable, and results are
+                resolved back to nodes in the caller's tree
+            chunksize: passed to executor.map; for a ProcessPoolExecutor, in
+                units of trees
+
+        Yields:
+            Results tagged with the Ito they were found from, in the order of
+            itos and then in query order, regardless of executor
+        """
+        if executor is None:
+            for root in itos:
+                yield from (pawpaw.Types.C_RITO(root, i) for i in self.find_all(root, values, predicates))
+
+        elif isinstance(executor, concurrent.futures.ProcessPoolExecutor):
+            # Each distinct tree is sent once, along with the index paths of the roots within it
+            roots = list(itos)
+            positions: _Positions = {}
+            trees: typing.Dict[int, typing.Tuple[pawpaw.Ito, typing.List[typing.Tuple[int, ...]]]] = {}
+            located = []  # (id of tree top, index of root within the tree's roots)
+            for root in roots:
+                top, index_path = _index_path(root, positions)
+                if (tree := trees.get(id(top))) is None:
+                    tree = trees[id(top)] = (top, [])
+                located.append((id(top), len(tree[1])))
+                tree[1].append(index_path)
+
+            path = str(self.path)
+            results = zip(trees.keys(), executor.map(
+                _find_all_index_paths,
+                itertools.repeat(path),
+                (top for top, root_index_paths in trees.values()),
+                (root_index_paths for top, root_index_paths in trees.values()),
+                itertools.repeat(values),
+                itertools.repeat(predicates),
+                chunksize=chunksize
+            ))
+            received = {}
+            for root, (key, i) in zip(roots, located):
+                while key not in received:  # trees are submitted in order of their first root
+                    k, found = next(results)
+                    received[k] = found
+                top = trees[key][0]
+                for index_path in received[key][i]:
+                    yield pawpaw.Types.C_RITO(root, _resolve_index_path(top, index_path))
+
+        elif isinstance(executor, concurrent.futures.Executor):
+            roots = list(itos)
+            results = executor.map(
+                lambda root: [*self.find_all(root, values, predicates)],
+                roots,
+                chunksize=chunksize
+            )
+            for root, found in zip(roots, results):
+                yield from (pawpaw.Types.C_RITO(root, i) for i in found)
+
+        else:
+            raise pawpaw.Errors.parameter_invalid_type('executor', executor, concurrent.futures.Executor, None)
+
+
+_worker_queries: typing.Dict[str, Query] = {}
+
+
+_Positions = typing.Dict[int, typing.Dict[int, int]]  # id of parent -> id of child -> index
+
+
+def _index_path(ito: pawpaw.Ito, positions: _Positions) -> typing.Tuple[pawpaw.Ito, typing.Tuple[int, ...]]:
+    # Returns the top-most ancestor of ito (or ito itself), and the child indices leading from it to ito;
+    # each parent's children are enumerated at most once per positions
+    rv = []
+    while (parent := ito.parent) is not None:
+        children = parent.children
+        index = positions.get(id(parent))
+        if index is None or (i := index.get(id(ito))) is None or children[i] is not ito:
+            index = positions[id(parent)] = {id(c): i for i, c in enumerate(children)}
+            i = index[id(ito)]
+        rv.append(i)
+        ito = parent
+    rv.reverse()
+    return ito, tuple(rv)
+
+
+def _resolve_index_path(top: pawpaw.Ito, index_path: typing.Sequence[int]) -> pawpaw.Ito:
+    rv = top
+    for i in index_path:
+        rv = rv.children[i]
+    return rv
+
+
+def _find_all_index_paths(
+        path: str,
+        top: pawpaw.Ito,
+        root_index_paths: typing.List[typing.Tuple[int, ...]],
+        values: pawpaw.Types.C_VALUES,
+        predicates: pawpaw.Types.C_QPS
+) -> typing.List[typing.List[typing.Tuple[int, ...]]]:
+    # Runs in worker processes; compiled queries are cached per worker.  The entire tree containing the
+    # roots is sent, so that axes leaving a root's subtree (e.g., siblings or ancestors) resolve as they
+    # do serially, and results are returned as index paths from the top of that tree.
+    if (query := _worker_queries.get(path)) is None:
+        query = _worker_queries[path] = Query(path)
+
+    positions: _Positions = {}
+    rv = []
+    for root_index_path in root_index_paths:
+        found = []
+        for ito in query.find_all(_resolve_index_path(top, root_index_path), values, predicates):
+            result_top, index_path = _index_path(ito, positions)
+            if result_top is not top:
+                raise ValueError(f'query result {ito!r} is not in the tree of the queried Ito')
+            found.append(index_path)
+        rv.append(found)
+    return rv
+
 
 def compile(path: pawpaw.Types.C_QPATH) -> Query:
     return Query(path)
@@ -707,6 +1093,17 @@ def find_all(
     yield from Query(path).find_all(ito, values, predicates)
 
 
+def find_all_many(
+        path: pawpaw.Types.C_QPATH,
+        itos: pawpaw.Types.C_IT_ITOS,
+        values: pawpaw.Types.C_VALUES = None,
+        predicates: pawpaw.Types.C_QPS = None,
+        executor: concurrent.futures.Executor | None = None,
+        chunksize: int = 1
+) -> pawpaw.Types.C_IT_RITOS:
+    yield from Query(path).find_all_many(itos, values, predicates, executor, chunksize)
+
+
 def find(
         path: pawpaw.Types.C_QPATH,
         ito: pawpaw.Ito,
@@ -0,0 +1,5 @@
+import pawpaw.serialization.binary
+import pawpaw.serialization.json_stream
+import pawpaw.serialization.shared_documents
+import pawpaw.serialization.columnar
+import pawpaw.serialization.delta
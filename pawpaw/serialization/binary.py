@@ -0,0 +1,247 @@
+"""Compact, versioned binary serialization for Ito trees
+
+Record layout (all integers little-endian):
+
+    magic           4 bytes, b'PWPW'
+    format version  1 byte
+    flags           1 byte; bit 0 set if the string is present
+    string          uvarint byte count + UTF-8 bytes (only if flagged)
+    desc table      uvarint count + (uvarint byte count + UTF-8 bytes) per desc
+    node count      uvarint
+    columns         child counts, desc indices, start deltas, lengths
+    path            uvarint count + uvarint child index per step
+
+Nodes are stored in pre-order.  Start values are non-decreasing in pre-order, so each is stored
+as a delta from the prior node's start.  Desc index 0 represents None; other descs are stored
+once in the desc table.  Each column is a 1-byte item size followed by the packed values, using
+the narrowest unsigned width that fits the column.
+"""
+from __future__ import annotations
+import array
+import io
+import sys
+import typing
+
+from pawpaw import Ito, Errors
+from pawpaw.ito import _gc_paused
+
+
+MAGIC = b'PWPW'
+FORMAT_VERSION = 1
+
+_FLAG_STRING = 0x01
+
+_ENCODING = 'utf-8'
+_ERRORS = 'surrogatepass'  # Python strs may contain lone surrogates
+
+_TYPECODES = {array.array(tc).itemsize: tc for tc in 'QLIHB'}
+
+
+# region primitives
+
+def _write_uvarint(fs: typing.BinaryIO, value: int) -> None:
+    buf = bytearray()
+    while value > 0x7F:
+        buf.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buf.append(value)
+    fs.write(buf)
+
+
+def _read_exactly(fs: typing.BinaryIO, count: int) -> bytes:
+    rv = fs.read(count)
+    if len(rv) != count:
+        raise ValueError('truncated binary Ito data')
+    return rv
+
+
+def _read_uvarint(fs: typing.BinaryIO) -> int:
+    rv = 0
+    shift = 0
+    while True:
+        b = _read_exactly(fs, 1)[0]
+        rv |= (b & 0x7F) << shift
+        if b < 0x80:
+            return rv
+        shift += 7
+
+
+def _write_str(fs: typing.BinaryIO, value: str) -> None:
+    data = value.encode(_ENCODING, _ERRORS)
+    _write_uvarint(fs, len(data))
+    fs.write(data)
+
+
+def _read_str(fs: typing.BinaryIO) -> str:
+    return _read_exactly(fs, _read_uvarint(fs)).decode(_ENCODING, _ERRORS)
+
+
+def _write_column(fs: typing.BinaryIO, values: typing.Sequence[int]) -> None:
+    hi = max(values, default=0)
+    size = next(s for s in (1, 2, 4, 8) if hi < 1 << (8 * s))
+    col = array.array(_TYPECODES[size], values)
+    if sys.byteorder != 'little':
+        col.byteswap()
+    fs.write(bytes((size,)))
+    fs.write(col.tobytes())
+
+
+def _read_column(fs: typing.BinaryIO, count: int) -> array.array:
+    size = _read_exactly(fs, 1)[0]
+    if size not in _TYPECODES:
+        raise ValueError(f'invalid column item size {size}')
+    rv = array.array(_TYPECODES[size])
+    rv.frombytes(_read_exactly(fs, count * size))
+    if sys.byteorder != 'little':
+        rv.byteswap()
+    return rv
+
+# endregion
+
+
+def dump(fs: typing.BinaryIO, ito: Ito, stringless: bool = False, full_tree: bool = True) -> None:
+    """Serializes an Ito to a binary stream
+
+    Args:
+        fs: a writable binary file-like object
+        ito: the Ito to serialize
+        stringless: if True, .string is not serialized and must be supplied to load
+        full_tree: if True, the entire tree containing ito is serialized, along with
+            the path to ito; otherwise only ito itself is serialized, without its
+            descendants, as for Ito.JsonEncoder
+    """
+    if not isinstance(ito, Ito):
+        raise Errors.parameter_invalid_type('ito', ito, Ito)
+
+    basis = ito.get_root() if full_tree else ito
+
+    path: list[int] = []
+    cur = ito
+    while cur is not basis:
+        parent = cur.parent
+        path.append(parent.children.index(cur))
+        cur = parent
+    path.reverse()
+
+    descs: dict[str, int] = {}
+    child_counts: list[int] = []
+    desc_idxs: list[int] = []
+    start_deltas: list[int] = []
+    lengths: list[int] = []
+
+    last_start = 0
+    stack = [basis]
+    while len(stack) > 0:
+        node = stack.pop()
+        children = node.children
+        child_counts.append(len(children) if full_tree else 0)
+        if (desc := node.desc) is None:
+            desc_idxs.append(0)
+        elif (i := descs.get(desc)) is not None:
+            desc_idxs.append(i)
+        else:
+            i = descs[desc] = len(descs) + 1
+            desc_idxs.append(i)
+        start, stop = node.span
+        start_deltas.append(start - last_start)
+        lengths.append(stop - start)
+        last_start = start
+        if full_tree:
+            stack.extend(reversed(children))
+
+    fs.write(MAGIC)
+    fs.write(bytes((FORMAT_VERSION, 0 if stringless else _FLAG_STRING)))
+    if not stringless:
+        _write_str(fs, basis.string)
+
+    _write_uvarint(fs, len(descs))
+    for desc in descs:
+        _write_str(fs, desc)
+
+    _write_uvarint(fs, len(child_counts))
+    for col in child_counts, desc_idxs, start_deltas, lengths:
+        _write_column(fs, col)
+
+    _write_uvarint(fs, len(path))
+    for i in path:
+        _write_uvarint(fs, i)
+
+
+def dumps(ito: Ito, stringless: bool = False, full_tree: bool = True) -> bytes:
+    with io.BytesIO() as fs:
+        dump(fs, ito, stringless, full_tree)
+        return fs.getvalue()
+
+
+def load(fs: typing.BinaryIO, string: str | None = None) -> Ito:
+    """Deserializes an Ito from a binary stream
+
+    Args:
+        fs: a readable binary file-like object, positioned at the start of a record
+        string: the .string for stringless data; ignored if the data contains a string
+
+    Returns:
+        The serialized Ito; if the tree was serialized, the Ito is part of a fully
+        reconstituted tree
+    """
+    if _read_exactly(fs, len(MAGIC)) != MAGIC:
+        raise ValueError('data is not binary Ito data')
+
+    version, flags = _read_exactly(fs, 2)
+    if version != FORMAT_VERSION:
+        raise ValueError(f'unsupported binary Ito format version {version}')
+
+    if flags & _FLAG_STRING:
+        s = _read_str(fs)
+    elif string is None:
+        raise ValueError('You must provide a value for parameter "string" when deserializing stringless Ito data.')
+    else:
+        s = string
+    len_s = len(s)
+
+    descs: list[str | None] = [None]
+    descs.extend(_read_str(fs) for i in range(_read_uvarint(fs)))
+
+    count = _read_uvarint(fs)
+    if count == 0:
+        raise ValueError('binary Ito data contains no nodes')
+    child_counts, desc_idxs, start_deltas, lengths = (_read_column(fs, count) for i in range(4))
+
+    with _gc_paused():
+        start = 0
+        itos: list[Ito] = []
+        for i in range(count):
+            start += start_deltas[i]
+            stop = start + lengths[i]
+            if stop > len_s:
+                raise ValueError(f'span ({start}, {stop}) exceeds length of string')
+            itos.append(Ito._from_trusted(s, start, stop, descs[desc_idxs[i]]))
+
+        # Rebuild hierarchy from pre-order child counts; each node's children are validated and
+        # attached in bulk once all of them have been read
+        stack: list[list] = []  # [ito, remaining child count, children]
+        for ito, child_count in zip(itos, child_counts):
+            if len(stack) > 0:
+                frame = stack[-1]
+                frame[2].append(ito)
+                frame[1] -= 1
+                if frame[1] == 0:
+                    frame[0].children._add_ordered(*frame[2])
+                    stack.pop()
+            elif ito is not itos[0]:
+                raise ValueError('binary Ito data contains inconsistent child counts')
+            if child_count > 0:
+                stack.append([ito, child_count, []])
+
+    if len(stack) > 0:
+        raise ValueError('binary Ito data contains inconsistent child counts')
+
+    rv = itos[0]
+    for i in range(_read_uvarint(fs)):
+        rv = rv.children[_read_uvarint(fs)]
+    return rv
+
+
+def loads(data: bytes, string: str | None = None) -> Ito:
+    with io.BytesIO(data) as fs:
+        return load(fs, string)
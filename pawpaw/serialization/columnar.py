@@ -0,0 +1,128 @@
+"""Columnar export of Ito trees
+
+Flattens one or more Ito trees into a table having one row per Ito, built in a single pre-order
+traversal.  Integer columns are array.array objects, which support the buffer protocol, so they
+can be shared with other libraries (e.g., via memoryview) without copying.  The desc column is
+dictionary encoded: desc_index holds indices into descs.
+
+Columns:
+    doc_id      index of the tree (or the value supplied in doc_ids) the row belongs to
+    node_id     row number, unique across the table
+    parent_id   node_id of the parent row, or -1 for a tree's root
+    depth       0 for a tree's root, 1 for its children, etc.
+    desc_index  index into descs; descs[0] is always None
+    start       Ito start
+    stop        Ito stop
+    substr      Ito substring; only present if requested
+"""
+from __future__ import annotations
+import array
+import dataclasses
+import typing
+
+from pawpaw import Ito, Errors
+
+
+@dataclasses.dataclass
+class Columns:
+    doc_id: array.array = dataclasses.field(default_factory=lambda: array.array('q'))
+    node_id: array.array = dataclasses.field(default_factory=lambda: array.array('q'))
+    parent_id: array.array = dataclasses.field(default_factory=lambda: array.array('q'))
+    depth: array.array = dataclasses.field(default_factory=lambda: array.array('L'))
+    desc_index: array.array = dataclasses.field(default_factory=lambda: array.array('L'))
+    start: array.array = dataclasses.field(default_factory=lambda: array.array('q'))
+    stop: array.array = dataclasses.field(default_factory=lambda: array.array('q'))
+    descs: list[str | None] = dataclasses.field(default_factory=lambda: [None])
+    substr: list[str] | None = None
+
+    NAMES: typing.ClassVar[tuple[str, ...]] = ('doc_id', 'node_id', 'parent_id', 'depth', 'desc', 'start', 'stop', 'substr')
+
+    def __len__(self) -> int:
+        return len(self.node_id)
+
+    @property
+    def desc(self) -> list[str | None]:
+        """Decoded desc column"""
+        descs = self.descs
+        return [descs[i] for i in self.desc_index]
+
+    def to_dict(self) -> dict[str, typing.Sequence]:
+        """Returns a mapping of column name to column, with desc decoded; substr is included only if present"""
+        rv = {}
+        for name in self.NAMES:
+            if name == 'desc':
+                rv[name] = self.desc
+            elif name != 'substr' or self.substr is not None:
+                rv[name] = getattr(self, name)
+        return rv
+
+    def to_pandas(self) -> typing.Any:
+        """Returns a pandas.DataFrame; desc is a categorical column
+
+        Raises:
+            ImportError: pandas is not installed
+        """
+        try:
+            import pandas
+        except ImportError as e:
+            raise ImportError('Columns.to_pandas requires pandas, which is not installed') from e
+
+        data = self.to_dict()
+        data['desc'] = pandas.Categorical(data['desc'])
+        return pandas.DataFrame(data)
+
+
+def to_columns(*itos: Ito, substr: bool = False, doc_ids: typing.Sequence[int] | None = None) -> Columns:
+    """Flattens Ito trees into columns in a single traversal
+
+    Args:
+        itos: the roots of the trees to export; each Ito and all of its descendants are exported
+        substr: if True, a substring column is included
+        doc_ids: values for the doc_id column, one per Ito; if None, the position of each Ito in itos is used
+
+    Returns:
+        A Columns table, with rows in pre-order, tree by tree
+    """
+    if doc_ids is not None and len(doc_ids) != len(itos):
+        raise ValueError('parameter \'doc_ids\' must have the same length as parameter \'itos\'')
+
+    rv = Columns(substr=[] if substr else None)
+    desc_idxs: dict[str | None, int] = {None: 0}
+
+    # Local aliases avoid attribute lookups per row
+    doc_id_append = rv.doc_id.append
+    parent_id_append = rv.parent_id.append
+    depth_append = rv.depth.append
+    desc_index_append = rv.desc_index.append
+    start_append = rv.start.append
+    stop_append = rv.stop.append
+    substr_append = rv.substr.append if substr else None
+
+    row = 0
+    for i, ito in enumerate(itos):
+        if not isinstance(ito, Ito):
+            raise Errors.parameter_iterable_contains_invalid_type('itos', ito, Ito)
+        doc_id = i if doc_ids is None else doc_ids[i]
+
+        stack: list[tuple[Ito, int, int]] = [(ito, -1, 0)]  # (ito, parent row, depth)
+        while len(stack) > 0:
+            node, parent, depth = stack.pop()
+            doc_id_append(doc_id)
+            parent_id_append(parent)
+            depth_append(depth)
+            if (d := desc_idxs.get(node.desc)) is None:
+                d = desc_idxs[node.desc] = len(desc_idxs)
+                rv.descs.append(node.desc)
+            desc_index_append(d)
+            start, stop = node.span
+            start_append(start)
+            stop_append(stop)
+            if substr_append is not None:
+                substr_append(node.string[start:stop])
+
+            depth += 1
+            stack.extend((c, row, depth) for c in reversed(node.children))
+            row += 1
+
+    rv.node_id.extend(range(row))
+    return rv
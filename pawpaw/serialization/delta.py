@@ -0,0 +1,221 @@
+"""Delta-encoded serialization of Ito trees relative to a prior version of the same document
+
+A Delta records how to rebuild a new tree from a base tree: the edited region of the string,
+plus the nodes that cannot be derived from the base tree.  Base nodes entirely before the edit
+are reused as-is, and base nodes entirely after it are reused with their spans shifted by the
+change in length, so the size of a Delta is proportional to the size of the edit, rather than to
+the size of the document.
+
+The string edit is the single region between the common prefix and common suffix of the two
+strings.  Trees are compared as pre-order sequences of (depth, start, stop, desc) nodes; the nodes
+between the longest matching leading and trailing runs are stored literally.  Several distant
+edits are therefore stored as one region spanning all of them.
+"""
+from __future__ import annotations
+import dataclasses
+import json
+import typing
+import zlib
+
+from pawpaw import Ito, Errors
+
+
+_Node = typing.Tuple[int, int, int, typing.Optional[str]]  # (depth, start, stop, desc)
+
+
+def _crc(string: str) -> int:
+    return zlib.crc32(string.encode('utf-8', 'surrogatepass'))
+
+
+def _common_prefix_len(a: str, b: str) -> int:
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:  # binary search over slice comparisons, which run in C
+        mid = (lo + hi + 1) // 2
+        if a[lo:mid] == b[lo:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _common_suffix_len(a: str, b: str, limit: int) -> int:
+    lo, hi = 0, limit
+    len_a, len_b = len(a), len(b)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[len_a - mid:len_a - lo] == b[len_b - mid:len_b - lo]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _nodes(ito: Ito) -> list[_Node]:
+    rv = []
+    stack = [(ito, 0)]
+    while len(stack) > 0:
+        node, depth = stack.pop()
+        rv.append((depth, node.start, node.stop, node.desc))
+        depth += 1
+        stack.extend((c, depth) for c in reversed(node.children))
+    return rv
+
+
+def _shifted(nodes: list[_Node], prefix: int, suffix_start: int, shift: int) -> list[_Node | None]:
+    """Maps base nodes into new string coordinates; nodes with an index inside the edit map to None
+
+    At an insertion point, starts are treated as following the edit, and stops as preceding it.
+    """
+    rv = []
+    for depth, start, stop, desc in nodes:
+        if start >= suffix_start:
+            start += shift
+        elif start <= prefix:
+            pass
+        else:
+            rv.append(None)
+            continue
+
+        if stop <= prefix:
+            pass
+        elif stop >= suffix_start:
+            stop += shift
+        else:
+            rv.append(None)
+            continue
+
+        rv.append((depth, start, stop, desc))
+    return rv
+
+
+@dataclasses.dataclass
+class Delta:
+    base_length: int
+    base_crc: int
+    base_node_count: int
+    prefix: int
+    """Length of the string prefix common to base and new"""
+    removed: int
+    """Number of chars of the base string removed after prefix"""
+    inserted: str
+    """Text inserted after prefix"""
+    node_prefix: int
+    """Number of leading pre-order base nodes reused"""
+    node_suffix: int
+    """Number of trailing pre-order base nodes reused"""
+    nodes: list[_Node] = dataclasses.field(default_factory=list)
+    """Pre-order (depth, start, stop, desc) nodes between the reused runs"""
+
+    def to_dict(self) -> dict[str, typing.Any]:
+        return dataclasses.asdict(self)
+
+    @classmethod
+    def from_dict(cls, obj: dict[str, typing.Any]) -> Delta:
+        obj = dict(obj)
+        obj['nodes'] = [tuple(n) for n in obj['nodes']]
+        return cls(**obj)
+
+
+def diff(base: Ito, new: Ito) -> Delta:
+    """Encodes new, along with its descendants, relative to base, along with its descendants"""
+    if not isinstance(base, Ito):
+        raise Errors.parameter_invalid_type('base', base, Ito)
+    if not isinstance(new, Ito):
+        raise Errors.parameter_invalid_type('new', new, Ito)
+
+    s_base, s_new = base.string, new.string
+    prefix = _common_prefix_len(s_base, s_new)
+    suffix = _common_suffix_len(s_base, s_new, min(len(s_base), len(s_new)) - prefix)
+    suffix_start = len(s_base) - suffix
+
+    base_nodes = _nodes(base)
+    mapped = _shifted(base_nodes, prefix, suffix_start, len(s_new) - len(s_base))
+    new_nodes = _nodes(new)
+
+    limit = min(len(mapped), len(new_nodes))
+    node_prefix = 0
+    while node_prefix < limit and mapped[node_prefix] == new_nodes[node_prefix]:
+        node_prefix += 1
+    node_suffix = 0
+    while node_suffix < limit - node_prefix and mapped[-1 - node_suffix] == new_nodes[-1 - node_suffix]:
+        node_suffix += 1
+
+    return Delta(
+        base_length=len(s_base),
+        base_crc=_crc(s_base),
+        base_node_count=len(base_nodes),
+        prefix=prefix,
+        removed=suffix_start - prefix,
+        inserted=s_new[prefix:len(s_new) - suffix],
+        node_prefix=node_prefix,
+        node_suffix=node_suffix,
+        nodes=new_nodes[node_prefix:len(new_nodes) - node_suffix]
+    )
+
+
+def _build(string: str, nodes: typing.Iterable[_Node]) -> Ito:
+    root: Ito | None = None
+    stack: list[tuple[Ito, list[Ito]]] = []  # (ito, children) for the current ancestry
+    for depth, start, stop, desc in nodes:
+        ito = Ito._from_trusted(string, start, stop, desc)
+        if root is None:
+            if depth != 0 or not 0 <= start <= stop <= len(string):
+                raise ValueError('delta produces an invalid root')
+            root = ito
+        else:
+            if not 0 < depth <= len(stack):
+                raise ValueError('delta produces an invalid hierarchy')
+            while len(stack) > depth:
+                parent, children = stack.pop()
+                parent.children._add_ordered(*children)
+            stack[-1][1].append(ito)
+        stack.append((ito, []))
+
+    if root is None:
+        raise ValueError('delta produces no nodes')
+    while len(stack) > 0:
+        parent, children = stack.pop()
+        parent.children._add_ordered(*children)
+    return root
+
+
+def apply(base: Ito, *deltas: Delta) -> Ito:
+    """Rebuilds a tree by applying deltas, in order, starting from base
+
+    Raises:
+        ValueError: a delta was not created relative to the tree it is applied to
+    """
+    if not isinstance(base, Ito):
+        raise Errors.parameter_invalid_type('base', base, Ito)
+
+    rv = base
+    for delta in deltas:
+        s_base = rv.string
+        if len(s_base) != delta.base_length or _crc(s_base) != delta.base_crc:
+            raise ValueError('delta was created from a different base string')
+        base_nodes = _nodes(rv)
+        if len(base_nodes) != delta.base_node_count:
+            raise ValueError('delta was created from a different base tree')
+
+        suffix_start = delta.prefix + delta.removed
+        s_new = s_base[:delta.prefix] + delta.inserted + s_base[suffix_start:]
+        mapped = _shifted(base_nodes, delta.prefix, suffix_start, len(s_new) - len(s_base))
+        reused = mapped[:delta.node_prefix] + mapped[len(mapped) - delta.node_suffix:]
+        if None in reused:
+            raise ValueError('delta reuses base nodes that overlap the edit')
+
+        rv = _build(s_new, [
+            *mapped[:delta.node_prefix],
+            *delta.nodes,
+            *mapped[len(mapped) - delta.node_suffix:]
+        ])
+    return rv
+
+
+def dumps(delta: Delta) -> str:
+    """Serializes a Delta to compact JSON"""
+    return json.dumps(delta.to_dict(), separators=(',', ':'))
+
+
+def loads(data: str) -> Delta:
+    return Delta.from_dict(json.loads(data))
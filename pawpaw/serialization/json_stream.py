@@ -0,0 +1,388 @@
+"""Streaming JSON serialization for Ito trees
+
+Output is identical to ``json.dumps(ito, cls=Ito.JsonEncoder, ...)``, but is written to a text
+stream in chunks during an iterative traversal, rather than first being built as nested dicts.
+Likewise, load reads a text stream in chunks and builds the tree as it is parsed, rather than
+first decoding the entire document into dicts and lists.  Neither direction recurses, so tree
+depth is not limited by the interpreter's recursion limit.
+"""
+from __future__ import annotations
+import io
+import json
+import json.decoder
+import json.encoder
+import typing
+
+import regex
+
+import pawpaw
+from pawpaw import Ito, Span, Errors
+
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+
+# region encode
+
+def _newline(indent: str | None, level: int) -> str:
+    return '' if indent is None else '\n' + indent * level
+
+
+def dump(
+        fs: typing.TextIO,
+        ito: Ito,
+        stringless: bool = False,
+        full_tree: bool = True,
+        indent: int | str | None = None,
+        separators: typing.Tuple[str, str] | None = None,
+        ensure_ascii: bool = True,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> None:
+    """Serializes an Ito to a text stream in the format written by Ito.JsonEncoder
+
+    Args:
+        fs: a writable text file-like object
+        ito: the Ito to serialize
+        stringless: if True, .string is not serialized and must be supplied to load
+        full_tree: if True, the entire tree containing ito is serialized, otherwise
+            only ito itself is serialized
+        indent: as for json.dumps
+        separators: as for json.dumps
+        ensure_ascii: as for json.dumps
+        chunk_size: approximate number of chars buffered between writes to fs
+    """
+    if not isinstance(ito, Ito):
+        raise Errors.parameter_invalid_type('ito', ito, Ito)
+
+    if indent is not None and not isinstance(indent, str):
+        indent = ' ' * indent
+    if separators is None:
+        item_sep, key_sep = (', ', ': ') if indent is None else (',', ': ')
+    else:
+        item_sep, key_sep = separators
+    enc_str = json.encoder.encode_basestring_ascii if ensure_ascii else json.encoder.encode_basestring
+
+    buf: list[str] = []
+    buf_len = 0
+
+    def write(*parts: str) -> None:
+        nonlocal buf_len
+        buf.extend(parts)
+        buf_len += sum(len(p) for p in parts)
+        if buf_len >= chunk_size:
+            fs.write(''.join(buf))
+            buf.clear()
+            buf_len = 0
+
+    def key(name: str, level: int, first: bool = False) -> str:
+        return ('' if first else item_sep) + _newline(indent, level) + enc_str(name) + key_sep
+
+    def write_head(node: Ito, level: int) -> None:
+        start, stop = node._span
+        write(
+            '{',
+            key('span', level + 1, True),
+            '[', _newline(indent, level + 2), str(start), item_sep, _newline(indent, level + 2), str(stop),
+            _newline(indent, level + 1), ']',
+            key('desc', level + 1),
+            'null' if node.desc is None else enc_str(node.desc)
+        )
+
+    if full_tree:
+        basis = ito.get_root()
+        path = ito.path
+    else:
+        basis = ito
+        path = '.'
+
+    write('{', key('__type__', 1, True), enc_str(Ito.JsonEncoder()._js_type_value))
+    write(key('__version__', 1), enc_str(pawpaw.__version__))
+    if not stringless:
+        write(key('string', 1), enc_str(basis.string))
+    write(key('path', 1), enc_str(path))
+    write(key('ito', 1))
+
+    # Iterative pre-order traversal; each frame is [children, next index, level of parent]
+    stack: list[list] = []
+    node, level = basis, 1
+    while True:
+        if node is not None:
+            write_head(node, level)
+            if not full_tree:
+                write(_newline(indent, level), '}')
+            elif len(children := node.children) == 0:
+                write(key('children', level + 1), '[]', _newline(indent, level), '}')
+            else:
+                write(key('children', level + 1), '[')
+                stack.append([children, 0, level])
+
+        if len(stack) == 0:
+            break
+
+        frame = stack[-1]
+        children, i, level = frame
+        if i < len(children):
+            frame[1] = i + 1
+            write('' if i == 0 else item_sep, _newline(indent, level + 2))
+            node, level = children[i], level + 2
+        else:
+            stack.pop()
+            write(_newline(indent, level + 1), ']', _newline(indent, level), '}')
+            node = None
+
+    write(_newline(indent, 0), '}')
+    fs.write(''.join(buf))
+
+
+def dumps(ito: Ito, stringless: bool = False, full_tree: bool = True, **kwargs) -> str:
+    with io.StringIO() as fs:
+        dump(fs, ito, stringless, full_tree, **kwargs)
+        return fs.getvalue()
+
+# endregion
+
+
+# region decode
+
+class _Reader:
+    _re_ws = regex.compile(r'[ \t\n\r]*', regex.DOTALL)
+    _re_number = regex.compile(r'(-?(?:0|[1-9]\d*))(\.\d+)?([eE][-+]?\d+)?', regex.DOTALL)
+    _literals = {'true': True, 'false': False, 'null': None}
+
+    def __init__(self, fs: typing.TextIO, chunk_size: int):
+        self._fs = fs
+        self._chunk_size = chunk_size
+        self._buf = ''
+        self._pos = 0
+
+    def _fill(self) -> bool:
+        # Read size grows with unconsumed data so that long tokens are assembled in linear time
+        chunk = self._fs.read(max(self._chunk_size, len(self._buf) - self._pos))
+        if not chunk:
+            return False
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _error(self, msg: str) -> ValueError:
+        return ValueError(f'invalid JSON Ito data: {msg}')
+
+    def peek(self) -> str:
+        """Skips whitespace and returns the next char, or '' at end of stream"""
+        while True:
+            self._pos = self._re_ws.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char: str) -> None:
+        if (c := self.peek()) != char:
+            raise self._error(f'expected {char!r}, found {c or "end of data"!r}')
+        self._pos += 1
+
+    def accept(self, char: str) -> bool:
+        if self.peek() == char:
+            self._pos += 1
+            return True
+        return False
+
+    def read_str(self) -> str:
+        if self.peek() != '"':
+            raise self._error('expected string')
+
+        # Locate unescaped closing quote before decoding, refilling as needed
+        i = self._pos + 1
+        while True:
+            j = self._buf.find('"', i)
+            if j < 0:
+                i = len(self._buf) - self._pos
+                if not self._fill():
+                    raise self._error('unterminated string')
+                i += self._pos
+                continue
+            k = j
+            while self._buf[k - 1] == '\\':
+                k -= 1
+            if (j - k) % 2 == 0:
+                break
+            i = j + 1
+
+        try:
+            rv, self._pos = json.decoder.scanstring(self._buf, self._pos + 1, True)
+        except json.JSONDecodeError as e:
+            raise self._error(e.msg) from e
+        return rv
+
+    def read_number(self) -> int | float:
+        self.peek()
+        while True:
+            m = self._re_number.match(self._buf, self._pos)
+            at_end = len(self._buf) - self._pos < 2 if m is None else m.end() == len(self._buf)
+            if not (at_end and self._fill()):
+                break
+        if m is None:
+            raise self._error(f'unexpected char {self._buf[self._pos]!r}')
+        self._pos = m.end()
+        return int(m.group(1)) if m.group(2) is None and m.group(3) is None else float(m.group(0))
+
+    def read_value(self) -> typing.Any:
+        """Reads an arbitrary value; used only for small, non-Ito values"""
+        c = self.peek()
+        if c == '"':
+            return self.read_str()
+        if c == '{':
+            self._pos += 1
+            rv = {}
+            if not self.accept('}'):
+                while True:
+                    k = self.read_str()
+                    self.expect(':')
+                    rv[k] = self.read_value()
+                    if self.accept('}'):
+                        break
+                    self.expect(',')
+            return rv
+        if c == '[':
+            self._pos += 1
+            rv = []
+            if not self.accept(']'):
+                while True:
+                    rv.append(self.read_value())
+                    if self.accept(']'):
+                        break
+                    self.expect(',')
+            return rv
+        if c.isalpha():
+            while len(self._buf) - self._pos < 5 and self._fill():
+                pass
+            for literal, value in self._literals.items():
+                if self._buf.startswith(literal, self._pos):
+                    self._pos += len(literal)
+                    return value
+            raise self._error(f'unexpected char {c!r}')
+        if c == '':
+            raise self._error('unexpected end of data')
+        return self.read_number()
+
+
+def _read_members(reader: _Reader, first: bool) -> typing.Tuple[Span | None, str | None, bool, bool]:
+    """Reads Ito members up to and including either the end of the object or the opening of
+    the children list
+
+    Returns:
+        (span, desc, has_desc, has_children)
+    """
+    span = desc = None
+    has_desc = False
+    while not reader.accept('}'):
+        if not first:
+            reader.expect(',')
+        first = False
+        k = reader.read_str()
+        reader.expect(':')
+        if k == 'children':
+            reader.expect('[')
+            return span, desc, has_desc, True
+        v = reader.read_value()
+        if k == 'span':
+            if not (isinstance(v, list) and len(v) == 2 and all(type(i) is int for i in v)):
+                raise reader._error(f'invalid span {v!r}')
+            span = Span(*v)
+        elif k == 'desc':
+            if not (v is None or isinstance(v, str)):
+                raise reader._error(f'invalid desc {v!r}')
+            desc = v
+            has_desc = True
+    return span, desc, has_desc, False
+
+
+def _read_ito(reader: _Reader, string: str) -> Ito:
+    reader.expect('{')
+    root: Ito | None = None
+    stack: list[Ito] = []  # Itos whose children are being read
+    while True:
+        span, desc, has_desc, has_children = _read_members(reader, True)
+        if span is None:
+            raise reader._error('Ito is missing "span"')
+        ito = Ito(string, *span, desc=desc)
+        if root is None:
+            root = ito
+        else:
+            stack[-1].children._add_ordered(ito)
+
+        if has_children:
+            if not reader.accept(']'):
+                stack.append(ito)
+                reader.expect('{')
+                continue
+            if _read_members(reader, False) != (None, None, False, False):
+                raise reader._error('"children" must be the last member of an Ito')
+
+        # Current Ito is complete: move to next sibling, or close completed parents
+        while len(stack) > 0:
+            if reader.accept(','):
+                reader.expect('{')
+                break
+            reader.expect(']')
+            stack.pop()
+            if _read_members(reader, False) != (None, None, False, False):
+                raise reader._error('"children" must be the last member of an Ito')
+        else:
+            return root
+
+
+def load(fs: typing.TextIO, string: str | None = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Ito:
+    """Deserializes an Ito from a text stream in the format written by Ito.JsonEncoder
+
+    The stream is read in chunks, and the tree is built as it is parsed.  The "string" and
+    "path" members must precede the "ito" member, as written by Ito.JsonEncoder and dump.
+
+    Args:
+        fs: a readable text file-like object, positioned at the start of the JSON object
+        string: the .string for stringless data; ignored if the data contains a string
+        chunk_size: approximate number of chars read from fs at a time
+
+    Returns:
+        The serialized Ito; if the tree was serialized, the Ito is part of a fully
+        reconstituted tree
+    """
+    reader = _Reader(fs, chunk_size)
+    header: dict[str, typing.Any] = {}
+    root: Ito | None = None
+
+    reader.expect('{')
+    first = True
+    while not reader.accept('}'):
+        if not first:
+            reader.expect(',')
+        first = False
+        k = reader.read_str()
+        reader.expect(':')
+        if k != 'ito':
+            header[k] = reader.read_value()
+            continue
+
+        if header.get('__type__') != Ito.JsonEncoder()._js_type_value:
+            raise reader._error(f'"__type__" must precede "ito" and be {Ito.JsonEncoder()._js_type_value!r}')
+        if header.get('__version__') != pawpaw.__version__:
+            raise ValueError(f'unsupported JSON Ito data version {header.get("__version__")!r}')
+        if (s := header.get('string')) is None:
+            if string is None:
+                raise ValueError('You must provide a value for parameter "string" when deserializing stringless Ito data.')
+            s = string
+        root = _read_ito(reader, s)
+
+    if root is None:
+        raise reader._error('missing "ito"')
+    if reader.peek() != '':
+        raise reader._error('extra data after JSON object')
+
+    return Ito.JsonDecoderHook(trusted=True)._resolve_path(root, header.get('path', '.'))
+
+
+def loads(data: str, string: str | None = None) -> Ito:
+    with io.StringIO(data) as fs:
+        return load(fs, string)
+
+# endregion
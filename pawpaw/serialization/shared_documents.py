@@ -0,0 +1,141 @@
+"""Shared-memory document registry for multi-process pipelines
+
+A parent process registers document strings with a SharedDocuments registry, which stores each
+one in a named multiprocessing.shared_memory block.  Workers receive only the (short) block name,
+and load the string with get_string, which decodes each block once per worker process.  Itos that
+workers create reference that single string, and are returned to the parent as compact span
+tables, which the parent attaches onto its own Ito tree.
+
+Example:
+
+    def worker(name: str, start: int, stop: int) -> list:
+        sentence = Ito(shared_documents.get_string(name), start, stop)
+        ...  # build sentence subtree
+        return shared_documents.to_span_tables(*sentence.children)
+
+    with shared_documents.SharedDocuments() as docs, ProcessPoolExecutor() as executor:
+        name = docs.register(doc.string)
+        futures = [executor.submit(worker, name, *s.span) for s in doc.children]
+        for sentence, future in zip(doc.children, futures):
+            shared_documents.attach(sentence, future.result())
+"""
+from __future__ import annotations
+import functools
+import sys
+import typing
+from multiprocessing import shared_memory
+
+from pawpaw import Ito, Errors
+
+
+_ENCODING = 'utf-8'
+_ERRORS = 'surrogatepass'  # Python strs may contain lone surrogates
+_HEADER_SIZE = 8  # byte count of encoded string; blocks may be larger than requested
+
+_attach_kwargs = {'track': False} if sys.version_info >= (3, 13) else {}
+
+
+class SharedDocuments:
+    """Registry of document strings held in shared memory; owned by the parent process
+
+    Blocks are unlinked when the registry is closed, so workers must be done with them by then.
+    """
+
+    def __init__(self):
+        self._blocks: dict[str, shared_memory.SharedMemory] = {}
+
+    def __enter__(self) -> SharedDocuments:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._blocks
+
+    def register(self, string: str) -> str:
+        """Copies string into a new shared memory block
+
+        Returns:
+            the block name, which workers pass to get_string
+        """
+        if not isinstance(string, str):
+            raise Errors.parameter_invalid_type('string', string, str)
+
+        data = string.encode(_ENCODING, _ERRORS)
+        shm = shared_memory.SharedMemory(create=True, size=_HEADER_SIZE + max(1, len(data)))
+        shm.buf[:_HEADER_SIZE] = len(data).to_bytes(_HEADER_SIZE, 'little')
+        shm.buf[_HEADER_SIZE:_HEADER_SIZE + len(data)] = data
+        self._blocks[shm.name] = shm
+        return shm.name
+
+    def unregister(self, name: str) -> None:
+        """Releases and unlinks a block"""
+        if (shm := self._blocks.pop(name, None)) is None:
+            raise KeyError(name)
+        shm.close()
+        shm.unlink()
+
+    def close(self) -> None:
+        """Releases and unlinks all blocks"""
+        while len(self._blocks) > 0:
+            self.unregister(next(iter(self._blocks)))
+
+
+@functools.lru_cache(maxsize=16)
+def get_string(name: str) -> str:
+    """Returns the document string held in a shared memory block
+
+    The block is decoded once per process, and the same str is returned for later calls, so Itos
+    a worker creates across many tasks all reference a single string.
+    """
+    shm = shared_memory.SharedMemory(name=name, **_attach_kwargs)
+    try:
+        size = int.from_bytes(shm.buf[:_HEADER_SIZE], 'little')
+        with shm.buf[_HEADER_SIZE:_HEADER_SIZE + size] as data:
+            return str(data, _ENCODING, _ERRORS)
+    finally:
+        shm.close()
+
+
+def to_span_tables(*itos: Ito) -> list[tuple]:
+    """Converts Itos, along with their descendants, to span tables
+
+    Span tables are compact and cheap to pickle, and do not include the string.
+    """
+    rv = []
+    for ito in itos:
+        if not isinstance(ito, Ito):
+            raise Errors.parameter_iterable_contains_invalid_type('itos', ito, Ito)
+        if (table := ito._to_span_table()) is None:
+            raise ValueError('parameter \'itos\' has element with Ito subclass nodes, which span tables do not support')
+        rv.append(table)
+    return rv
+
+
+def from_span_tables(string: str, tables: typing.Iterable[tuple]) -> list[Ito]:
+    """Rebuilds Itos, along with their descendants, from span tables over string"""
+    rv = []
+    for table in tables:
+        ito = Ito._from_span_table(string, *table)
+        if not 0 <= ito.start <= ito.stop <= len(string):
+            raise ValueError(f'span table has span {ito.span} that is not within string')
+        rv.append(ito)
+    return rv
+
+
+def attach(parent: Ito, tables: typing.Iterable[tuple]) -> list[Ito]:
+    """Rebuilds Itos from span tables over parent.string, and adds them to parent's children
+
+    Returns:
+        The Itos added to parent
+    """
+    if not isinstance(parent, Ito):
+        raise Errors.parameter_invalid_type('parent', parent, Ito)
+
+    rv = from_span_tables(parent.string, tables)
+    parent.children.add(*rv)
+    return rv
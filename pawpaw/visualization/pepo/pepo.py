@@ -1,6 +1,3 @@
-import sys
-# Force Python XML parser, not faster C version so that we can hook methods
-sys.modules['_elementtree'] = None
 import abc
 import json
 import io
@@ -12,22 +9,47 @@ import pawpaw
 from pawpaw.visualization import ascii_box
 
 
+class _Indents(list):
+    """Indent strings by level, computed once per level"""
+    def __init__(self, indent: str):
+        super().__init__([''])
+        self.indent = indent
+
+    def __getitem__(self, level: int) -> str:
+        while len(self) <= level:
+            self.append(super().__getitem__(-1) + self.indent)
+        return super().__getitem__(level)
+
+
 class Pepo(abc.ABC):
+    CHUNK_SIZE = 1 << 16
+    """Approximate number of chars buffered between writes by dump"""
+
     def __init__(self, indent: str = '    ', children: bool = True):
         self.linesep: str = os.linesep
         self.indent: str = indent
         self.children = children
 
-
     @abc.abstractmethod
-    def dump(self, fs: typing.IO, *itos: pawpaw.Ito) -> None:
+    def _iter_parts(self, *itos: pawpaw.Ito) -> typing.Iterable[str]:
+        """Yields the output as a sequence of strs, usually one per Ito, using an iterative traversal"""
         ...
 
+    def dump(self, fs: typing.IO, *itos: pawpaw.Ito) -> None:
+        buf: list[str] = []
+        size = 0
+        for part in self._iter_parts(*itos):
+            buf.append(part)
+            size += len(part)
+            if size >= self.CHUNK_SIZE:
+                fs.write(''.join(buf))
+                buf.clear()
+                size = 0
+        if len(buf) > 0:
+            fs.write(''.join(buf))
+
     def dumps(self, *itos: pawpaw.Ito) -> str:
-        with io.StringIO() as fs:
-            self.dump(fs, *itos)
-            fs.seek(0)
-            return fs.read()
+        return ''.join(self._iter_parts(*itos))
 
 
 class _PepoFstr(Pepo):
@@ -36,24 +58,46 @@ class _PepoFstr(Pepo):
         self.fstr = fstr
 
 
+class _PepoSubstr(Pepo):
+    def __init__(self, indent: str = '    ', children: bool = True, max_substr: int | None = None):
+        """
+        Args:
+            max_substr: if not None, substrings longer than this are truncated and suffixed with '…'
+        """
+        super().__init__(indent, children)
+        if max_substr is not None and max_substr < 0:
+            raise ValueError('parameter \'max_substr\' must be non-negative')
+        self.max_substr = max_substr
+
+    def _substr(self, ito: pawpaw.Ito) -> str:
+        start, stop = ito.span
+        if self.max_substr is not None and stop - start > self.max_substr:
+            return ito.string[start:start + self.max_substr] + '…'
+        return ito.string[start:stop]
+
+
 class Compact(_PepoFstr):
     def __init__(self, indent: str = '    ', children: bool = True):
         super().__init__(indent, children, '%span %desc!r : \'%substr!1r1:40…% \'')
         self.children = children
 
-    def _dump(self, fs: typing.IO, ei: pawpaw.Types.C_EITO, level: int = 0) -> None:
-        fs.write(f'{self.indent * level}{ei.index:,}: {ei.ito:{self.fstr}}{self.linesep}')
+    def _iter_parts(self, *itos: pawpaw.Ito) -> typing.Iterable[str]:
+        indents = _Indents(self.indent)
+        fstr = self.fstr
+        linesep = self.linesep
+        for i, ito in enumerate(itos, start=1):
+            if not isinstance(ito, pawpaw.Ito):
+                raise pawpaw.Errors.parameter_iterable_contains_invalid_type('itos', ito, pawpaw.Ito)
 
-        if self.children:
-            level += 1
-            for eic in (pawpaw.Types.C_EITO(i, ito) for i, ito in enumerate(ei.ito.children, start=1)):
-                self._dump(fs, eic, level)
-
-    def dump(self, fs: typing.IO, *itos: pawpaw.Ito) -> None:
-        for ei in (pawpaw.Types.C_EITO(i, ito) for i, ito in enumerate(itos, start=1)):
-            if not isinstance(ei.ito, pawpaw.Ito):
-                raise pawpaw.Errors.parameter_iterable_contains_invalid_type('itos', ei.ito, pawpaw.Ito)
-            self._dump(fs, ei)
+            stack = [iter(((i, ito),))]  # enumerated siblings, one iterator per level
+            while len(stack) > 0:
+                for index, node in stack[-1]:
+                    yield f'{indents[len(stack) - 1]}{index:,}: {node:{fstr}}{linesep}'
+                    if self.children and len(node.children) > 0:
+                        stack.append(enumerate(node.children, start=1))
+                        break
+                else:
+                    stack.pop()
 
 
 class Tree(_PepoFstr):
@@ -66,124 +110,119 @@ class Tree(_PepoFstr):
         super().__init__(indent, children, '%span %desc!r : \'%substr!1r1:^40…% \'')
         self.children = False
 
-    def _dump_children(self, fs: typing.IO, ito: pawpaw.Ito, prefix: str = '') -> None:
-        for child in ito.children[:-1]:
-            fs.write(f'{prefix}'
-                     f'{self.TEE}'
-                     f'{self.HORZ.char * len(self.indent)}'
-                     f'{child:{self.fstr}}'
-                     f'{self.linesep}')
-            self._dump_children(fs, child, prefix + f'{self.VERT}{self.indent}')
-
-        if len(ito.children) > 0:
-            child = ito.children[-1]
-            fs.write(f'{prefix}'
-                     f'{self.ELBOW}'
-                     f'{self.HORZ.char * len(self.indent)}'
-                     f'{child:{self.fstr}}'
-                     f'{self.linesep}')
-            self._dump_children(fs, child, prefix + f' {self.indent}')
-
-    def dump(self, fs: typing.IO, *itos: pawpaw.Ito) -> None:
+    def _iter_parts(self, *itos: pawpaw.Ito) -> typing.Iterable[str]:
+        fstr = self.fstr
+        linesep = self.linesep
+        horz = self.HORZ.char * len(self.indent)
+        tee = f'{self.TEE}{horz}'
+        elbow = f'{self.ELBOW}{horz}'
+        vert = f'{self.VERT}{self.indent}'
+        blank = f' {self.indent}'
         for ito in itos:
             if not isinstance(ito, pawpaw.Ito):
                 raise pawpaw.Errors.parameter_invalid_type('*itos', ito, pawpaw.Ito)
-            fs.write(f'{ito:{self.fstr}}{self.linesep}')
-            self._dump_children(fs, ito)
-
-
-class Xml(Pepo):
-    def __init__(self, indent: str = '    ', children: bool = True):
-        super().__init__(indent, children)
-
-    def _dump(self, fs: typing.IO, ei: pawpaw.Types.C_EITO, level: int = 0) -> None:
-        fs.write(f'{level * self.indent}<ito')
-        fs.write(f' start="{ei.ito.start}"')
-        fs.write(f' stop="{ei.ito.stop}"')
-        fs.write(f' desc="{xml_escape(ei.ito.desc or "")}">')
-        fs.write(self.linesep)
-
-        fs.write(f'{level * self.indent}<substring>')
-        fs.write(xml_escape(str(ei.ito)))
-        fs.write(f'</substring>{self.linesep}')
-        if self.children and len(ei.ito.children) > 0:
-            fs.write(f'{level * self.indent}<children>{self.linesep}')
-
-            level += 1
-            for i, ito in enumerate(ei.ito.children):
-                child = pawpaw.Types.C_EITO(i, ito)
-                self._dump(fs, child, level)
-
-            level -= 1
-            fs.write(f'{level * self.indent}</children>{self.linesep}')
-
-        level -= 1
-        fs.write(f'{level * self.indent}</ito>{self.linesep}')
-
-    def dump(self, fs: typing.IO, *itos: pawpaw.Ito) -> None:
-        fs.write(f'<?xml version="1.0" encoding="UTF-8" ?>{self.linesep}')
-        fs.write(f'<itos>{self.linesep}')
+            yield f'{ito:{fstr}}{linesep}'
+
+            stack = [(enumerate(ito.children, start=1), len(ito.children), '')]  # [children, count, prefix]
+            while len(stack) > 0:
+                children, count, prefix = stack[-1]
+                for i, child in children:
+                    last = i == count
+                    yield f'{prefix}{elbow if last else tee}{child:{fstr}}{linesep}'
+                    if len(child.children) > 0:
+                        stack.append((enumerate(child.children, start=1), len(child.children), prefix + (blank if last else vert)))
+                        break
+                else:
+                    stack.pop()
+
+
+class Xml(_PepoSubstr):
+    def __init__(self, indent: str = '    ', children: bool = True, max_substr: int | None = None):
+        super().__init__(indent, children, max_substr)
+
+    def _iter_parts(self, *itos: pawpaw.Ito) -> typing.Iterable[str]:
+        indents = _Indents(self.indent)
+        linesep = self.linesep
+        yield f'<?xml version="1.0" encoding="UTF-8" ?>{linesep}<itos>{linesep}'
         for ito in itos:
             if not isinstance(ito, pawpaw.Ito):
                 raise pawpaw.Errors.parameter_iterable_contains_invalid_type('itos', ito, pawpaw.Ito)
-            self._dump(fs, pawpaw.Types.C_EITO(0, ito), 1)
-        fs.write(f'<itos>{self.linesep}')
-
-
-class Json(Pepo):
-    def __init__(self, indent: str = '    ', children: bool = True):
-        super().__init__(indent, children)
 
-    def _dump(self, fs: typing.IO, ei: pawpaw.Types.C_EITO, level: int = 0) -> None:
-        fs.write(level * self.indent + '{' + self.linesep)
-
-        level += 1
-        fs.write(f'{level * self.indent}"start": {ei.ito.start},{self.linesep}')
-        fs.write(f'{level * self.indent}"stop": {ei.ito.stop},{self.linesep}')
-        if ei.ito.desc == None:
-            desc = "null"
-        else:
-            desc = json.encoder.encode_basestring(ei.ito.desc)
-        fs.write(f'{level * self.indent}"desc": {desc},{self.linesep}')
-        substr = json.encoder.encode_basestring(str(ei.ito))
-        fs.write(f'{level * self.indent}"substr": {substr},{self.linesep}')
-        if self.children:
-            fs.write(f'{level * self.indent}"children": [')
-            if len(ei.ito.children) == 0:
-                fs.write(f']{self.linesep}')
-            else:
-                fs.write(self.linesep)
-
-                level += 1
-                for i, ito in enumerate(ei.ito.children):
-                    child = pawpaw.Types.C_EITO(i, ito)
-                    self._dump(fs, child, level)
-                    if i < len(ei.ito.children) - 1:
-                        fs.write(',')
-                    fs.write(self.linesep)
-
-                level -= 1
-                fs.write(f'{level * self.indent}]{self.linesep}')
-
-        level -= 1
-        fs.write(level * self.indent + '}')
-
-    def dump(self, fs: typing.IO, *itos: pawpaw.Ito) -> None:
-        fs.write('{' + self.linesep)
-
-        fs.write(f'{self.indent}"itos": [')
+            stack: list[tuple[typing.Iterator[pawpaw.Ito], int]] = []  # [children, level of parent]
+            node, level = ito, 1
+            while True:
+                if node is not None:
+                    ind = indents[level]
+                    head = f'{ind}<ito start="{node.start}" stop="{node.stop}" desc="{xml_escape(node.desc or "")}">{linesep}' \
+                           f'{ind}<substring>{xml_escape(self._substr(node))}</substring>{linesep}'
+                    if self.children and len(node.children) > 0:
+                        yield f'{head}{ind}<children>{linesep}'
+                        stack.append((iter(node.children), level))
+                    else:
+                        yield f'{head}{indents[level - 1]}</ito>{linesep}'
+
+                if len(stack) == 0:
+                    break
+
+                children, level = stack[-1]
+                if (node := next(children, None)) is None:
+                    stack.pop()
+                    yield f'{indents[level]}</children>{linesep}{indents[level - 1]}</ito>{linesep}'
+                else:
+                    level += 1
+        yield f'<itos>{linesep}'
+
+
+class Json(_PepoSubstr):
+    def __init__(self, indent: str = '    ', children: bool = True, max_substr: int | None = None):
+        super().__init__(indent, children, max_substr)
+
+    def _iter_parts(self, *itos: pawpaw.Ito) -> typing.Iterable[str]:
+        indents = _Indents(self.indent)
+        linesep = self.linesep
+        encode = json.encoder.encode_basestring
+        yield f'{{{linesep}{self.indent}"itos": ['
 
         comma_needed = False
         for ito in itos:
             if not isinstance(ito, pawpaw.Ito):
                 raise pawpaw.Errors.parameter_invalid_type('*itos', ito, pawpaw.Ito)
-            if comma_needed:
-                fs.write(',')
-            fs.write(self.linesep)
-            self._dump(fs, pawpaw.Types.C_EITO(0, ito), 2)
+            yield f',{linesep}' if comma_needed else linesep
             comma_needed = True
-        fs.write(self.linesep)
-
-        fs.write(self.indent + ']' + self.linesep)
 
-        fs.write('}' + self.linesep)
+            stack: list[list] = []  # [children, next index, level of parent]
+            node, level = ito, 2
+            while True:
+                if node is not None:
+                    ind = indents[level]
+                    mem = indents[level + 1]
+                    desc = 'null' if node.desc is None else encode(node.desc)
+                    head = f'{ind}{{{linesep}' \
+                           f'{mem}"start": {node.start},{linesep}' \
+                           f'{mem}"stop": {node.stop},{linesep}' \
+                           f'{mem}"desc": {desc},{linesep}' \
+                           f'{mem}"substr": {encode(self._substr(node))},{linesep}'
+                    if not self.children:
+                        yield f'{head}{ind}}}'
+                    elif len(node.children) == 0:
+                        yield f'{head}{mem}"children": []{linesep}{ind}}}'
+                    else:
+                        yield f'{head}{mem}"children": [{linesep}'
+                        stack.append([node.children, 0, level])
+
+                if len(stack) == 0:
+                    break
+
+                frame = stack[-1]
+                children, i, level = frame
+                if i > 0:
+                    yield f',{linesep}' if i < len(children) else linesep
+                if i < len(children):
+                    frame[1] = i + 1
+                    node, level = children[i], level + 2
+                else:
+                    stack.pop()
+                    yield f'{indents[level + 1]}]{linesep}{indents[level]}}}'
+                    node = None
+
+        yield f'{linesep}{self.indent}]{linesep}}}{linesep}'
@@ -1,7 +1,10 @@
 from pawpaw.xml import descriptors
 
-from .xml_helper import QualifiedName, EtName, XmlErrors, XmlHelper
+from .xml_helper import QualifiedName, NamespaceScope, EtName, XmlErrors, XmlHelper
 del xml_helper
 
-from .xml_parser import XmlParser
+from .element_index import ElementIndex
+del element_index
+
+from .xml_parser import XmlParser, XmlPullParser, iterparse
 del xml_parser
@@ -0,0 +1,100 @@
+from __future__ import annotations
+import bisect
+import typing
+import xml.etree.ElementTree as ET
+
+from pawpaw.errors import Errors
+
+
+class ElementIndex:
+    """Index of an element tree parsed by XmlParser, built in a single traversal
+
+    Maps ElementTree tags (e.g., '{http://example.com}local'), local names, and qualified names as
+    written in the source (e.g., 'prefix:local') to elements in document order.  Each element's
+    parent and pre-order extent are recorded, so that parent lookups are a dict lookup, and
+    descendant searches are a dict lookup plus a bisection.
+
+    The index reflects the tree at the time it was built; it is not updated if the tree is modified.
+    """
+
+    _Postings = typing.Tuple[typing.List[int], typing.List[ET.Element]]  # (pre-order positions, elements)
+
+    def __init__(self, root: ET.Element):
+        if not isinstance(root, ET.Element):
+            raise Errors.parameter_invalid_type('root', root, ET.Element)
+
+        self.root = root
+        self._parents: dict[ET.Element, ET.Element | None] = {root: None}
+        self._extents: dict[ET.Element, typing.Tuple[int, int]] = {}
+        self._by_tag: dict[str, ElementIndex._Postings] = {}
+        self._by_local_name: dict[str, ElementIndex._Postings] = {}
+        self._by_qualified_name: dict[str, ElementIndex._Postings] = {}
+
+        elements = list(root.iter())
+        for i, e in enumerate(elements):
+            for c in e:
+                self._parents[c] = e
+
+            tag = e.tag
+            self._post(self._by_tag, tag, i, e)
+            self._post(self._by_local_name, tag[tag.find('}') + 1:], i, e)
+            if (ito := getattr(e, 'ito', None)) is not None:
+                self._post(self._by_qualified_name, str(ito.children[0].children[0]), i, e)
+
+        # Extent of each element's subtree in pre-order, computed bottom-up
+        sizes: dict[ET.Element, int] = {}
+        for i in range(len(elements) - 1, -1, -1):
+            e = elements[i]
+            size = sizes[e] = 1 + sum(sizes[c] for c in e)
+            self._extents[e] = (i, i + size)
+
+    @staticmethod
+    def _post(table: dict[str, ElementIndex._Postings], key: str, position: int, element: ET.Element) -> None:
+        if (postings := table.get(key)) is None:
+            postings = table[key] = ([], [])
+        postings[0].append(position)
+        postings[1].append(element)
+
+    def __contains__(self, element: ET.Element) -> bool:
+        return element in self._parents
+
+    def __len__(self) -> int:
+        return len(self._parents)
+
+    def _find_all(
+            self,
+            table: dict[str, ElementIndex._Postings],
+            key: str,
+            within: ET.Element | None
+    ) -> typing.List[ET.Element]:
+        positions, elements = table.get(key, ((), ()))
+        if within is None:
+            return list(elements)
+
+        if (extent := self._extents.get(within)) is None:
+            raise ValueError('parameter \'within\' is not an indexed element')
+        start, stop = extent
+        return list(elements[bisect.bisect_right(positions, start):bisect.bisect_left(positions, stop)])
+
+    def parent(self, element: ET.Element) -> ET.Element | None:
+        try:
+            return self._parents[element]
+        except KeyError:
+            raise ValueError('parameter \'element\' is not an indexed element') from None
+
+    def find_all_by_tag(self, tag: str, within: ET.Element | None = None) -> typing.List[ET.Element]:
+        """Returns elements having the ElementTree tag, in document order
+
+        Args:
+            tag: ElementTree tag, e.g., 'local' or '{http://example.com}local'
+            within: if not None, only descendants of this element are returned
+        """
+        return self._find_all(self._by_tag, tag, within)
+
+    def find_all_by_local_name(self, local_name: str, within: ET.Element | None = None) -> typing.List[ET.Element]:
+        """Returns elements having the local name, regardless of namespace, in document order"""
+        return self._find_all(self._by_local_name, local_name, within)
+
+    def find_all_by_qualified_name(self, qualified_name: str, within: ET.Element | None = None) -> typing.List[ET.Element]:
+        """Returns elements whose tag is written in the source as qualified_name (e.g., 'prefix:local'), in document order"""
+        return self._find_all(self._by_qualified_name, qualified_name, within)
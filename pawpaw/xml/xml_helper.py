@@ -1,7 +1,4 @@
 from __future__ import annotations
-import sys
-# Force Python XML parser, not faster C version so that we can hook methods
-sys.modules['_elementtree'] = None
 import xml.etree.ElementTree as ET
 import typing
 
@@ -38,6 +35,53 @@ class QualifiedName(typing.NamedTuple):
             return self.local_part.string[start:stop]
 
 
+class NamespaceScope:
+    """Namespace declarations in effect for an element, recorded by XmlParser during parsing
+
+    Scopes form an inherited chain: an element that declares namespaces gets a new scope whose parent
+    is the enclosing scope, while an element that declares none shares its parent element's scope.
+    Declarations map prefixes ('' for the default namespace) to URIs; a URI of None undeclares the
+    default namespace.
+    """
+    __slots__ = ('parent', 'owner', 'declarations', '_default', '_xmlns')
+
+    _UNRESOLVED = object()
+
+    def __init__(self, parent: NamespaceScope | None, owner: ET.Element, declarations: typing.Dict[str, str | None]):
+        self.parent = parent
+        self.owner = owner
+        self.declarations = declarations
+        self._default = self._UNRESOLVED
+        self._xmlns: typing.Dict[QualifiedName, Ito] | None = None  # cached by XmlHelper.get_xmlns
+
+    def resolve(self, prefix: str) -> str | None:
+        """Returns the URI bound to prefix ('' for the default namespace), or None if it is unbound"""
+        scope = self
+        while scope is not None:
+            if prefix in scope.declarations:
+                return scope.declarations[prefix]
+            scope = scope.parent
+        return None
+
+    @property
+    def default_namespace(self) -> str | None:
+        if self._default is self._UNRESOLVED:
+            self._default = self.resolve('')
+        return self._default
+
+    def in_scope(self) -> typing.Dict[str, str]:
+        """Returns all bindings in effect, with inner declarations overriding outer ones"""
+        chain = []
+        scope = self
+        while scope is not None:
+            chain.append(scope.declarations)
+            scope = scope.parent
+        rv = {}
+        for declarations in reversed(chain):
+            rv.update(declarations)
+        return {k: v for k, v in rv.items() if v is not None}
+
+
 # # Deals with ElementTree.Element tag and attrib keys
 class EtName(typing.NamedTuple):
     namespace: Ito | None
@@ -104,6 +148,24 @@ class XmlHelper:
 
         return XmlHelper.__query_xmlns
 
+    @classmethod
+    def get_namespace_scope(cls, element: ET.Element) -> NamespaceScope | None:
+        """Returns the namespace scope recorded for element by XmlParser, or None if no namespaces are in scope"""
+        if not isinstance(element, ET.Element):
+            raise Errors.parameter_invalid_type('element', element, ET.Element)
+        return getattr(element, '_ns_scope', None)
+
+    @classmethod
+    def _xmlns_from_itos(cls, element: ET.Element) -> typing.Dict[QualifiedName, Ito]:
+        rv = {}
+        for attrs in element.ito.children[0].children:
+            if attrs.desc == xml.descriptors.ATTRIBUTES:
+                for attr in attrs.children:
+                    tag, value = attr.children
+                    if tag.regex_fullmatch(cls._re_xmlns) is not None:
+                        rv[QualifiedName(*tag.children) if len(tag.children) == 2 else QualifiedName(None, tag.children[0])] = value
+        return rv
+
     @classmethod
     def get_xmlns(cls, element: ET.Element) -> typing.Dict[QualifiedName, Ito]:
         if cls._query_xmlns() is None:
@@ -113,7 +175,16 @@ class XmlHelper:
             raise Errors.parameter_invalid_type('element', element, ET.Element)
         elif not hasattr(element, 'ito'):
             raise XmlErrors.element_lacks_ito_attr('element', element)
-        
+
+        # Namespace scopes recorded during parsing identify the (few) elements that declare namespaces
+        if hasattr(element, '_ns_scope'):
+            scope = element._ns_scope
+            if scope is None or scope.owner is not element:
+                return {}
+            if scope._xmlns is None:
+                scope._xmlns = cls._xmlns_from_itos(element)
+            return dict(scope._xmlns)
+
         return {
             cls.get_qualified_name(xmlns): xmlns.find(f'*[d:{xml.descriptors.VALUE}]')
             for xmlns
@@ -136,10 +207,15 @@ class XmlHelper:
 
     @classmethod
     def get_default_namespace(cls, element: ET.ElementTree) -> str | None:
+        if hasattr(element, '_ns_scope'):
+            scope = element._ns_scope
+            rv = None if scope is None else scope.default_namespace
+            return f'{{{rv}}}' if rv else None
+
         while element is not None:
             rv = next((val for qn, val in cls.get_xmlns(element).items() if qn.prefix is None), None)
             if rv is not None:
-                return f'{{{rv}}}'
+                return f'{{{rv}}}' if rv else None
             element = cls.get_parent_element(element)
 
         return None
@@ -187,6 +263,10 @@ class XmlHelper:
         if not isinstance(local_name, str):
             raise Errors.parameter_invalid_type('local_name', local_name, str)
 
+        if (index := cls.get_element_index(element)) is not None:
+            yield from index.find_all_by_local_name(local_name, element)
+            return
+
         for e in element.findall('.//'):
             if local_name == cls.get_local_name(e):
                 yield e
@@ -199,6 +279,11 @@ class XmlHelper:
     def get_text_itos(cls, element: ET.ElementTree) -> typing.Iterable[Ito]:
         yield from element.ito.find_all(f'*[d:{xml.descriptors.TEXT}]')
 
+    @classmethod
+    def get_element_index(cls, element: ET.Element) -> xml.ElementIndex | None:
+        """Returns the index built for element's tree by XmlParser(index=True), or None if there is none"""
+        return getattr(element, '_index', None)
+
     @classmethod
     def get_parent_element(cls, element: ET.Element) -> ET.Element | None:
         if not isinstance(element, ET.Element):
@@ -206,6 +291,9 @@ class XmlHelper:
         elif not hasattr(element, 'ito'):
             raise XmlErrors.element_lacks_ito_attr('element', element)
 
+        if (index := cls.get_element_index(element)) is not None:
+            return index.parent(element)
+
         if (ito := element.ito.find(f'...[d:{xml.descriptors.ELEMENT}]')) is not None:
             return ito.value()
 
@@ -1,31 +1,54 @@
-import sys
-# Force Python XML parser, not faster C version so that we can hook methods
-sys.modules['_elementtree'] = None
+import array
+import bisect
+import codecs
+import collections
+import os
+import typing
 import xml.etree.ElementTree as ET
 import xml.parsers.expat as expat
 
 import regex
 from pawpaw import Span, Ito, xml
 from pawpaw.arborform import Extract
+from pawpaw.ito import _gc_paused
+from pawpaw.xml.element_index import ElementIndex
+
+
+def _tag_qualified_name(ito: Ito) -> xml.QualifiedName:
+    # Value func for tag Itos; computed on first use, then kept with the Ito
+    try:
+        return ito._qualified_name
+    except AttributeError:
+        rv = ito._qualified_name = xml.QualifiedName.from_src(ito)
+        return rv
+
+
+class _Element(ET.Element):
+    # Subclass of (possibly C accelerated) Element that allows .ito and ._spans attributes
+    pass
 
-        
-class XmlParser(ET.XMLParser):
-    _NAMESPACE = r'(?P<' + xml.descriptors.NAMESPACE + r'>[^ :]+):'
-    _NAME = r'(?P<' + xml.descriptors.NAME + r'>[^ />=]+)'
-    _TAG = r'(?P<' + xml.descriptors.TAG + r'>(?:' + _NAMESPACE + r')?' + _NAME + r')'
 
-    _VALUE = r'="(?P<' + xml.descriptors.VALUE + r'>[^"]+)"'
-    _TAG_VALUE = _TAG + _VALUE
+class XmlParser:
+    """Drives expat directly, rather than hooking ET.XMLParser internals, so that the C accelerated
+    ElementTree can remain in use.  Use as the parser for ET.fromstring, ET.XML, or ET.parse.
+    """
+    # Single-pass tag tokenizer: matches the tag, then each attribute in turn, then the closing '>' or '/>'
+    _NAMESPACE = r'(?P<' + xml.descriptors.NAMESPACE + r'>[^\s:/>="\']+):'
+    _NAME = r'(?P<' + xml.descriptors.NAME + r'>[^\s/>="\']+)'
+    _TAG = r'(?P<' + xml.descriptors.TAG + r'>(?:' + _NAMESPACE + r')?' + _NAME + r')'
 
-    _ATTRIBUTE = r'(?P<' + xml.descriptors.ATTRIBUTE + r'>' + _TAG_VALUE + r')'
+    _VALUE = r'\s*=\s*(?P<quote>["\'])(?P<' + xml.descriptors.VALUE + r'>.*?)(?P=quote)'
+    _ATTRIBUTE = r'\s+(?P<' + xml.descriptors.ATTRIBUTE + r'>' + _TAG + _VALUE + r')'
 
-    _itor_extract_tag = Extract(regex.compile(r'\<[\/\?]?' + _TAG, regex.DOTALL))
-    _itor_extract_attributes = Extract(regex.compile(_ATTRIBUTE, regex.DOTALL))
+    _re_start_tag = regex.compile(r'<' + _TAG, regex.DOTALL)
+    _re_attribute = regex.compile(_ATTRIBUTE, regex.DOTALL)
+    _re_start_tag_close = regex.compile(r'\s*(?P<close>/?>)', regex.DOTALL)
+    _re_end_tag = regex.compile(r'</' + _TAG + r'\s*>', regex.DOTALL)
 
     _PI = r'(?P<' + xml.descriptors.PI + r'>\<\?(?P<' + xml.descriptors.VALUE + r'>.*?)\?\>)'
     _COMMENT = r'(?P<' + xml.descriptors.COMMENT + r'>\<\!\-\-(?P<' + xml.descriptors.VALUE + r'>.*?)\-\-\>)'
 
-    _itor_extract_pi_comments = Extract(regex.compile('|'.join((_PI, _COMMENT)), regex.DOTALL))
+    _re_pi_comment = regex.compile('|'.join((_PI, _COMMENT)), regex.DOTALL)
 
     class _Spans:
         line: Span | None = None
@@ -34,157 +57,440 @@ class XmlParser(ET.XMLParser):
         char: Span | None = None
 
     class _InternalIndexingParser:
+        """Maps byte offsets within the encoded text to char offsets
+
+        The byte offset of every CHECKPOINT_INTERVAL-th char is recorded in a single pass over the
+        text.  A query bisects the checkpoints, and then decodes at most one interval, or none if the
+        interval is entirely ASCII.  ASCII text requires no checkpoints, nor encoded bytes.
+        """
+        CHECKPOINT_INTERVAL = 1024
+        _ASCII_COMPATIBLE = frozenset(('ascii', 'utf-8', 'iso8859-1', 'cp1252'))  # codecs.lookup names
+
         def __init__(self, text: str, encoding: str):
             self.text = text
             self.encoding = encoding
-            self.bytes = text.encode(encoding)
-
-            self.last_line_indexed: int | None = None
-            self.last_line_char_offset: int | None = None
-            self.last_line_byte_offset: int | None = None
-            self.reset()
-
-        def reset(self):
-            self.last_line_indexed = 0
-            self.last_line_char_offset = 0
-            self.last_line_byte_offset = 0
+            self.is_ascii = text.isascii() and codecs.lookup(encoding).name in self._ASCII_COMPATIBLE
+
+            self.bytes = b''
+            self.checkpoints = array.array('Q')
+            self._last_byte = self._last_char = 0
+            if not self.is_ascii:
+                interval = self.CHECKPOINT_INTERVAL
+                encoder = codecs.getincrementalencoder(encoding)()
+                blocks = []
+                byte_offset = 0
+                for i in range(0, len(text), interval):
+                    self.checkpoints.append(byte_offset)
+                    block = encoder.encode(text[i:i + interval], i + interval >= len(text))
+                    byte_offset += len(block)
+                    blocks.append(block)
+                self.bytes = b''.join(blocks)
 
         def char_offset_from(self, byte_offset: int) -> int:
-            return len(self.bytes[0:byte_offset].decode(self.encoding))
+            if self.is_ascii:
+                return byte_offset
+
+            # Parsers query in increasing order, so nearby queries resume from the previous one
+            last_byte = self._last_byte
+            if last_byte <= byte_offset < last_byte + self.CHECKPOINT_INTERVAL:
+                rv = self._last_char + len(self.bytes[last_byte:byte_offset].decode(self.encoding))
+            else:
+                checkpoints = self.checkpoints
+                i = bisect.bisect_right(checkpoints, byte_offset) - 1
+                char_offset = i * self.CHECKPOINT_INTERVAL
+                cp_byte = checkpoints[i]
+                next_cp_byte = checkpoints[i + 1] if i + 1 < len(checkpoints) else len(self.bytes)
+                if next_cp_byte - cp_byte == min(self.CHECKPOINT_INTERVAL, len(self.text) - char_offset):
+                    rv = char_offset + byte_offset - cp_byte  # ASCII interval
+                else:
+                    rv = char_offset + len(self.bytes[cp_byte:byte_offset].decode(self.encoding))
+
+            self._last_byte, self._last_char = byte_offset, rv
+            return rv
+
+        def char_offset_from_ex(self, parser: expat.XMLParserType) -> int:
+            return self.char_offset_from(parser.CurrentByteIndex)
 
+    def __init__(self, encoding: str = expat.native_encoding, ignore_empties: bool = True, index: bool = False):
         """
-        Note : parser.CurrentColumnNumber is not well defined.  From official Python documentation:
-        
-            "Current columns number in the parser input"
-            
-       Assumption made here is that "column number" refers to chars, and may differ from bytes when unicode combining graphemes are encountered
+        Args:
+            encoding: overrides the encoding declared in the document
+            ignore_empties: if True, whitespace-only text does not produce Itos
+            index: if True, an ElementIndex is built on close, which XmlHelper uses for parent and descendant lookups
         """
-        def char_offset_from_ex(self, parser: ET.XMLParser) -> int:
-            if self.last_line_indexed < parser.CurrentLineNumber:
-                self.last_line_indexed = parser.CurrentLineNumber
-                
-                current_line_char_offset = self.last_line_char_offset + len(
-                    self.bytes[self.last_line_byte_offset:parser.CurrentByteIndex].decode(
-                        self.encoding)) - parser.CurrentColumnNumber
-                current_line_byte_index = self.last_line_byte_offset + len(
-                    self.text[self.last_line_char_offset:current_line_char_offset].encode(self.encoding))
-
-                self.last_line_char_offset = current_line_char_offset
-                self.last_line_byte_offset = current_line_byte_index
-
-            rv = self.last_line_char_offset + parser.CurrentColumnNumber
-            return rv
-
-    def __init__(self, encoding: str = expat.native_encoding, ignore_empties: bool = True):
-        super().__init__(encoding=encoding)
         self.encoding = encoding
         self.ignore_empties = ignore_empties
+        self.index = index
         self._indexing_parser: XmlParser._InternalIndexingParser | None = None
+        self._text: str | None = None
+        self._char_base = 0  # char offset of self._text within the document
+
+        self.parser = parser = expat.ParserCreate(encoding, '}')
+        self.target = target = ET.TreeBuilder(element_factory=_Element)
+        self.entity: dict[str, str] = {}
+        self.version = 'Expat %d.%d.%d' % expat.version_info
+        self._names: dict[str, str] = {}
+        self._ns_declarations: dict[str, str | None] | None = None  # declared by the next start tag
+        self._ns_scopes: list[xml.NamespaceScope | None] = [None]
+
+        parser.DefaultHandlerExpand = self._default
+        parser.StartNamespaceDeclHandler = self._start_ns
+        parser.StartElementHandler = self._start
+        parser.EndElementHandler = self._end
+        parser.CharacterDataHandler = target.data
+        parser.buffer_text = 1
+        parser.ordered_attributes = 1
+
+    def _fixname(self, key: str) -> str:
+        # expat reports namespaced names as 'uri}local'; ElementTree uses '{uri}local'
+        try:
+            return self._names[key]
+        except KeyError:
+            rv = self._names[key] = '{' + key if '}' in key else key
+            return rv
 
-    def _start(self, *args, **kwargs) -> ET.Element:
-        # Assume default XML parser (expat)
-        rv = super()._start(*args, **kwargs)
+    def _raise_parse_error(self, e: expat.ExpatError) -> None:
+        err = ET.ParseError(e)
+        err.code = e.code
+        err.position = e.lineno, e.offset
+        raise err from None
+
+    def _default(self, text: str) -> None:
+        # Entity references not expanded by expat (e.g., those declared in an external DTD)
+        if text[:1] == '&':
+            try:
+                self.target.data(self.entity[text[1:-1]])
+            except KeyError:
+                err = expat.error(
+                    f'undefined entity {text}: line {self.parser.ErrorLineNumber}, column {self.parser.ErrorColumnNumber}')
+                err.code = 11  # XML_ERROR_UNDEFINED_ENTITY
+                err.lineno = self.parser.ErrorLineNumber
+                err.offset = self.parser.ErrorColumnNumber
+                raise err
+
+    def _char_offset(self) -> int:
+        return self._indexing_parser.char_offset_from_ex(self.parser)
+
+    def _start_ns(self, prefix: str | None, uri: str | None) -> None:
+        if self._ns_declarations is None:
+            self._ns_declarations = {}
+        self._ns_declarations[prefix or ''] = uri or None
+
+    def _start(self, tag: str, attr_list: list[str]) -> ET.Element:
+        fixname = self._fixname
+        attrib = {fixname(attr_list[i]): attr_list[i + 1] for i in range(0, len(attr_list), 2)}
+        rv = self.target.start(fixname(tag), attrib)
+
+        scope = self._ns_scopes[-1]
+        if self._ns_declarations is not None:
+            scope = xml.NamespaceScope(scope, rv, self._ns_declarations)
+            self._ns_declarations = None
+        rv._ns_scope = scope
+        self._ns_scopes.append(scope)
+
+        parser = self.parser
         rv._spans = self._Spans()
-        rv._spans.line = Span(self.parser.CurrentLineNumber, -1)
-        rv._spans.column = Span(self.parser.CurrentColumnNumber, -1)
-        rv._spans.byte = Span(self.parser.CurrentByteIndex, -1)
-        rv._spans.char = Span(self._indexing_parser.char_offset_from_ex(self.parser), -1)
+        rv._spans.line = Span(parser.CurrentLineNumber, -1)
+        rv._spans.column = Span(parser.CurrentColumnNumber, -1)
+        rv._spans.byte = Span(parser.CurrentByteIndex, -1)
+        rv._spans.char = Span(self._char_offset(), -1)
         return rv
 
-    def _end(self, *args, **kwargs) -> ET.Element:
-        # Assume default XML parser (expat)
-        rv = super()._end(*args, **kwargs)
-        rv._spans.line = Span(rv._spans.line.start, self.parser.CurrentLineNumber)
-        rv._spans.column = Span(rv._spans.column.start, self.parser.CurrentColumnNumber)
-        rv._spans.byte = Span(rv._spans.byte.start, self.parser.CurrentByteIndex)
-        rv._spans.char = Span(rv._spans.char.start, self._indexing_parser.char_offset_from_ex(self.parser))
+    def _end(self, tag: str) -> ET.Element:
+        rv = self.target.end(self._fixname(tag))
+        self._ns_scopes.pop()
+
+        parser = self.parser
+        rv._spans.line = Span(rv._spans.line.start, parser.CurrentLineNumber)
+        rv._spans.column = Span(rv._spans.column.start, parser.CurrentColumnNumber)
+        rv._spans.byte = Span(rv._spans.byte.start, parser.CurrentByteIndex)
+        rv._spans.char = Span(rv._spans.char.start, self._char_offset())
         return rv
 
     def feed(self, data) -> None:
         self._text = data
         self._indexing_parser = self._InternalIndexingParser(data, self.encoding)
-        super().feed(data)
+        try:
+            self.parser.Parse(data, False)
+        except expat.ExpatError as e:
+            self._raise_parse_error(e)
 
     text_comments = Extract
 
-    def _find_text(self, start: int, stop: int) -> Ito | None:
-        rv = Ito(self._text, start, stop, xml.descriptors.TEXT)
-        if len(rv) > 0 and not (self.ignore_empties and rv.str_isspace()):
-            rv.children.add(*self._itor_extract_pi_comments(rv))
-            return rv
+    @staticmethod
+    def _is_self_closing(element: ET.Element, text: str, char_stop: int) -> bool:
+        return text[char_stop-2:char_stop] in ('/>', '?>') and not any(element.iter())
+
+    def _tag_ito(self, m: regex.Match) -> Ito:
+        text = self._text
+        rv = Ito._from_trusted(text, *m.span(xml.descriptors.TAG), xml.descriptors.TAG)
+        if m.start(xml.descriptors.NAMESPACE) >= 0:
+            rv.children._add_ordered(
+                Ito._from_trusted(text, *m.span(xml.descriptors.NAMESPACE), xml.descriptors.NAMESPACE),
+                Ito._from_trusted(text, *m.span(xml.descriptors.NAME), xml.descriptors.NAME))
+        else:
+            rv.children._add_ordered(Ito._from_trusted(text, *m.span(xml.descriptors.NAME), xml.descriptors.NAME))
+        rv._set_value_func_trusted(_tag_qualified_name)
+        return rv
 
-    def _extract_itos(self, element: ET.Element) -> None:
-        start_tag = Ito(
-            self._text,
-            element._spans.char.start,
-            self._text.index('>', element._spans.char.start + 1) + 1,
-            xml.descriptors.START_TAG)
-        
-        start_tag.children.add(*self._itor_extract_tag(start_tag))
-
-        attrs = [*self._itor_extract_attributes(start_tag)]
+    def _start_tag_ito(self, element: ET.Element, start: int) -> typing.Tuple[Ito, bool]:
+        """Returns the start tag Ito, and whether it is self-closing"""
+        text = self._text
+        m = self._re_start_tag.match(text, start)
+        tag = self._tag_ito(m)
+
+        attrs = []
+        pos = m.end()
+        while (m := self._re_attribute.match(text, pos)) is not None:
+            attr = Ito._from_trusted(text, *m.span(xml.descriptors.ATTRIBUTE), xml.descriptors.ATTRIBUTE)
+            attr.children._add_ordered(
+                self._tag_ito(m),
+                Ito._from_trusted(text, *m.span(xml.descriptors.VALUE), xml.descriptors.VALUE))
+            attrs.append(attr)
+            pos = m.end()
+
+        m = self._re_start_tag_close.match(text, pos)
+        rv = Ito._from_trusted(text, start, m.end(), xml.descriptors.START_TAG)
         if len(attrs) > 0:
-            attrs_parent = Ito.join(*attrs, desc=xml.descriptors.ATTRIBUTES)
-            attrs_parent.value_func = lambda ito: element.attrib
-            attrs_parent.children.add(*attrs)
-            start_tag.children.add(attrs_parent)
-
-        for tag in start_tag.find_all('**[d:' + xml.descriptors.TAG + ']'):
-            qn = xml.QualifiedName.from_src(tag)
-            tag.value_func = lambda i: qn
-
-        if self._text[element._spans.char.stop-2:element._spans.char.stop] not in ('/>', '?>') or any(element.iter()):
-            # Not self-closing
-            end_tag = Ito(
-                self._text,
-                element._spans.char.stop,
-                self._text.index('>', element._spans.char.stop + 1) + 1,
-                xml.descriptors.END_TAG)
-            for c in self._itor_extract_tag(end_tag):
-                c.value_func = lambda i: xml.QualifiedName.from_src(c)
-                end_tag.children.add(c)
-            end_index = end_tag.stop
+            attrs_parent = Ito._from_trusted(text, attrs[0].start, attrs[-1].stop, xml.descriptors.ATTRIBUTES)
+            attrs_parent._set_value_func_trusted(lambda ito: element.attrib)
+            attrs_parent.children._add_ordered(*attrs)
+            rv.children._add_ordered(tag, attrs_parent)
         else:
-            # Self-closing
-            end_tag = None
-            end_index = element._spans.char.stop
+            rv.children._add_ordered(tag)
+
+        return rv, m.group('close') == '/>'
+
+    def _end_tag_ito(self, start: int) -> Ito:
+        m = self._re_end_tag.match(self._text, start)
+        rv = Ito._from_trusted(self._text, start, m.end(), xml.descriptors.END_TAG)
+        rv.children._add_ordered(self._tag_ito(m))
+        return rv
+
+    def _find_text(self, start: int, stop: int) -> Ito | None:
+        text = self._text
+        if start < stop and not (self.ignore_empties and text[start:stop].isspace()):
+            rv = Ito._from_trusted(text, start, stop, xml.descriptors.TEXT)
+            if text.find('<', start, stop) >= 0:
+                rv.children._add_ordered(*self._pi_comment_itos(start, stop))
+            return rv
+
+    def _pi_comment_itos(self, start: int, stop: int) -> typing.Iterable[Ito]:
+        text = self._text
+        for m in self._re_pi_comment.finditer(text, start, stop):
+            desc = xml.descriptors.PI if m.start(xml.descriptors.PI) >= 0 else xml.descriptors.COMMENT
+            rv = Ito._from_trusted(text, *m.span(desc), desc)
+            rv.children._add_ordered(Ito._from_trusted(text, *m.span(xml.descriptors.VALUE), xml.descriptors.VALUE))
+            yield rv
+
+    def _extract_element_itos(self, element: ET.Element) -> None:
+        # Itos for element's children must already be extracted
+        char_start = element._spans.char.start - self._char_base
+        char_stop = element._spans.char.stop - self._char_base
 
-        ito = Ito(self._text, start_tag.start, end_index, xml.descriptors.ELEMENT)
-        ito.value_func = lambda i: element
+        start_tag, self_closing = self._start_tag_ito(element, char_start)
+        children = [start_tag]
 
-        ito.children.add(start_tag)
-        
         # Note: Don't use element.text or element.tail here because these values:
         #   a) are absent for whitespace-only strs
         #   b) get html-decoded (to change entity references) and resulting offsets may not match original string
         #   c) could contain pi and comments
         # See https://docs.python.org/3/library/xml.etree.elementtree.html for definition of .text and .tail
+        if self_closing:
+            end_index = start_tag.stop
+        else:
+            end_tag = self._end_tag_ito(char_stop)
+            prior = start_tag.stop
+            for child in element:
+                if (t := self._find_text(prior, child.ito.start)) is not None:
+                    children.append(t)
+                children.append(child.ito)
+                prior = child.ito.stop
+            if (t := self._find_text(prior, end_tag.start)) is not None:
+                children.append(t)
+            children.append(end_tag)
+            end_index = end_tag.stop
 
-        last_child: ET.Element | None = None
-        for child in element:
-            self._extract_itos(child)
-            ito.children.add(child.ito)
+        ito = Ito._from_trusted(self._text, char_start, end_index, xml.descriptors.ELEMENT)
+        ito._set_value_func_trusted(lambda i: element)
+        ito.children._add_ordered(*children)
+        element.ito = ito
 
-            if last_child is not None:
-                if (t := self._find_text(last_child.ito.stop, child.ito.start)) is not None:
-                    ito.children.add(t)
+    def _extract_itos(self, element: ET.Element) -> None:
+        # Iterative post-order traversal, so that document depth is not limited by the recursion limit
+        stack = [(element, False)]
+        while len(stack) > 0:
+            e, children_done = stack.pop()
+            if children_done:
+                self._extract_element_itos(e)
+            else:
+                stack.append((e, True))
+                stack.extend((c, False) for c in reversed(e))
+
+    def close(self) -> ET.Element:
+        try:
+            self.parser.Parse(b'', True)
+        except expat.ExpatError as e:
+            self._raise_parse_error(e)
+        rv = self.target.close()
+        with _gc_paused():
+            self._extract_itos(rv)
+            if self.index:
+                index = ElementIndex(rv)
+                for e in rv.iter():
+                    e._index = index
+        return rv
 
-            last_child = child
 
-        if last_child is not None and end_tag is not None:
-            if (t := self._find_text(last_child.ito.stop, end_tag.start)) is not None:
-                ito.children.add(t)
+class XmlPullParser(XmlParser):
+    """Incremental XmlParser that emits elements having chosen tags as soon as they close
 
-        if end_tag is not None:
-            stop = element[0].ito.start if len(element) > 0 else end_tag.start
-            if (t := self._find_text(start_tag.stop, stop)) is not None:
-                ito.children.add(t)
+    Text may be fed in any number of chunks.  When an element with one of the chosen tags closes,
+    its .ito is extracted, it is detached from its parent, and it is queued for read_events.  Only
+    the text of chosen elements that are still open is retained, so memory remains bounded by the
+    size of the largest chosen element, rather than by the size of the document.
 
-            ito.children.add(end_tag)
+    Emitted elements are the roots of their own Ito trees, whose .string is the text of the element
+    alone.  Their ._spans remain relative to the entire document.  Chosen tags nested within an open
+    chosen element are not emitted separately: they are part of the enclosing element's subtree.
+    Elements other than chosen ones (e.g., the document root) are retained, but lack an .ito.
+    """
 
-        element.ito = ito
+    def __init__(self, tags: typing.Iterable[str], encoding: str = expat.native_encoding, ignore_empties: bool = True):
+        """
+        Args:
+            tags: ElementTree style tags to emit, e.g., 'item' or '{http://example.com}item'
+        """
+        super().__init__(encoding, ignore_empties)
+        if isinstance(tags, str):
+            tags = (tags,)
+        self.tags = frozenset(tags)
+
+        self._events: collections.deque[ET.Element] = collections.deque()
+        self._open: list[ET.Element] = []  # open elements, outermost first
+        self._chosen_depth: int | None = None  # depth of open chosen element, if any
+
+        # Retained text, along with the document byte and char offsets of its start
+        self._buf = ''
+        self._buf_bytes = b''
+        self._buf_byte = 0
+        self._buf_char = 0
+        self._buf_ascii = True
+
+        # Byte and char offsets of the most recent parser event; offsets only advance
+        self._cursor_byte = 0
+        self._cursor_char = 0
+
+    def _char_offset(self) -> int:
+        byte = self.parser.CurrentByteIndex
+        if self._buf_ascii:
+            rv = self._buf_char + byte - self._buf_byte
+        else:
+            lo = self._cursor_byte - self._buf_byte
+            rv = self._cursor_char + len(self._buf_bytes[lo:byte - self._buf_byte].decode(self.encoding))
+        self._cursor_byte, self._cursor_char = byte, rv
+        return rv
+
+    def _start(self, tag: str, attr_list: list[str]) -> ET.Element:
+        rv = super()._start(tag, attr_list)
+        if self._chosen_depth is None and rv.tag in self.tags:
+            self._chosen_depth = len(self._open)
+        self._open.append(rv)
+        return rv
 
-    def close(self):
-        rv = super().close()
-        self._extract_itos(rv)
+    def _end(self, tag: str) -> ET.Element:
+        rv = super()._end(tag)
+        self._open.pop()
+        if self._chosen_depth == len(self._open):
+            self._chosen_depth = None
+            self._emit(rv)
         return rv
+
+    def _emit(self, element: ET.Element) -> None:
+        start = element._spans.char.start - self._buf_char
+        stop = element._spans.char.stop - self._buf_char
+        if not self._is_self_closing(element, self._buf, stop):
+            stop = self._buf.index('>', stop + 1) + 1
+
+        self._text = self._buf[start:stop]
+        self._char_base = element._spans.char.start
+        self._extract_itos(element)
+        self._text = None
+
+        if len(self._open) > 0:
+            del self._open[-1][-1]  # element is the last child of its parent
+        self._events.append(element)
+
+    def _trim(self) -> None:
+        # Discard text that precedes both the open chosen element (if any) and the last event
+        if self._chosen_depth is None:
+            byte, char = self._cursor_byte, self._cursor_char
+        else:
+            e = self._open[self._chosen_depth]
+            byte, char = e._spans.byte.start, e._spans.char.start
+
+        self._buf = self._buf[char - self._buf_char:]
+        if not self._buf_ascii:
+            self._buf_bytes = self._buf_bytes[byte - self._buf_byte:]
+        self._buf_byte, self._buf_char = byte, char
+
+    def feed(self, data: str) -> None:
+        self._buf += data
+        if self._buf_ascii and not data.isascii():
+            self._buf_ascii = False
+            self._buf_bytes = self._buf.encode(self.encoding)
+        elif not self._buf_ascii:
+            self._buf_bytes += data.encode(self.encoding)
+
+        try:
+            self.parser.Parse(data, False)
+        except expat.ExpatError as e:
+            self._raise_parse_error(e)
+        self._trim()
+
+    def read_events(self) -> typing.Iterable[ET.Element]:
+        """Yields, and releases, elements emitted since the last call"""
+        events = self._events
+        while len(events) > 0:
+            yield events.popleft()
+
+    def close(self) -> ET.Element:
+        """Finishes parsing, and returns the root element, from which emitted elements have been detached"""
+        try:
+            self.parser.Parse(b'', True)
+        except expat.ExpatError as e:
+            self._raise_parse_error(e)
+        self._buf = ''
+        self._buf_bytes = b''
+        return self.target.close()
+
+
+def iterparse(
+        source: str | os.PathLike | typing.TextIO,
+        tags: typing.Iterable[str],
+        encoding: str = 'utf-8',
+        ignore_empties: bool = True,
+        chunk_size: int = 1 << 16
+) -> typing.Iterable[ET.Element]:
+    """Parses an XML document incrementally, yielding elements with chosen tags as soon as they close
+
+    See XmlPullParser for the structure of yielded elements.
+
+    Args:
+        source: a file path, or a readable text file-like object
+        tags: ElementTree style tags to yield
+        encoding: encoding used to open source if it is a path
+        ignore_empties: as for XmlParser
+        chunk_size: number of chars read at a time
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, encoding=encoding) as fs:
+            yield from iterparse(fs, tags, encoding, ignore_empties, chunk_size)
+        return
+
+    parser = XmlPullParser(tags, ignore_empties=ignore_empties)
+    while len(chunk := source.read(chunk_size)) > 0:
+        parser.feed(chunk)
+        yield from parser.read_events()
+    parser.close()
+    yield from parser.read_events()
@@ -1,10 +1,17 @@
+import copy
+import gc
 import json
 import pickle
 
 from pawpaw import Ito, __version__
+from pawpaw.ito import _pickled_strings
 from tests.util import _TestIto
 
 
+class _SubIto(Ito):
+    pass
+
+
 class TestItoSerialization(_TestIto):
     def setUp(self) -> None:
         super().setUp()
@@ -29,6 +36,58 @@ class TestItoSerialization(_TestIto):
         w_deser = pickle.loads(pickle_data)
         self.assertEqual(w_orig, w_deser)
 
+    def test_pickle_protocols(self):
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            for ito in self.h_ito, self.h_ito.find('**[d:Word]'), self.h_ito.find('**[d:Char]'):
+                with self.subTest(protocol=protocol, ito=ito):
+                    rv = pickle.loads(pickle.dumps(ito, protocol=protocol))
+                    self.assertEqual(ito, rv)
+                    self.assertIsNone(rv.parent)
+                    self.assertListEqual([*ito.walk_descendants()], [*rv.walk_descendants()])
+                    for d in rv.walk_descendants():
+                        self.assertIs(rv.string, d.string)
+
+    def test_pickle_string_stored_once(self):
+        words = [*self.h_ito.children]
+        pickle_data = pickle.dumps(words)
+        self.assertEqual(1, pickle_data.count(self.h_ito.string.encode()))
+        rv = pickle.loads(pickle_data)
+        self.assertListEqual(words, rv)
+        self.assertTrue(all(w.string is rv[0].string for w in rv))
+
+    def test_pickle_string_not_retained(self):
+        for protocol in 4, 5:
+            with self.subTest(protocol=protocol):
+                pickle.dumps([*self.h_ito.children], protocol=protocol)
+                gc.collect()
+                self.assertEqual(0, len(_pickled_strings))
+
+    def test_copy(self):
+        for func in copy.copy, copy.deepcopy:
+            for ito in self.h_ito, self.h_ito.find('**[d:Word]'):
+                with self.subTest(func=func.__name__, ito=ito):
+                    rv = func(ito)
+                    self.assertIs(str, type(rv.string))
+                    self.assertEqual(str(ito), str(rv))
+                    self.assertEqual(repr(ito), repr(rv))
+                    self.assertEqual(ito, rv)
+                    self.assertListEqual([*ito.walk_descendants()], [*rv.walk_descendants()])
+
+    def test_pickle_out_of_band(self):
+        buffers = []
+        pickle_data = pickle.dumps([*self.h_ito.children], protocol=5, buffer_callback=buffers.append)
+        self.assertEqual(1, len(buffers))
+        self.assertNotIn(self.h_ito.string.encode(), pickle_data)
+        rv = pickle.loads(pickle_data, buffers=buffers)
+        self.assertListEqual([*self.h_ito.children], rv)
+
+    def test_pickle_subclass(self):
+        root = Ito(self.h_ito.string)
+        root.children.add(_SubIto(root, 0, 3, desc='sub'))
+        rv = pickle.loads(pickle.dumps(root, protocol=5))
+        self.assertIs(_SubIto, type(rv.children[0]))
+        self.assertEqual(root.children[0], rv.children[0])
+
     #endregion
 
     #region JSON
@@ -122,6 +181,33 @@ class TestItoSerialization(_TestIto):
 
         self.assertSequenceEqual([*self.h_ito.walk_descendants()], [*w_deser_root.walk_descendants()])
 
+    def test_json_deserialize_trusted(self):
+        w_orig = self.h_ito.find('**[d:Word]')
+        for stringless in False, True:
+            for full_tree in False, True:
+                with self.subTest(stringless=stringless, full_tree=full_tree):
+                    js_data = json.dumps(w_orig, cls=Ito.JsonEncoder, stringless=stringless, full_tree=full_tree)
+                    expected = json.loads(js_data, object_hook=Ito.JsonDecoderHook(string=self.h_ito.string))
+                    actual = json.loads(js_data, object_hook=Ito.JsonDecoderHook(string=self.h_ito.string, trusted=True))
+                    self.assertEqual(expected, actual)
+                    self.assertEqual(expected.path, actual.path)
+                    self.assertSequenceEqual([*expected.get_root().walk_descendants()], [*actual.get_root().walk_descendants()])
+
+    def test_json_deserialize_trusted_invalid(self):
+        js_data = json.dumps(self.h_ito, cls=Ito.JsonEncoder, stringless=False, full_tree=False)
+        obj = json.loads(js_data)
+        words = [{'span': list(w.span), 'desc': w.desc} for w in self.h_ito.children]
+        for desc, children in [
+            ('unordered', words[::-1]),
+            ('overlapping', [words[0], {'span': [words[0]['span'][0], words[1]['span'][1]], 'desc': None}]),
+            ('out of parent', [{'span': [0, len(self.h_ito.string) + 1], 'desc': None}]),
+            ('inverted', [{'span': [2, 1], 'desc': None}]),
+        ]:
+            with self.subTest(children=desc):
+                obj['ito']['children'] = children
+                with self.assertRaises(ValueError):
+                    json.loads(json.dumps(obj), object_hook=Ito.JsonDecoderHook(trusted=True))
+
     def test_json_serialize_stringless_full_tree(self):
         word = self.h_ito.find('**[d:Word]')
         indent = ' ' * 4
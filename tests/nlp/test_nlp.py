@@ -1,7 +1,11 @@
+import decimal
+import gc
+import pickle
 import typing
 from dataclasses import dataclass
 
 import pawpaw
+from pawpaw.ito import _VirtualChildItos
 from tests.util import _TestIto, IntIto
 
 
@@ -56,6 +60,51 @@ class TestNumber(_TestIto):
         self.assertTrue(all(i.desc == 'number' for i in rv[:-1]))
         self.assertIsNone(rv[-1].desc)
 
+    def test_patterns_cached(self):
+        num = pawpaw.nlp.Number(thousands_sep_optional=False)
+        self.assertIs(num.re, pawpaw.nlp.Number(thousands_sep_optional=False).re)
+        self.assertIsNone(num.re.fullmatch('1234'))
+        self.assertIsNotNone(num.re.fullmatch('1,234'))
+
+        num.thousands_sep = '#'
+        self.assertIsNot(num.re, pawpaw.nlp.Number(thousands_sep_optional=False).re)
+        self.assertIsNotNone(num.re.fullmatch('1#234'))
+
+    def test_parse_value(self):
+        num = pawpaw.nlp.Number()
+        for s, expected in [
+            ('42', 42),
+            ('-1,234', -1234),
+            ('+1,234.5', 1234.5),
+            ('.25', .25),
+            ('1.602176634e-19', 1.602176634e-19),
+            ('-6.02214076x10^23', -6.02214076e23),
+            ('6.62607015E-34', 6.62607015E-34),
+        ]:
+            with self.subTest(string=s):
+                ito = next(i for i in num.get_itor()(pawpaw.Ito(s)) if i.desc == 'number')
+                actual = num.parse_value(ito)
+                self.assertIs(type(expected), type(actual))
+                self.assertEqual(expected, actual)
+
+        ito = next(i for i in num.get_itor()(pawpaw.Ito('-0.10e2')) if i.desc == 'number')
+        self.assertEqual(decimal.Decimal('-10.0'), num.parse_value(ito, decimal.Decimal))
+
+        with self.assertRaises(ValueError):
+            num.parse_value(pawpaw.Ito('42'))
+
+    def test_value_type(self):
+        s = 'It costs 1,234.50, or 12 units.'
+        for value_type in float, decimal.Decimal:
+            with self.subTest(value_type=value_type):
+                num = pawpaw.nlp.Number(value_type=value_type)
+                rv = [i.value() for i in num.get_itor()(pawpaw.Ito(s)) if i.desc == 'number']
+                self.assertEqual([value_type('1234.50'), 12], rv)
+                self.assertIs(value_type, type(rv[0]))
+
+        with self.assertRaises(ValueError):
+            pawpaw.nlp.Number(value_type=int)
+
 
 class TestSentence(_TestIto):
     @dataclass
@@ -193,6 +242,34 @@ class TestSentence(_TestIto):
                 actual = [*sbd(text)]
                 self.assertListEqual(expected, actual)
 
+    def test_fast(self):
+        for fast in False, True:
+            sbd = pawpaw.nlp.Sentence(fast=fast).get_itor()
+            for td in self.test_data:
+                with self.subTest(fast=fast, description=td.description, text=td.text):
+                    text = pawpaw.Ito(td.text)
+                    expected = [*pawpaw.Ito.from_substrings(text, *td.expected, desc='sentence')]
+                    actual = [*sbd(text)]
+                    self.assertListEqual(expected, actual)
+
+    def test_find_boundaries_matches_re(self):
+        texts = [td.text for td in self.test_data]
+        texts.extend([
+            'Yes.\r\n',
+            'Wait...  What?!  “Go!” he said. (Really.) Then 5 left.',
+            'See p. 42 and vol. 3. No. 7 is next.',
+            'Sen. Jones and Lt. Col. Smith met Gen. Lee. It rained.',
+            'John F. Kennedy spoke.\tMcDonald J. Trump\u2009did not. ' * 3,
+            'a..  b. C. D… E. ٣. F',
+        ])
+        re = pawpaw.nlp.Sentence().re
+        for text in texts:
+            for pos, endpos in (0, len(text)), (len(text) // 3, 2 * len(text) // 3), (1, len(text) - 1):
+                with self.subTest(text=text, pos=pos, endpos=endpos):
+                    expected = [m.span() for m in re.finditer(text, pos, endpos)]
+                    actual = list(pawpaw.nlp.Sentence.find_boundaries(text, pos, endpos))
+                    self.assertListEqual(expected, actual)
+
 
 class TestSimpleNlp(_TestIto):
     def test_from_text(self):
@@ -255,3 +332,164 @@ class TestSimpleNlp(_TestIto):
                         else:
                             actual = sum(1 for i in result.find_all(f'**[d:{desc}]'))
                         self.assertEqual(count, actual)
+
+    def test_from_texts(self):
+        nlp = pawpaw.nlp.SimpleNlp()
+        texts = [
+            'Yes',
+            '\tI am.  I was.\r\n\r\n\tI will be.\r\n\r\n',
+            'Does this sentence have 6 or 8 words?',
+            '',
+        ] * 5
+        expected = [nlp.from_text(text) for text in texts]
+        for workers in 1, 2:
+            for chunksize in 1, 3:
+                with self.subTest(workers=workers, chunksize=chunksize):
+                    actual = list(nlp.from_texts(iter(texts), workers=workers, chunksize=chunksize))
+                    self.assertEqual(len(expected), len(actual))
+                    for e, a in zip(expected, actual):
+                        self.assertIs(e.string, a.string)
+                        self.assertListEqual([e, *e.walk_descendants()], [a, *a.walk_descendants()])
+
+    def assertFromTextsMatch(self, nlp: pawpaw.nlp.SimpleNlp, texts: list[str]) -> None:
+        expected = list(nlp.from_texts(texts, workers=1))
+        actual = list(nlp.from_texts(texts, workers=2, chunksize=2))
+        self.assertEqual(len(expected), len(actual))
+        for e, a in zip(expected, actual):
+            e_nodes = [e, *e.walk_descendants()]
+            a_nodes = [a, *a.walk_descendants()]
+            self.assertListEqual(e_nodes, a_nodes)
+            self.assertListEqual([i.value() for i in e_nodes], [i.value() for i in a_nodes])
+            for e_word, a_word in zip(e.find_all('**[d:word]'), a.find_all('**[d:word]')):
+                self.assertIs(type(e_word.children), type(a_word.children))
+                self.assertEqual(getattr(e_word.children, 'is_virtual', False), getattr(a_word.children, 'is_virtual', False))
+
+    def test_from_texts_chars(self):
+        texts = ['It costs 1,234.5 dollars.  Go now!', 'Yes', ''] * 3
+        for fused in False, True:
+            with self.subTest(fused=fused):
+                self.assertFromTextsMatch(pawpaw.nlp.SimpleNlp(chars=True, fused=fused), texts)
+
+    def test_from_texts_value_type(self):
+        texts = ['It costs 1,234.5 dollars.  Or 12 units!', 'Yes', ''] * 3
+        for value_type in float, decimal.Decimal:
+            for fused in False, True:
+                with self.subTest(value_type=value_type, fused=fused):
+                    nlp = pawpaw.nlp.SimpleNlp(number=pawpaw.nlp.Number(value_type=value_type), fused=fused)
+                    self.assertFromTextsMatch(nlp, texts)
+                    doc = next(nlp.from_texts(texts, workers=2))
+                    self.assertEqual([value_type('1234.5'), 12], [i.value() for i in doc.find_all('**[d:number]')])
+
+    def test_from_texts_invalid(self):
+        nlp = pawpaw.nlp.SimpleNlp()
+        for kwargs in {'workers': 0}, {'workers': 1.5}, {'chunksize': 0}, {'chunksize': '1'}:
+            with self.subTest(**kwargs):
+                with self.assertRaises((ValueError, TypeError)):
+                    nlp.from_texts(['a'], **kwargs)
+
+    def test_fused_matches_pipeline(self):
+        texts = [
+            '',
+            'Yes',
+            '\tI am.  I was.\r\n\r\n\tI will be.\r\n\r\n',
+            'Does this sentence have 6 or 8 words?',
+            'Hi -1,234.5e-3 there.  Bye 2x10^5 now!',
+            'abc123 x-5 well-\r\n  known, “don’t” .5 and +7.',
+            'Mr. Smith paid $1,234 on p. 42. John F. Kennedy left.\n\n\n“What?” she asked...  No.',
+        ]
+        for number in pawpaw.nlp.Number(), pawpaw.nlp.Number(thousands_sep="'"), None:
+            pipeline = pawpaw.nlp.SimpleNlp(number)
+            fused = pawpaw.nlp.SimpleNlp(number, fused=True)
+            for text in texts:
+                with self.subTest(number=number, text=text):
+                    expected = pipeline.from_text(text)
+                    actual = fused.from_text(text)
+                    self.assertListEqual([expected, *expected.walk_descendants()], [actual, *actual.walk_descendants()])
+
+    def test_fused_number_values(self):
+        number = pawpaw.nlp.Number(value_type=float)
+        s = 'It costs 1,234.50.  Or 12 units.'
+        expected = pawpaw.nlp.SimpleNlp(number=number).from_text(s)
+        actual = pawpaw.nlp.SimpleNlp(number=number, fused=True).from_text(s)
+        self.assertListEqual([expected, *expected.walk_descendants()], [actual, *actual.walk_descendants()])
+        self.assertEqual([1234.5, 12], [i.value() for i in actual.find_all('**[d:number]')])
+
+    def test_fused_chars(self):
+        actual = pawpaw.nlp.SimpleNlp(chars=True, fused=True).from_text('It’s 42.')
+        words = [*actual.find_all('**[d:word]')]
+        self.assertListEqual(['It’s'], [str(w) for w in words])
+        self.assertListEqual(['I', 't', 's'], [str(c) for c in words[0].children])
+        self.assertTrue(all(c.desc == 'char' for c in words[0].children))
+
+    def test_chars_virtual(self):
+        text = 'It’s 42 o’clock.  Go now!'
+        for fused in False, True:
+            doc = pawpaw.nlp.SimpleNlp(chars=True, fused=fused).from_text(text)
+            with self.subTest(fused=fused):
+                words = [*doc.find_all('**[d:word]')]
+                for word in words:
+                    expected = [c for c in str(word) if c.isalnum()]
+                    self.assertListEqual(expected, [str(c) for c in word.children])
+                    self.assertTrue(all(c.desc == 'char' and c.parent is word for c in word.children))
+                self.assertEqual(0, sum(1 for i in doc.find_all('**[d:number]/*[d:char]')))
+
+                chars = [*doc.find_all('**[d:char]')]
+                self.assertEqual(sum(len(w.children) for w in words), len(chars))
+                self.assertIs(chars[0], words[0].children[0])
+                self.assertEqual(len(chars), sum(1 for i in doc.walk_descendants() if i.desc == 'char'))
+                self.assertListEqual(chars[1:], [*chars[0].find_all('>>>[d:char]')])
+
+    def test_chars_materialized_on_mutation(self):
+        doc = pawpaw.nlp.SimpleNlp(chars=True).from_text('Hello there.')
+        word = doc.find('**[d:word]')
+        first = word.children[0]
+        word.children.remove(word.children[-1])
+        self.assertFalse(word.children.is_virtual)
+        self.assertIs(first, word.children[0])
+        first.desc = 'initial'
+        del first
+
+        self.assertListEqual(['initial', 'char', 'char', 'char'], [c.desc for c in word.children])
+        self.assertEqual('Hell', ''.join(str(c) for c in word.children))
+
+    def test_chars_immutable_until_materialized(self):
+        doc = pawpaw.nlp.SimpleNlp(chars=True, fused=True).from_text('Hello there.')
+        word = doc.find('**[d:word]')
+        c = word.children[0]
+        for name, mutate in {
+            'desc': lambda: setattr(c, 'desc', 'Y'),
+            'value_func': lambda: setattr(c, 'value_func', lambda i: 'H!'),
+            'children': lambda: c.children.add(pawpaw.Ito(c, desc='sub')),
+        }.items():
+            with self.subTest(mutation=name):
+                with self.assertRaises((AttributeError, ValueError)):
+                    mutate()
+        self.assertEqual(c, c.clone())
+
+        word.children.materialize()
+        c.desc = 'Y'
+        c.children.add(pawpaw.Ito(c, desc='sub'))
+        c.value_func = lambda i: 'H!'
+        del c
+        gc.collect()
+
+        c = word.children[0]
+        self.assertEqual('Y', c.desc)
+        self.assertEqual(['sub'], [i.desc for i in c.children])
+        self.assertEqual('H!', c.value())
+
+    def test_chars_not_retained(self):
+        doc = pawpaw.nlp.SimpleNlp(chars=True, fused=True).from_text('Hello there.  Go now!')
+        chars = [i for i in doc.walk_descendants() if i.desc == 'char']
+        self.assertEqual(chars, [*doc.find_all('**[d:char]')])
+        self.assertIs(chars[0], doc.find('**[d:char]'))
+        del chars
+        gc.collect()
+        ids = {id(w.children) for w in doc.find_all('**[d:word]')}
+        self.assertTrue(all(w.children.is_virtual for w in doc.find_all('**[d:word]')))
+        self.assertFalse(any(k[0] in ids for k in _VirtualChildItos._live.keys()))
+
+    def test_chars_pickle(self):
+        doc = pawpaw.nlp.SimpleNlp(chars=True).from_text('Hello there.')
+        rv = pickle.loads(pickle.dumps(doc))
+        self.assertListEqual([doc, *doc.walk_descendants()], [rv, *rv.walk_descendants()])
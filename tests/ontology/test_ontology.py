@@ -1,3 +1,4 @@
+import concurrent.futures
 import itertools
 import typing
 
@@ -7,6 +8,25 @@ from pawpaw.ontology import Ontology
 from tests.util import _TestIto
 
 
+_re_digits = regex.compile(r'\d+')
+
+
+def _digits(ito: pawpaw.Ito) -> pawpaw.Types.C_IT_ITOS:
+    # Module level, so that it can be pickled for process pools
+    for m in _re_digits.finditer(ito.string, ito.start, ito.stop):
+        yield pawpaw.Ito(ito, *m.span(), desc='digits')
+
+
+class _CountingProcessPoolExecutor(concurrent.futures.ProcessPoolExecutor):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.submitted = 0
+
+    def submit(self, *args, **kwargs):
+        self.submitted += 1
+        return super().submit(*args, **kwargs)
+
+
 class TestOntology(_TestIto):
     def setUp(self) -> None:
         super().setUp()
@@ -127,3 +147,38 @@ class TestOntology(_TestIto):
         cessnas = [*itertools.chain.from_iterable(rule(ito) for rule in self.ontology['vehicle']['airplane']['Cessna'].rules)]
         self.assertLess(0, len(cessnas))
         self.assertSequenceEqual(cessnas, discoveries['vehicle']['airplane']['Cessna'].itos)
+
+    def test_discover_executor(self):
+        itos = [
+            pawpaw.Ito('The vehicle John loves to drive most is his F-150, not his Cessna 172.'),
+            pawpaw.Ito('Two vehicles: a Ford Mustang GT, and a 182 Skylane.'),
+            pawpaw.Ito('No matches here.'),
+        ]
+        expected = self.ontology.discover(*itos)
+        with concurrent.futures.ThreadPoolExecutor(4) as executor:
+            for chunksize in 1, 2, 5:
+                with self.subTest(chunksize=chunksize):
+                    actual = self.ontology.discover(*itos, executor=executor, chunksize=chunksize)
+                    self.assertEqual(str(expected), str(actual))
+                    self.assertEqual(expected.flatten(), actual.flatten())
+
+    def test_discover_process_pool(self):
+        ontology = Ontology({'a': Ontology(rules=[_digits])}, rules=[_digits, _digits])
+        itos = [pawpaw.Ito('a 12 b 345'), pawpaw.Ito('6 7', 1)]
+        expected = ontology.discover(*itos)
+        with _CountingProcessPoolExecutor(2) as executor:
+            actual = ontology.discover(*itos, executor=executor)
+            self.assertEqual(len(itos), executor.submitted)  # one task per chunk, for all rules
+        self.assertEqual(expected.flatten(), actual.flatten())
+        strings = {id(i.string) for i in itos}
+        self.assertTrue(all(id(i.string) in strings for i in actual.walk()))
+
+    def test_discover_executor_invalid(self):
+        ito = pawpaw.Ito('abc')
+        with self.assertRaises(TypeError):
+            self.ontology.discover(ito, executor=1)
+        with concurrent.futures.ThreadPoolExecutor(1) as executor:
+            for chunksize in 0, 1.5:
+                with self.subTest(chunksize=chunksize):
+                    with self.assertRaises((TypeError, ValueError)):
+                        self.ontology.discover(ito, executor=executor, chunksize=chunksize)
@@ -1,3 +1,4 @@
+import concurrent.futures
 import itertools
 import typing
 
@@ -163,6 +164,40 @@ class TestItoQuery(TestItoTraversal):
                 rv = [*self.root.find_all(path)]
                 self.assertListEqual(expected, rv)
 
+    def test_axis_merge(self):
+        non_leaves: list[Ito] = [self.root]
+        non_leaves.extend(i for i in self.root.walk_descendants() if len(i.children) != 0)
+
+        for order in '', '+', '-':
+            path = f'***/{order}...#'
+            with self.subTest(path=path):
+                expected = non_leaves if order == '-' else non_leaves[::-1]
+                actual = [*self.root.find_all(path)]
+                self.assertEqual(len(expected), len(actual))
+                for e, a in zip(expected, actual):
+                    self.assertIs(e, a)
+
+        for order in '', '+', '-':
+            path = f'*/{order}**#'
+            with self.subTest(path=path):
+                expected = [*self.root.walk_descendants(order == '-')]
+                expected = [i for i in expected if i.parent is not self.root]
+                actual = [*self.root.find_all(path)]
+                self.assertListEqual(expected, actual)
+
+    def test_merge_unique(self):
+        descendants = [*self.root.walk_descendants()]
+        evens = descendants[::2]
+        threes = descendants[::3]
+        actual = [*pawpaw.query.merge_unique(evens, threes, evens)]
+        expected = [d for i, d in enumerate(descendants) if i % 2 == 0 or i % 3 == 0]
+        self.assertEqual(len(expected), len(actual))
+        for e, a in zip(expected, actual):
+            self.assertIs(e, a)
+
+        actual = [*pawpaw.query.merge_unique(evens[::-1], threes[::-1], reverse=True)]
+        self.assertListEqual(expected[::-1], actual)
+
     def test_axis_children(self):
         for node_type, node in {'root': self.root, 'leaf': self.leaf}.items():
             for order in '', '+', '-':
@@ -370,6 +405,82 @@ class TestItoQuery(TestItoTraversal):
 
     # endregion
 
+    # region explain & profile
+
+    def test_explain(self):
+        query = pawpaw.query.compile('**[d:word]{*[s:e]}/..')
+        lines = query.explain().splitlines()
+        self.assertEqual("query: '**[d:word]{*[s:e]}/..'", lines[0])
+        self.assertEqual(2, sum(1 for line in lines if line.startswith('  phrase:')))
+        self.assertIn("    filter: '[d:word]'", lines)
+        self.assertIn("      query: '*[s:e]'", lines)
+
+    def test_profile(self):
+        path = '**[d:word]{*[s:e]}/*'
+        query = pawpaw.query.compile(path)
+        profile = query.profile(self.root)
+        self.assertListEqual([*query.find_all(self.root)], profile.results)
+        self.assertEqual(2, len(profile.phrases))
+
+        words = [i for i in self.root.walk_descendants() if i.desc == 'word']
+        words_with_e = [w for w in words if 'e' in str(w)]
+        first = profile.phrases[0]
+        self.assertEqual(self.descendants_count, first.candidates)
+        self.assertEqual(len(words), first.filtered)
+        self.assertEqual(len(words), first.subquery_calls)
+        self.assertEqual(len(words_with_e), first.passed)
+
+        second = profile.phrases[1]
+        self.assertEqual(len(profile.results), second.candidates)
+        self.assertEqual(len(profile.results), second.passed)
+        self.assertEqual(0, second.subquery_calls)
+        self.assertLessEqual(0, profile.seconds)
+
+    # endregion
+
+    # region find_all_many
+
+    def test_find_all_many(self):
+        roots = [self.root.clone() for i in range(5)]
+        path = '**[d:word]/*[i:0,2]'
+        query = pawpaw.query.compile(path)
+        expected = [(r, i) for r in roots for i in query.find_all(r)]
+
+        executors = {
+            'serial': None,
+            'thread': concurrent.futures.ThreadPoolExecutor(max_workers=3),
+            'process': concurrent.futures.ProcessPoolExecutor(max_workers=2),
+        }
+        for name, executor in executors.items():
+            with self.subTest(executor=name):
+                actual = [*query.find_all_many(roots, executor=executor, chunksize=2)]
+                self.assertEqual(len(expected), len(actual))
+                for (e_root, e_ito), a in zip(expected, actual):
+                    self.assertIs(e_root, a.root)
+                    self.assertIs(e_ito, a.ito)
+            if executor is not None:
+                executor.shutdown()
+
+    def test_find_all_many_outside_root(self):
+        roots = [*self.root.children]
+        with concurrent.futures.ProcessPoolExecutor(max_workers=2) as executor:
+            for path in '>', '<', '..', '...', '>>>[d:phrase]/**[d:char]':
+                with self.subTest(path=path):
+                    query = pawpaw.query.compile(path)
+                    expected = [*query.find_all_many(roots)]
+                    self.assertLess(0, len(expected))
+                    actual = [*query.find_all_many(roots, executor=executor, chunksize=2)]
+                    self.assertEqual(len(expected), len(actual))
+                    for e, a in zip(expected, actual):
+                        self.assertIs(e.root, a.root)
+                        self.assertIs(e.ito, a.ito)
+
+    def test_find_all_many_invalid_executor(self):
+        with self.assertRaises(TypeError):
+            [*pawpaw.query.find_all_many('*', [self.root], executor=object())]
+
+    # endregion
+
     # region filter
     
     # region filter desc
@@ -582,7 +693,34 @@ class TestItoQuery(TestItoTraversal):
                         self.assertSequenceEqual(expected, actual)  
 
     # endregion    
-    
+
+    # region filter string regex
+
+    def test_filter_string_regex_scalar(self):
+        for node_type, node in {'root': self.root}.items():
+            for pat in r'\d+', r'[a-z]+', r'T.*', r'(?i)t.*':
+                for not_ in '', '~':
+                    path = f'**[{not_}sre:{pawpaw.query.escape(pat)}]'
+                    with self.subTest(node=node_type, path=path):
+                        expected = [d for d in node.walk_descendants() if (regex.fullmatch(pat, str(d)) is None) == (not_ == '~')]
+                        actual = [*node.find_all(path)]
+                        self.assertSequenceEqual(expected, actual)
+
+    def test_filter_string_regex_multiple(self):
+        for node_type, node in {'root': self.root}.items():
+            pats = r'\d{2}', r'e.*', r'[A-Z]+'
+            path = f'**[sre:{",".join(pawpaw.query.escape(p) for p in pats)}]'
+            with self.subTest(node=node_type, path=path):
+                expected = [d for d in node.walk_descendants() if any(regex.fullmatch(p, str(d)) for p in pats)]
+                actual = [*node.find_all(path)]
+                self.assertSequenceEqual(expected, actual)
+
+    def test_filter_string_regex_invalid(self):
+        with self.assertRaises(ValueError):
+            pawpaw.query.compile(f'**[sre:{pawpaw.query.escape("(")}]')
+
+    # endregion
+
     # region filter index
                 
     def test_filter_index_scalar(self):
@@ -741,6 +879,39 @@ class TestItoQuery(TestItoTraversal):
                     msg = str(cm.exception)
                     self.assertTrue(all(w in msg for w in ['path', 'empty']))
 
+    def test_subquery_memoized(self):
+        calls = 0
+        def counter(ec) -> bool:
+            nonlocal calls
+            calls += 1
+            return False
+
+        parents = {id(leaf.parent): leaf.parent for leaf in self.leaves}.values()
+        path = '***/..{*[p:counter]}'
+        rv = [*self.root.find_all(path, predicates={'counter': counter})]
+        self.assertListEqual([], rv)
+        self.assertEqual(sum(len(p.children) for p in parents), calls)
+
+        # Memo is scoped to a single run
+        calls = 0
+        [*self.root.find_all(path, predicates={'counter': counter})]
+        self.assertEqual(sum(len(p.children) for p in parents), calls)
+
+    def test_subquery_memoized_nested(self):
+        path = '***/...{**{*[d:digit]}}'
+        expected = [
+            a
+            for leaf in self.leaves
+            for a in leaf.find_all('...')
+            if any(d.desc == 'digit' for c in a.walk_descendants() for d in c.children)
+        ]
+        actual = [*self.root.find_all(path)]
+        self.assertListEqual(expected, actual)
+
+        profile = pawpaw.query.compile(path).profile(self.root)
+        self.assertListEqual(expected, profile.results)
+        self.assertLess(0, profile.phrases[1].subquery_hits)
+
     def test_subquery_identity(self):
         for node_type, node in {'root': self.root}.items():
             for path in '.{.}', '.({.})', '.({.} & {.})':
@@ -0,0 +1,99 @@
+import io
+import json
+
+from pawpaw import Ito
+from pawpaw.serialization import binary
+from tests.util import _TestIto
+
+
+class TestBinary(_TestIto):
+    def setUp(self) -> None:
+        super().setUp()
+
+        s = 'See Jack run.  See Jill ñun.'
+        self.h_ito = Ito(s, desc='Phrase')
+        self.h_ito.children.add(*self.h_ito.str_split())
+        for c in self.h_ito.children:
+            c.desc = 'Word'
+            self.add_chars_as_children(c, 'Char')
+        self.h_ito.children[-1].children[-1].desc = None
+
+    def assertTreesEqual(self, expected: Ito, actual: Ito) -> None:
+        self.assertEqual(expected, actual)
+        self.assertListEqual([*expected.walk_descendants()], [*actual.walk_descendants()])
+        for e, a in zip(expected.walk_descendants(), actual.walk_descendants()):
+            self.assertEqual(e.parent, a.parent)
+
+    def test_round_trip(self):
+        for stringless in False, True:
+            for full_tree in False, True:
+                for ito in self.h_ito, self.h_ito.children[1], self.h_ito.find('**[d:Char]'):
+                    with self.subTest(stringless=stringless, full_tree=full_tree, ito=ito):
+                        data = binary.dumps(ito, stringless=stringless, full_tree=full_tree)
+                        rv = binary.loads(data, string=self.h_ito.string if stringless else None)
+                        self.assertIsNot(ito, rv)
+                        self.assertEqual(ito, rv)
+                        if full_tree:
+                            self.assertTreesEqual(ito, rv)
+                            self.assertEqual(ito.path, rv.path)
+                            self.assertTreesEqual(self.h_ito, rv.get_root())
+                        else:
+                            self.assertIsNone(rv.parent)
+                            self.assertEqual(0, len(rv.children))
+
+    def test_matches_json(self):
+        word = self.h_ito.find('**[d:Word]')
+        for full_tree in False, True:
+            with self.subTest(full_tree=full_tree):
+                json_data = json.dumps(word, cls=Ito.JsonEncoder, full_tree=full_tree)
+                from_json = json.loads(json_data, object_hook=Ito.JsonDecoderHook())
+                from_binary = binary.loads(binary.dumps(word, full_tree=full_tree))
+                self.assertTreesEqual(from_json.get_root(), from_binary.get_root())
+                self.assertEqual(from_json.path, from_binary.path)
+
+    def test_smaller_than_json(self):
+        word = self.h_ito.find('**[d:Word]')
+        self.assertLess(
+            len(binary.dumps(word)),
+            len(json.dumps(word, cls=Ito.JsonEncoder).encode())
+        )
+
+    def test_stream(self):
+        itos = [*self.h_ito.children]
+        with io.BytesIO() as fs:
+            for ito in itos:
+                binary.dump(fs, ito)
+            fs.seek(0)
+            for ito in itos:
+                self.assertTreesEqual(ito, binary.load(fs))
+            self.assertEqual(b'', fs.read())
+
+    def test_stringless_requires_string(self):
+        data = binary.dumps(self.h_ito, stringless=True)
+        with self.assertRaises(ValueError):
+            binary.loads(data)
+
+    def test_invalid_data(self):
+        data = binary.dumps(self.h_ito)
+        for name, bad in {
+            'magic': b'XXXX' + data[4:],
+            'version': data[:4] + bytes((255,)) + data[5:],
+            'truncated': data[:-5],
+        }.items():
+            with self.subTest(corruption=name):
+                with self.assertRaises(ValueError):
+                    binary.loads(bad)
+
+        with self.subTest(corruption='overlap'):
+            root = Ito('abcdef')
+            root.children.add(Ito(root, 0, 3), Ito(root, 3, 6))
+            data = bytearray(binary.dumps(root))
+            # lengths column is the last column before the path; widen the first child past its sibling
+            data[-3] = 4
+            with self.assertRaises(ValueError):
+                binary.loads(bytes(data))
+
+        with self.subTest(corruption='span'):
+            data = binary.dumps(self.h_ito, stringless=True)
+            with self.assertRaises(ValueError):
+                binary.loads(data, string=self.h_ito.string[:5])
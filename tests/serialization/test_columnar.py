@@ -0,0 +1,88 @@
+import array
+import unittest
+
+from pawpaw import Ito
+from pawpaw.serialization import columnar
+from tests.util import _TestIto
+
+
+class TestColumnar(_TestIto):
+    def setUp(self) -> None:
+        super().setUp()
+
+        s = 'See Jack run.  See Jill ñun.'
+        self.h_ito = Ito(s, desc='Phrase')
+        self.h_ito.children.add(*self.h_ito.str_split())
+        for c in self.h_ito.children:
+            c.desc = 'Word'
+            self.add_chars_as_children(c, 'Char')
+        self.h_ito.children[-1].children[-1].desc = None
+
+    def test_rows(self):
+        rv = columnar.to_columns(self.h_ito, substr=True)
+        expected = [(self.h_ito, None, 0)]
+        expected.extend((ito, ito.parent, 1 if ito.parent is self.h_ito else 2) for ito in self.h_ito.walk_descendants())
+        self.assertEqual(len(expected), len(rv))
+        self.assertListEqual([*range(len(expected))], [*rv.node_id])
+        self.assertTrue(all(d == 0 for d in rv.doc_id))
+
+        rows = [ito for ito, parent, depth in expected]
+        for i, (ito, parent, depth) in enumerate(expected):
+            with self.subTest(row=i):
+                self.assertEqual(-1 if parent is None else rows.index(parent), rv.parent_id[i])
+                self.assertEqual(depth, rv.depth[i])
+                self.assertEqual(ito.desc, rv.desc[i])
+                self.assertEqual(ito.span, (rv.start[i], rv.stop[i]))
+                self.assertEqual(str(ito), rv.substr[i])
+
+    def test_buffers(self):
+        rv = columnar.to_columns(self.h_ito)
+        for name in 'doc_id', 'node_id', 'parent_id', 'depth', 'desc_index', 'start', 'stop':
+            with self.subTest(column=name):
+                col = getattr(rv, name)
+                self.assertIsInstance(col, array.array)
+                self.assertEqual(len(rv), len(memoryview(col)))
+        self.assertIsNone(rv.substr)
+        self.assertIsNone(rv.descs[0])
+        self.assertEqual(len(set(rv.descs)), len(rv.descs))
+
+    def test_multiple_docs(self):
+        words = [*self.h_ito.children]
+        for doc_ids in None, [10 * i for i in range(len(words))]:
+            with self.subTest(doc_ids=doc_ids):
+                rv = columnar.to_columns(*words, doc_ids=doc_ids)
+                self.assertEqual(sum(1 + len(w.children) for w in words), len(rv))
+                expected = []
+                for i, w in enumerate(words):
+                    expected.extend([i if doc_ids is None else doc_ids[i]] * (1 + len(w.children)))
+                self.assertListEqual(expected, [*rv.doc_id])
+                self.assertEqual(len(words), sum(1 for p in rv.parent_id if p == -1))
+
+        with self.assertRaises(ValueError):
+            columnar.to_columns(*words, doc_ids=[1])
+
+    def test_to_dict(self):
+        for substr in False, True:
+            with self.subTest(substr=substr):
+                rv = columnar.to_columns(self.h_ito, substr=substr).to_dict()
+                expected = [*columnar.Columns.NAMES]
+                if not substr:
+                    expected.remove('substr')
+                self.assertListEqual(expected, [*rv.keys()])
+
+    def test_invalid_ito(self):
+        with self.assertRaises(TypeError):
+            columnar.to_columns(self.h_ito, 'abc')
+
+    def test_to_pandas(self):
+        try:
+            import pandas
+        except ImportError:
+            with self.assertRaises(ImportError):
+                columnar.to_columns(self.h_ito).to_pandas()
+            raise unittest.SkipTest('pandas is not installed')
+
+        rv = columnar.to_columns(self.h_ito, substr=True)
+        df = rv.to_pandas()
+        self.assertEqual(len(rv), len(df))
+        self.assertListEqual(rv.desc, [None if pandas.isna(d) else d for d in df['desc']])
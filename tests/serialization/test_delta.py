@@ -0,0 +1,91 @@
+import random
+
+import regex
+
+from pawpaw import Ito
+from pawpaw.serialization import delta
+from tests.util import _TestIto
+
+
+class TestDelta(_TestIto):
+    _re_word = regex.compile(r'(?P<word>(?P<char>\w)+)', regex.DOTALL)
+
+    @classmethod
+    def parse(cls, string: str) -> Ito:
+        rv = Ito(string, desc='doc')
+        rv.children.add(*Ito.from_re(cls._re_word, rv))
+        return rv
+
+    def setUp(self) -> None:
+        super().setUp()
+        rnd = random.Random(0)
+        self.words = [''.join(rnd.choice('abcdefg') for j in range(rnd.randint(1, 8))) for i in range(500)]
+        self.base = self.parse(' '.join(self.words))
+
+    def assertTreesEqual(self, expected: Ito, actual: Ito) -> None:
+        self.assertEqual(expected.string, actual.string)
+        self.assertEqual(expected, actual)
+        self.assertListEqual([*expected.walk_descendants()], [*actual.walk_descendants()])
+        for e, a in zip(expected.walk_descendants(), actual.walk_descendants()):
+            self.assertEqual(e.parent, a.parent)
+
+    def edits(self) -> dict[str, str]:
+        s = self.base.string
+        mid = len(s) // 2
+        return {
+            'none': s,
+            'insert char': s[:mid] + 'x' + s[mid:],
+            'insert word': s[:mid] + ' new words ' + s[mid:],
+            'delete': s[:mid] + s[mid + 20:],
+            'replace': s[:mid] + 'zzz' + s[mid + 3:],
+            'prepend': 'start ' + s,
+            'append': s + ' end',
+            'clear': '',
+        }
+
+    def test_round_trip(self):
+        for name, string in self.edits().items():
+            with self.subTest(edit=name):
+                new = self.parse(string)
+                d = delta.diff(self.base, new)
+                self.assertTreesEqual(new, delta.apply(self.base, d))
+                self.assertTreesEqual(new, delta.apply(self.base, delta.loads(delta.dumps(d))))
+
+    def test_size_proportional_to_edit(self):
+        s = self.base.string
+        mid = len(s) // 2
+        new = self.parse(s[:mid] + 'x' + s[mid:])
+        d = delta.diff(self.base, new)
+        self.assertEqual('x', d.inserted)
+        self.assertEqual(0, d.removed)
+        self.assertLess(len(d.nodes), 10)
+        self.assertLess(len(delta.dumps(d)), len(s) // 10)
+
+    def test_versions(self):
+        rnd = random.Random(1)
+        versions = [self.base]
+        for i in range(10):
+            s = versions[-1].string
+            j = rnd.randrange(len(s))
+            versions.append(self.parse(s[:j] + rnd.choice(['', ' ', 'q', ' qq ']) + s[j + rnd.randint(0, 3):]))
+        deltas = [delta.diff(a, b) for a, b in zip(versions, versions[1:])]
+        self.assertTreesEqual(versions[-1], delta.apply(self.base, *deltas))
+
+    def test_unrelated_trees(self):
+        new = self.parse('completely different text')
+        self.assertTreesEqual(new, delta.apply(self.base, delta.diff(self.base, new)))
+
+    def test_wrong_base(self):
+        s = self.base.string
+        d = delta.diff(self.base, self.parse(s + ' end'))
+        for name, base in {
+            'string': self.parse(s[::-1]),
+            'tree': Ito(s),
+        }.items():
+            with self.subTest(base=name):
+                with self.assertRaises(ValueError):
+                    delta.apply(base, d)
+
+    def test_invalid_type(self):
+        with self.assertRaises(TypeError):
+            delta.diff(self.base, self.base.string)
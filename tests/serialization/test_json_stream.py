@@ -0,0 +1,108 @@
+import io
+import json
+
+from pawpaw import Ito
+from pawpaw.serialization import json_stream
+from tests.util import _TestIto
+
+
+class TestJsonStream(_TestIto):
+    def setUp(self) -> None:
+        super().setUp()
+
+        s = 'See Jack run.  See Jill ñun "fast\\".'
+        self.h_ito = Ito(s, desc='Phrase')
+        self.h_ito.children.add(*self.h_ito.str_split())
+        for c in self.h_ito.children:
+            c.desc = 'Word'
+            self.add_chars_as_children(c, 'Char')
+        self.h_ito.children[-1].children[-1].desc = None
+
+    def assertTreesEqual(self, expected: Ito, actual: Ito) -> None:
+        self.assertEqual(expected, actual)
+        self.assertListEqual([*expected.walk_descendants()], [*actual.walk_descendants()])
+
+    def test_dumps_matches_json_encoder(self):
+        for stringless in False, True:
+            for full_tree in False, True:
+                for indent in None, 0, 2, '\t':
+                    for ensure_ascii in False, True:
+                        for ito in self.h_ito, self.h_ito.children[1], self.h_ito.find('**[d:Char]'):
+                            with self.subTest(stringless=stringless, full_tree=full_tree, indent=indent, ensure_ascii=ensure_ascii, ito=ito):
+                                expected = json.dumps(
+                                    ito,
+                                    cls=Ito.JsonEncoder,
+                                    stringless=stringless,
+                                    full_tree=full_tree,
+                                    indent=indent,
+                                    ensure_ascii=ensure_ascii
+                                )
+                                actual = json_stream.dumps(ito, stringless, full_tree, indent=indent, ensure_ascii=ensure_ascii, chunk_size=7)
+                                self.assertEqual(expected, actual)
+
+    def test_dumps_separators(self):
+        word = self.h_ito.children[1]
+        expected = json.dumps(word, cls=Ito.JsonEncoder, separators=(',', ':'))
+        self.assertEqual(expected, json_stream.dumps(word, separators=(',', ':')))
+
+    def test_round_trip(self):
+        for stringless in False, True:
+            for full_tree in False, True:
+                for indent in None, 2:
+                    for chunk_size in 1, 5, json_stream.DEFAULT_CHUNK_SIZE:
+                        for ito in self.h_ito, self.h_ito.children[1], self.h_ito.find('**[d:Char]'):
+                            with self.subTest(stringless=stringless, full_tree=full_tree, indent=indent, chunk_size=chunk_size, ito=ito):
+                                data = json_stream.dumps(ito, stringless, full_tree, indent=indent)
+                                with io.StringIO(data) as fs:
+                                    rv = json_stream.load(fs, string=self.h_ito.string if stringless else None, chunk_size=chunk_size)
+                                self.assertIsNot(ito, rv)
+                                if full_tree:
+                                    self.assertTreesEqual(ito, rv)
+                                    self.assertEqual(ito.path, rv.path)
+                                    self.assertTreesEqual(self.h_ito, rv.get_root())
+                                else:
+                                    self.assertEqual(ito, rv)
+                                    self.assertIsNone(rv.parent)
+                                    self.assertEqual(0, len(rv.children))
+
+    def test_load_matches_json_decoder_hook(self):
+        word = self.h_ito.children[1]
+        data = json.dumps(word, cls=Ito.JsonEncoder, indent=4)
+        expected = json.loads(data, object_hook=Ito.JsonDecoderHook())
+        actual = json_stream.loads(data)
+        self.assertTreesEqual(expected.get_root(), actual.get_root())
+        self.assertEqual(expected.path, actual.path)
+
+    def test_deep_tree(self):
+        depth = 5000
+        root = cur = Ito('x' * depth)
+        for i in range(1, depth):
+            child = Ito(cur, 1)
+            cur.children.add(child)
+            cur = child
+
+        data = json_stream.dumps(root, stringless=True)
+        rv = json_stream.loads(data, string=root.string)
+        for i in range(depth):
+            self.assertEqual(i, rv.start)
+            rv = rv.children[0] if len(rv.children) > 0 else None
+        self.assertIsNone(rv)
+
+    def test_stringless_requires_string(self):
+        data = json_stream.dumps(self.h_ito, stringless=True)
+        with self.assertRaises(ValueError):
+            json_stream.loads(data)
+
+    def test_invalid_data(self):
+        data = json_stream.dumps(self.h_ito)
+        for name, bad in {
+            'not an object': '[]',
+            'type': data.replace('pawpaw.ito.Ito', 'xyz', 1),
+            'version': data.replace('"__version__": "', '"__version__": "0', 1),
+            'truncated': data[:-5],
+            'extra data': data + '{}',
+            'unordered': data.replace('"span": [0, 3]', '"span": [9, 10]', 1),
+        }.items():
+            with self.subTest(corruption=name):
+                with self.assertRaises(ValueError):
+                    json_stream.loads(bad)
@@ -0,0 +1,87 @@
+import concurrent.futures
+import pickle
+
+from pawpaw import Ito
+from pawpaw.serialization import shared_documents
+from tests.util import _TestIto
+
+
+def _split_words(name: str, start: int, stop: int) -> list[tuple]:
+    sentence = Ito(shared_documents.get_string(name), start, stop)
+    words = [*sentence.str_split()]
+    for w in words:
+        w.desc = 'word'
+        w.children.add(*(Ito(w, i, i + 1, 'char') for i in range(len(w))))
+    return shared_documents.to_span_tables(*words)
+
+
+class TestSharedDocuments(_TestIto):
+    def setUp(self) -> None:
+        super().setUp()
+
+        s = 'See Jack run.  See Jill ñun.'
+        self.doc = Ito(s, desc='doc')
+        self.doc.children.add(Ito(s, 0, 13, 'sentence'), Ito(s, 15, len(s), 'sentence'))
+
+    def expected(self) -> Ito:
+        rv = self.doc.clone()
+        for sentence in rv.children:
+            words = [*sentence.str_split()]
+            for w in words:
+                w.desc = 'word'
+                w.children.add(*(Ito(w, i, i + 1, 'char') for i in range(len(w))))
+            sentence.children.add(*words)
+        return rv
+
+    def test_register(self):
+        with shared_documents.SharedDocuments() as docs:
+            name = docs.register(self.doc.string)
+            self.assertIn(name, docs)
+            self.assertEqual(1, len(docs))
+            self.assertEqual(self.doc.string, shared_documents.get_string(name))
+            docs.unregister(name)
+            self.assertEqual(0, len(docs))
+            with self.assertRaises(KeyError):
+                docs.unregister(name)
+
+    def test_register_empty(self):
+        with shared_documents.SharedDocuments() as docs:
+            self.assertEqual('', shared_documents.get_string(docs.register('')))
+
+    def test_register_invalid(self):
+        with shared_documents.SharedDocuments() as docs:
+            with self.assertRaises(TypeError):
+                docs.register(b'abc')
+
+    def test_close(self):
+        docs = shared_documents.SharedDocuments()
+        docs.register('abc')
+        docs.register('def')
+        docs.close()
+        self.assertEqual(0, len(docs))
+
+    def test_span_tables_round_trip(self):
+        expected = self.expected()
+        tables = shared_documents.to_span_tables(*expected.children)
+        tables = pickle.loads(pickle.dumps(tables))
+        actual = shared_documents.from_span_tables(self.doc.string, tables)
+        self.assertListEqual([*expected.children], actual)
+        for e, a in zip(expected.children, actual):
+            self.assertListEqual([*e.walk_descendants()], [*a.walk_descendants()])
+
+    def test_from_span_tables_out_of_bounds(self):
+        tables = shared_documents.to_span_tables(self.doc)
+        with self.assertRaises(ValueError):
+            shared_documents.from_span_tables(self.doc.string[:5], tables)
+
+    def test_attach_from_workers(self):
+        expected = self.expected()
+        with shared_documents.SharedDocuments() as docs, concurrent.futures.ProcessPoolExecutor(2) as executor:
+            name = docs.register(self.doc.string)
+            futures = [executor.submit(_split_words, name, *s.span) for s in self.doc.children]
+            for sentence, future in zip(self.doc.children, futures):
+                added = shared_documents.attach(sentence, future.result())
+                self.assertTrue(all(a.parent is sentence for a in added))
+                self.assertTrue(all(a.string is self.doc.string for a in added))
+
+        self.assertListEqual([*expected.walk_descendants()], [*self.doc.walk_descendants()])
@@ -1,6 +1,3 @@
-import sys
-# Force Python XML parser, not faster C version so that we can hook methods
-sys.modules['_elementtree'] = None
 import xml.etree.ElementTree as ET
 
 import pawpaw
@@ -113,3 +110,137 @@ class TestXmlHelper(_TestIto):
 
                 actual = xml.XmlHelper.reverse_find(desc, anc_pred)
                 self.assertIsNotNone(actual)
+
+    def test_indexed_lookups_match_unindexed(self):
+        for sample_index, sample in enumerate(XML_TEST_SAMPLES):
+            plain = ET.fromstring(sample.xml, xml.XmlParser())
+            indexed = ET.fromstring(sample.xml, xml.XmlParser(index=True))
+            self.assertIsNone(xml.XmlHelper.get_element_index(plain))
+            self.assertIsNotNone(xml.XmlHelper.get_element_index(indexed))
+
+            pairs = list(zip(plain.iter(), indexed.iter()))
+            for p, i in pairs:
+                with self.subTest(xml_sample_index=sample_index, tag=p.tag):
+                    p_parent = xml.XmlHelper.get_parent_element(p)
+                    i_parent = xml.XmlHelper.get_parent_element(i)
+                    self.assertEqual(None if p_parent is None else p_parent.ito.span, None if i_parent is None else i_parent.ito.span)
+
+                    local_name = xml.XmlHelper.get_local_name(p)
+                    self.assertListEqual(
+                        [e.ito.span for e in xml.XmlHelper.find_all_descendants_by_local_name(plain, local_name)],
+                        [e.ito.span for e in xml.XmlHelper.find_all_descendants_by_local_name(indexed, local_name)])
+                    self.assertListEqual(
+                        [e.ito.span for e in xml.XmlHelper.find_all_descendants_by_local_name(p, local_name)],
+                        [e.ito.span for e in xml.XmlHelper.find_all_descendants_by_local_name(i, local_name)])
+
+            desc_path, anc_pred = sample.descendant_path_with_ancestor_predicate
+            with self.subTest(xml_sample_index=sample_index, descendant_path=desc_path, ancestor_predicate=anc_pred):
+                expected = xml.XmlHelper.reverse_find(plain.find(desc_path), anc_pred)
+                actual = xml.XmlHelper.reverse_find(indexed.find(desc_path), anc_pred)
+                self.assertEqual(expected.ito.span, actual.ito.span)
+
+
+class TestNamespaceScope(_TestIto):
+    def test_scopes_shared_until_declared(self):
+        text = '<a xmlns="http://x" xmlns:p="http://p"><b><p:c xmlns:q="http://q" xmlns="" q:id="1"><d/></p:c></b></a>'
+        root = ET.fromstring(text, xml.XmlParser())
+        b = root[0]
+        c = b[0]
+        d = c[0]
+
+        root_scope = xml.XmlHelper.get_namespace_scope(root)
+        self.assertIs(root, root_scope.owner)
+        self.assertIsNone(root_scope.parent)
+        self.assertIs(root_scope, xml.XmlHelper.get_namespace_scope(b))
+
+        c_scope = xml.XmlHelper.get_namespace_scope(c)
+        self.assertIs(root_scope, c_scope.parent)
+        self.assertIs(c_scope, xml.XmlHelper.get_namespace_scope(d))
+
+        self.assertEqual('http://p', c_scope.resolve('p'))
+        self.assertEqual('http://q', c_scope.resolve('q'))
+        self.assertIsNone(root_scope.resolve('q'))
+        self.assertDictEqual({'': 'http://x', 'p': 'http://p'}, root_scope.in_scope())
+        self.assertDictEqual({'p': 'http://p', 'q': 'http://q'}, c_scope.in_scope())
+
+        self.assertEqual('{http://x}', xml.XmlHelper.get_default_namespace(b))
+        self.assertIsNone(xml.XmlHelper.get_default_namespace(d))
+
+        self.assertDictEqual({}, xml.XmlHelper.get_xmlns(b))
+        self.assertEqual(
+            {'xmlns:q': 'http://q', 'xmlns': ''},
+            {str(k): str(v) for k, v in xml.XmlHelper.get_xmlns(c).items()}
+        )
+
+    def test_default_namespace_undeclared(self):
+        root = ET.fromstring('<a xmlns="http://x"><b xmlns=""><c/></b><d/></a>', xml.XmlParser())
+        b, d = root
+        c = b[0]
+        self.assertIsNone(xml.XmlHelper.get_namespace_scope(b).default_namespace)
+        self.assertEqual('{http://x}', xml.XmlHelper.get_default_namespace(root))
+        self.assertEqual('{http://x}', xml.XmlHelper.get_default_namespace(d))
+        for e in b, c:
+            self.assertIsNone(xml.XmlHelper.get_default_namespace(e))
+            scope = e.__dict__.pop('_ns_scope')
+            try:
+                self.assertIsNone(xml.XmlHelper.get_default_namespace(e))
+            finally:
+                e._ns_scope = scope
+
+    def test_no_namespaces(self):
+        root = ET.fromstring('<a><b/></a>', xml.XmlParser())
+        self.assertIsNone(xml.XmlHelper.get_namespace_scope(root))
+        self.assertIsNone(xml.XmlHelper.get_default_namespace(root[0]))
+        self.assertDictEqual({}, xml.XmlHelper.get_prefix_map(root))
+
+    def test_matches_unscoped(self):
+        for sample_index, sample in enumerate(XML_TEST_SAMPLES):
+            with self.subTest(xml_sample_index=sample_index):
+                root = ET.fromstring(sample.xml, xml.XmlParser())
+                for e in root.iter():
+                    helper = xml.XmlHelper
+                    scoped = (helper.get_xmlns(e), helper.get_prefix_map(e), helper.get_default_namespace(e))
+                    scope = e.__dict__.pop('_ns_scope')
+                    try:
+                        unscoped = (helper.get_xmlns(e), helper.get_prefix_map(e), helper.get_default_namespace(e))
+                    finally:
+                        e._ns_scope = scope
+                    self.assertEqual(unscoped[0], scoped[0])
+                    self.assertEqual(unscoped[1], scoped[1])
+                    self.assertEqual(None if unscoped[2] is None else str(unscoped[2]), scoped[2])
+
+    def test_tag_value_cached(self):
+        root = ET.fromstring('<p:a xmlns:p="http://p"/>', xml.XmlParser())
+        tag = root.ito.find(f'**[d:{xml.descriptors.TAG}]')
+        self.assertEqual(xml.QualifiedName.from_src(tag), tag.value())
+        self.assertIs(tag.value(), tag.value())
+
+
+class TestElementIndex(_TestIto):
+    def test_find_all(self):
+        text = '<r xmlns:a="u" xmlns:b="u"><a:x><x/></a:x><b:x><y><x/></y></b:x></r>'
+        root = ET.fromstring(text, xml.XmlParser(index=True))
+        index = xml.XmlHelper.get_element_index(root)
+        self.assertEqual(6, len(index))
+        self.assertIs(root, index.root)
+
+        self.assertListEqual(['<a:x><x/></a:x>', '<x/>', '<b:x><y><x/></y></b:x>', '<x/>'], [str(e.ito) for e in index.find_all_by_local_name('x')])
+        self.assertListEqual(['<a:x><x/></a:x>', '<b:x><y><x/></y></b:x>'], [str(e.ito) for e in index.find_all_by_tag('{u}x')])
+        self.assertListEqual(['<b:x><y><x/></y></b:x>'], [str(e.ito) for e in index.find_all_by_qualified_name('b:x')])
+        self.assertListEqual([], index.find_all_by_tag('z'))
+
+        b_x = root[1]
+        self.assertListEqual([b_x[0][0]], index.find_all_by_local_name('x', b_x))
+        self.assertListEqual([], index.find_all_by_local_name('x', b_x[0][0]))
+        self.assertIs(b_x[0], index.parent(b_x[0][0]))
+        self.assertIsNone(index.parent(root))
+
+    def test_unindexed_element(self):
+        root = ET.fromstring('<r><x/></r>', xml.XmlParser(index=True))
+        index = xml.XmlHelper.get_element_index(root)
+        other = ET.Element('x')
+        self.assertNotIn(other, index)
+        with self.assertRaises(ValueError):
+            index.parent(other)
+        with self.assertRaises(ValueError):
+            index.find_all_by_tag('x', other)
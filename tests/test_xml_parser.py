@@ -1,9 +1,8 @@
-import sys
-# Force Python XML parser, not faster C version so that we can hook methods
-sys.modules['_elementtree'] = None
 import xml.etree.ElementTree as ET
 import html
+import io
 import itertools
+import sys
 
 from pawpaw import Ito, Span, xml
 from tests.util import _TestIto, XML_TEST_SAMPLES
@@ -143,3 +142,129 @@ class TestXmlParser(_TestIto):
         text_ito = root.ito.find(f'*[d:{xml.descriptors.TEXT}]')
         self.assertIsNotNone(text_ito)
         self.assertEqual(comment + text, str(text_ito))
+
+    def test_c_accelerator_not_disabled(self):
+        try:
+            import _elementtree
+        except ImportError:
+            self.skipTest('C accelerated ElementTree not available')
+
+        self.assertIs(_elementtree.Element, ET.Element)
+        root = ET.fromstring('<a><b>1</b></a>', parser=xml.XmlParser())
+        self.assertIsInstance(root, ET.Element)
+        self.assertEqual('<b>1</b>', str(root[0].ito))
+
+    def test_parse_error(self):
+        with self.assertRaises(ET.ParseError) as ctx:
+            ET.fromstring('<a><b></a>', parser=xml.XmlParser())
+        self.assertEqual((1, 8), ctx.exception.position)
+
+    def test_char_offsets(self):
+        interval = xml.XmlParser._InternalIndexingParser.CHECKPOINT_INTERVAL
+        texts = [
+            'abc' * interval,
+            'é' * (interval + 3),
+            'a' * interval + '😀' + 'b' * (2 * interval) + 'ü' * 5,
+        ]
+        for text in texts:
+            index = xml.XmlParser._InternalIndexingParser(text, 'utf-8')
+            data = text.encode('utf-8')
+            byte_offsets = [b for b in range(len(data) + 1) if b == len(data) or (data[b] & 0xC0) != 0x80]
+            # Forward order, as queried by the parser, then backwards & strided to exercise checkpoints
+            for offsets in byte_offsets, byte_offsets[::-1], byte_offsets[::97]:
+                with self.subTest(text=text[:8], count=len(offsets)):
+                    expected = [len(data[:b].decode('utf-8')) for b in offsets]
+                    self.assertListEqual(expected, [index.char_offset_from(b) for b in offsets])
+
+    def test_non_ascii(self):
+        text = '<a x="😀"><ü>é\n<b/></ü>' + 'ä' * 3000 + '<c>d</c></a>'
+        root = ET.fromstring(text, parser=xml.XmlParser())
+        for e in root.iter():
+            with self.subTest(tag=e.tag):
+                self.assertTrue(str(e.ito).startswith('<' + e.tag))
+                self.assertTrue(str(e.ito).endswith('/>') or str(e.ito).endswith(f'</{e.tag}>'))
+
+    def test_attribute_forms(self):
+        text = '<a x="1>2" y=\'3\' z = "" xmlns:ns="u" ns:w="4"/>'
+        root = ET.fromstring(text, parser=xml.XmlParser())
+        start_tag = root.ito.find(f'*[d:{xml.descriptors.START_TAG}]')
+        self.assertEqual(text, str(start_tag))
+        attrs = start_tag.find(f'*[d:{xml.descriptors.ATTRIBUTES}]')
+        self.assertIs(root.attrib, attrs.value())
+        self.assertListEqual(
+            ['x="1>2"', "y='3'", 'z = ""', 'xmlns:ns="u"', 'ns:w="4"'],
+            [str(i) for i in attrs.children])
+        self.assertListEqual(
+            ['1>2', '3', '', 'u', '4'],
+            [str(i.find(f'*[d:{xml.descriptors.VALUE}]')) for i in attrs.children])
+
+    def test_tag_values(self):
+        text = '<a:b xmlns:a="u" a:d="1" e="2"></a:b>'
+        root = ET.fromstring(text, parser=xml.XmlParser())
+        tags = [*root.ito.find_all(f'**[d:{xml.descriptors.TAG}]')]
+        self.assertListEqual(['a:b', 'xmlns:a', 'a:d', 'e', 'a:b'], [str(t) for t in tags])
+        for tag in tags:
+            with self.subTest(tag=str(tag)):
+                qn = tag.value()
+                self.assertIsInstance(qn, xml.QualifiedName)
+                self.assertEqual(str(tag), str(qn))
+
+    def test_deep_nesting(self):
+        depth = 3 * sys.getrecursionlimit()
+        text = '<a>' * depth + 'x' + '</a>' * depth
+        root = ET.fromstring(text, parser=xml.XmlParser())
+        self.assertEqual(text, str(root.ito))
+        e = root
+        while len(e) > 0:
+            e = e[0]
+        self.assertEqual('<a>x</a>', str(e.ito))
+
+
+class TestXmlPullParser(_TestIto):
+    @staticmethod
+    def make_xml(count: int) -> str:
+        items = ''.join(f'<item id="{i}"><name>n&amp;{i} ☃</name><!--c--><empty/></item>\n' for i in range(count))
+        return f'<?xml version="1.0"?>\n<items>\n<meta a="1"/>\n{items}</items>'
+
+    def test_matches_xml_parser(self):
+        text = self.make_xml(20)
+        expected = list(ET.fromstring(text, parser=xml.XmlParser()).iter('item'))
+        for chunk_size in 1, 13, len(text):
+            with self.subTest(chunk_size=chunk_size):
+                actual = list(xml.iterparse(io.StringIO(text), 'item', chunk_size=chunk_size))
+                self.assertEqual(len(expected), len(actual))
+                for e, a in zip(expected, actual):
+                    self.assertEqual(str(e.ito), a.ito.string)
+                    self.assertEqual(e._spans.char, a._spans.char)
+                    self.assertEqual(e.attrib, a.attrib)
+                    self.assertIs(a, a.ito.value())
+                    shift = e.ito.start
+                    self.assertListEqual(
+                        [(Span(i.start - shift, i.stop - shift), i.desc) for i in e.ito.walk_descendants()],
+                        [(i.span, i.desc) for i in a.ito.walk_descendants()]
+                    )
+
+    def test_elements_released(self):
+        parser = xml.XmlPullParser(['item'])
+        text = self.make_xml(200)
+        max_buf = 0
+        for i in range(0, len(text), 100):
+            parser.feed(text[i:i + 100])
+            for e in parser.read_events():
+                self.assertEqual('item', e.tag)
+            max_buf = max(max_buf, len(parser._buf))
+        root = parser.close()
+
+        self.assertLess(max_buf, 300)
+        self.assertIsNone(root.find('item'))
+        self.assertIsNotNone(root.find('meta'))
+
+    def test_nested_chosen_tags(self):
+        text = '<a><b><b>1</b></b><c/><b/></a>'
+        actual = list(xml.iterparse(io.StringIO(text), ['b', 'c']))
+        self.assertListEqual(['<b><b>1</b></b>', '<c/>', '<b/>'], [e.ito.string for e in actual])
+        self.assertEqual(1, len(actual[0]))
+
+    def test_parse_error(self):
+        with self.assertRaises(ET.ParseError):
+            list(xml.iterparse(io.StringIO('<a><b></a>'), ['b']))
@@ -0,0 +1,98 @@
+import io
+import json
+
+import regex
+
+import pawpaw
+from pawpaw.visualization import pepo
+from tests.util import _TestIto
+
+
+class TestPepo(_TestIto):
+    def setUp(self) -> None:
+        super().setUp()
+
+        self.root = pawpaw.Ito('See Jack run.', desc='phrase')
+        re = regex.compile(r'(?<word>(?<char>[a-z])+)', regex.IGNORECASE)
+        self.root.children.add(*pawpaw.Ito.from_re(re, self.root))
+
+    @classmethod
+    def styles(cls) -> list[pepo.Pepo]:
+        return [pepo.Compact(), pepo.Tree(), pepo.Xml(), pepo.Json()]
+
+    def test_compact(self):
+        style = pepo.Compact()
+        style.linesep = '\n'
+        lines = style.dumps(self.root).splitlines()
+        self.assertEqual(17, len(lines))
+        self.assertEqual('1: (0, 13) \'phrase\' : \'See Jack run.\'', lines[0])
+        self.assertEqual('    2: (4, 8) \'0\' : \'Jack\'', lines[6])
+        self.assertEqual('            3: (11, 12) \'char\' : \'n\'', lines[-1])
+
+    def test_tree(self):
+        style = pepo.Tree()
+        style.linesep = '\n'
+        lines = style.dumps(self.root).splitlines()
+        self.assertEqual(17, len(lines))
+        self.assertEqual('(0, 13) \'phrase\' : \'See Jack run.\'', lines[0])
+        self.assertEqual('│     └──(2, 3) \'char\' : \'e\'', lines[5])
+        self.assertEqual('└──(9, 12) \'0\' : \'run\'', lines[12])
+        self.assertEqual('      └──(11, 12) \'char\' : \'n\'', lines[-1])
+
+    def test_json(self):
+        rv = json.loads(pepo.Json().dumps(self.root, self.root.children[0]))
+        self.assertEqual(2, len(rv['itos']))
+        actual = rv['itos'][0]
+        for ito in self.root, self.root.children[0], self.root.children[0].children[0]:
+            self.assertEqual(ito.span, (actual['start'], actual['stop']))
+            self.assertEqual(ito.desc, actual['desc'])
+            self.assertEqual(str(ito), actual['substr'])
+            self.assertEqual(len(ito.children), len(actual['children']))
+            actual = actual['children'][0] if len(actual['children']) > 0 else None
+
+    def test_xml(self):
+        style = pepo.Xml()
+        style.linesep = '\n'
+        lines = style.dumps(self.root).splitlines()
+        self.assertEqual('<itos>', lines[1])
+        self.assertEqual('    <ito start="0" stop="13" desc="phrase">', lines[2])
+        self.assertEqual('    <substring>See Jack run.</substring>', lines[3])
+        self.assertEqual('                <ito start="0" stop="1" desc="char">', lines[11])
+        self.assertEqual('            </ito>', lines[13])
+
+    def test_max_substr(self):
+        for style in pepo.Xml(max_substr=4), pepo.Json(max_substr=4):
+            with self.subTest(style=type(style).__name__):
+                rv = style.dumps(self.root)
+                self.assertIn('See …', rv)
+                self.assertNotIn('See Jack run.', rv)
+                self.assertIn('Jack', rv)
+
+        with self.assertRaises(ValueError):
+            pepo.Json(max_substr=-1)
+
+    def test_dump_chunked(self):
+        for style in self.styles():
+            with self.subTest(style=type(style).__name__):
+                expected = style.dumps(self.root, self.root.children[1])
+                style.CHUNK_SIZE = 10
+                with io.StringIO() as fs:
+                    style.dump(fs, self.root, self.root.children[1])
+                    self.assertEqual(expected, fs.getvalue())
+
+    def test_deep_tree(self):
+        depth = 2000
+        root = cur = pawpaw.Ito('x' * depth)
+        for i in range(1, depth):
+            cur.children.add(child := pawpaw.Ito(cur, 1))
+            cur = child
+
+        for style in self.styles():
+            with self.subTest(style=type(style).__name__):
+                self.assertLessEqual(depth, len(style.dumps(root).splitlines()))
+
+    def test_invalid_ito(self):
+        for style in self.styles():
+            with self.subTest(style=type(style).__name__):
+                with self.assertRaises(TypeError):
+                    style.dumps(self.root, 'abc')